@@ -1,6 +1,8 @@
 """Flask application factory."""
 from __future__ import annotations
 
+import os
+
 from flask import Flask
 
 
@@ -24,10 +26,32 @@ def create_app() -> Flask:
     # Register blueprints
     from app.web import web
     from app.api import api, export
+    from app.admin import admin
     
     app.register_blueprint(web)
     app.register_blueprint(api)
     app.register_blueprint(export)
+    app.register_blueprint(admin)
+    
+    # Named datasets: the same routes under /d/<dataset>/ (or ?dataset=)
+    app.register_blueprint(web, url_prefix="/d/<dataset>", name="dataset_web")
+    app.register_blueprint(api, url_prefix="/d/<dataset>/api", name="dataset_api")
+    app.register_blueprint(export, url_prefix="/d/<dataset>/export", name="dataset_export")
+    
+    @app.url_value_preprocessor
+    def pull_dataset(endpoint, values):
+        if values and "dataset" in values:
+            from flask import g
+            g.dataset = values.pop("dataset")
+    
+    # Warmup: build the cache in the background right after boot. With the
+    # debug reloader, only the serving child process warms up.
+    from app.services import warmup
+    reloader_parent = app.debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+    if config.WARMUP_ON_STARTUP and not reloader_parent:
+        warmup.start_warmup()
+    elif not config.WARMUP_ON_STARTUP:
+        warmup.disable_warmup()
     
     # Error handlers
     @app.errorhandler(404)
@@ -0,0 +1,101 @@
+"""Token-gated admin routes: on-demand profiling of refreshes and requests."""
+from __future__ import annotations
+
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+from app import config
+from app.services import InvalidRequest, get_data_service, profiler
+
+
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+# Upper bound for ?requests= on /admin/profile/requests
+MAX_PROFILED_REQUESTS = 1000
+
+
+@admin.before_request
+def require_token():
+    """404 when no ADMIN_TOKEN is configured, 403 on a wrong token."""
+    if not config.ADMIN_TOKEN:
+        abort(404)
+    supplied = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(supplied.encode(), config.ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+
+
+def _profiler_args() -> tuple[str, float]:
+    """Read ?mode=sample|cprofile and ?interval_ms= from the request."""
+    mode = request.args.get("mode", "sample")
+    if mode not in profiler.MODES:
+        raise InvalidRequest(f"Invalid mode: {mode!r} (expected one of {', '.join(profiler.MODES)})")
+    try:
+        interval = float(request.args.get("interval_ms", "5")) / 1000
+    except ValueError:
+        raise InvalidRequest("interval_ms must be a number")
+    if interval <= 0:
+        raise InvalidRequest("interval_ms must be positive")
+    return mode, interval
+
+
+@admin.route("/profile/refresh", methods=["POST"])
+def profile_refresh():
+    """Rebuild the snapshot (force_refresh) under the profiler and return the report."""
+    try:
+        mode, interval = _profiler_args()
+        report = profiler.profile_call(
+            lambda: get_data_service().get_snapshot(force_refresh=True), mode, interval
+        )
+        return Response(report, mimetype="text/plain")
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@admin.route("/profile/requests", methods=["POST"])
+def profile_requests():
+    """
+    Profile the next ?requests=N requests (admin routes excluded).
+    
+    The session ends after PROFILE_REQUESTS_TIMEOUT seconds even if fewer
+    requests arrived; DELETE cancels it earlier.
+    """
+    try:
+        mode, interval = _profiler_args()
+        try:
+            n = int(request.args.get("requests", "10"))
+        except ValueError:
+            raise InvalidRequest("requests must be an integer")
+        if not 1 <= n <= MAX_PROFILED_REQUESTS:
+            raise InvalidRequest(f"requests must be between 1 and {MAX_PROFILED_REQUESTS}")
+        session = profiler.start_request_profile(
+            current_app._get_current_object(), mode, n, interval, timeout=config.PROFILE_REQUESTS_TIMEOUT
+        )
+        return jsonify(session.status()), 202
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+
+
+@admin.route("/profile/requests")
+def profile_requests_result():
+    """Get the report of the last request profile (202 while still running)."""
+    session = profiler.current_session()
+    if session is None:
+        return jsonify({"error": "No request profile started"}), 404
+    if not session.finished.is_set():
+        return jsonify(session.status()), 202
+    return Response(session.report(), mimetype="text/plain")
+
+
+@admin.route("/profile/requests", methods=["DELETE"])
+def cancel_profile_requests():
+    """Stop the running request profile; its report so far stays available."""
+    session = profiler.current_session()
+    if session is None:
+        return jsonify({"error": "No request profile started"}), 404
+    session.finish(reason="cancelled")
+    return jsonify(session.status())
@@ -1,21 +1,69 @@
 """API routes for JSON data."""
 from __future__ import annotations
 
-from flask import Blueprint, Response, jsonify, make_response
+from flask import Blueprint, Response, g, jsonify, make_response, request, send_file
 import io
+from typing import Optional
 
-from app.services.data_service import data_service
+from app import config
+from app.services import InvalidRequest, admission, get_data_service
+from app.services.exports import get_export_queue
 
 
 api = Blueprint("api", __name__, url_prefix="/api")
 
+# Endpoints answered from the sample-based snapshot during the first build
+APPROXIMATE_ENDPOINTS = {"summary", "churn_by_rfm", "risk_summary"}
+
+# Export job polls and downloads: a dict read or send_file of a finished
+# file, exempt from load shedding and export slots (clients poll most
+# exactly when exports are saturated)
+UNMETERED_ENDPOINTS = {"export_job_status", "download_export_job"}
+
+
+def _endpoint() -> str:
+    """Name of the view function handling the request (without blueprint)."""
+    return (request.endpoint or "").rsplit(".", 1)[-1]
+
+
+def _unavailable(message: str, retry_after: int):
+    """503 response asking the client to come back in retry_after seconds."""
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+@api.before_request
+def shed_while_building():
+    """
+    Answer 503 + Retry-After instead of queueing behind a cold cache build.
+    
+    Refreshes of a published snapshot never block: requests keep being served
+    from the last good snapshot until the new one replaces it.
+    """
+    if not config.CACHE_ENABLED or _endpoint() in UNMETERED_ENDPOINTS:
+        return None
+    try:
+        service = get_data_service()
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    if service.is_warm() or not service.is_building():
+        return None
+    
+    if _endpoint() in APPROXIMATE_ENDPOINTS and "as_of" not in request.args and service.has_approximation():
+        return None
+    return _unavailable("Data is being prepared, retry later", service.retry_after())
+
 
 @api.route("/summary")
 def summary():
     """Get KPIs summary."""
     try:
-        kpis = data_service.get_kpis()
+        kpis = get_data_service().get_kpis(as_of=request.args.get("as_of"))
         return jsonify(kpis)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -24,18 +72,96 @@ def summary():
 def churn_by_rfm():
     """Get churn rate by RFM score."""
     try:
-        data = data_service.get_churn_by_rfm()
+        data = get_data_service().get_churn_by_rfm(as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/rfm_matrix")
+def rfm_matrix():
+    """Get count, churn rate and monetary for the 5x5x5 R-F-M cells."""
+    try:
+        data = get_data_service().get_rfm_matrix(as_of=request.args.get("as_of"))
         return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@api.route("/breakdown")
+def breakdown():
+    """Get churn by ?by=dim1,dim2 with optional dimension filters (?dim=value)."""
+    try:
+        by = [d for d in request.args.get("by", "").split(",") if d]
+        filters = {k: v for k, v in request.args.items() if k not in ("by", "as_of", "dataset")}
+        data = get_data_service().get_breakdown(by, filters, as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _int_arg(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Read an optional integer query parameter."""
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidRequest(f"{name} must be an integer")
+
+
 @api.route("/recency_hist")
 def recency_hist():
-    """Get recency histogram data."""
+    """Get recency histogram data (?bins=20&min=&max=)."""
+    try:
+        data = get_data_service().get_recency_histogram(
+            bins=_int_arg("bins", 20),
+            as_of=request.args.get("as_of"),
+            low=_int_arg("min"),
+            high=_int_arg("max")
+        )
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/histogram")
+def feature_histogram():
+    """Get a histogram of ?field=recency_days|tenure_days|frequency (?bins=&min=&max=)."""
     try:
-        data = data_service.get_recency_histogram(bins=20)
+        data = get_data_service().get_histogram(
+            field=request.args.get("field", "recency_days"),
+            bins=_int_arg("bins", 20),
+            low=_int_arg("min"),
+            high=_int_arg("max"),
+            as_of=request.args.get("as_of")
+        )
         return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/range_count")
+def range_count():
+    """Count customers with ?field between ?min and ?max (inclusive)."""
+    try:
+        field = request.args.get("field", "recency_days")
+        low, high = _int_arg("min"), _int_arg("max")
+        count = get_data_service().count_in_range(field, low, high, as_of=request.args.get("as_of"))
+        return jsonify({"field": field, "min": low, "max": high, "count": count})
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -44,8 +170,10 @@ def recency_hist():
 def risk_summary():
     """Get risk segment summary."""
     try:
-        data = data_service.get_risk_summary()
+        data = get_data_service().get_risk_summary(as_of=request.args.get("as_of"))
         return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -54,8 +182,112 @@ def risk_summary():
 def top_risk():
     """Get top 50 risk customers."""
     try:
-        data = data_service.get_top_risk(n=50)
+        data = get_data_service().get_top_risk(n=50, as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/cohorts")
+def cohorts():
+    """Get acquisition cohort retention matrix."""
+    try:
+        data = get_data_service().get_cohorts(as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/churn_trend")
+def churn_trend():
+    """Get monthly churn rate and active customers trend."""
+    try:
+        data = get_data_service().get_churn_trend(as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/data_quality")
+def data_quality():
+    """Get rows dropped by validation rules in the last pipeline run."""
+    try:
+        data = get_data_service().get_data_quality()
+        return jsonify(data)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/customers/<customer_unique_id>")
+def customer(customer_unique_id: str):
+    """Get one customer's RFM profile."""
+    try:
+        data = get_data_service().get_customer(customer_unique_id, as_of=request.args.get("as_of"))
+        if data is None:
+            return jsonify({"error": f"Customer not found: {customer_unique_id}"}), 404
         return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/customers/batch", methods=["GET"])
+def customers_batch_get():
+    """Reject GET on the batch route (it would otherwise match /customers/<id>)."""
+    response = jsonify({"error": 'Use POST with JSON {"ids": [...]}'})
+    response.status_code = 405
+    response.headers["Allow"] = "POST"
+    return response
+
+
+@api.route("/customers/batch", methods=["POST"])
+def customers_batch():
+    """Get RFM profiles for a JSON list of IDs: {"ids": [...]}."""
+    try:
+        payload = request.get_json(silent=True) or {}
+        ids = payload.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            raise InvalidRequest('Body must be JSON {"ids": [<customer_unique_id>, ...]}')
+        if len(ids) > config.CUSTOMER_BATCH_LIMIT:
+            raise InvalidRequest(f"At most {config.CUSTOMER_BATCH_LIMIT} ids per request")
+        
+        found, missing = get_data_service().get_customers(ids, as_of=request.args.get("as_of"))
+        return jsonify({"customers": found, "missing": missing})
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/churn_model")
+def churn_model():
+    """Get the parameters of the churn probability model."""
+    try:
+        data = get_data_service().get_churn_model(as_of=request.args.get("as_of"))
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route("/segment_migration")
+def segment_migration():
+    """Get the risk segment transition matrix between the last two data refreshes."""
+    try:
+        data = get_data_service().get_segment_migration()
+        if data is None:
+            return jsonify({"error": "No segment changes between refreshes yet"}), 404
+        return jsonify(data)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -63,44 +295,188 @@ def top_risk():
 # Export endpoints
 export = Blueprint("export", __name__, url_prefix="/export")
 
+# Rows serialized per chunk by streaming exports
+DELTA_CHUNK_ROWS = 10_000
+
+export.before_request(shed_while_building)
+
+
+@export.before_request
+def admit_export():
+    """Take an export slot (queueing briefly), or answer 503 when saturated."""
+    if _endpoint() in UNMETERED_ENDPOINTS:
+        return None
+    if not admission.export_limiter.acquire():
+        return _unavailable("Too many exports in progress, retry later", config.RETRY_AFTER_SECONDS)
+    g.export_slot = True
+
+
+@export.after_request
+def release_export_on_close(response):
+    """Release the export slot; generated streams hold it until sent or closed."""
+    if g.pop("export_slot", False):
+        release = admission.release_once(admission.export_limiter)
+        # Files (send_file) are passed through to the server untouched
+        if response.is_streamed and not response.direct_passthrough:
+            response.response = admission.release_after(response.response, release)
+            response.call_on_close(release)
+        else:
+            release()
+    return response
+
+
+@export.teardown_request
+def release_export_on_error(exc):
+    """Release the slot of an export that failed before producing a response."""
+    if g.pop("export_slot", False):
+        admission.export_limiter.release()
+
+
+def _send_export(job):
+    """Send a finished export's cached file as a CSV attachment."""
+    return send_file(
+        get_export_queue().path(job.key),
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=job.filename
+    )
+
 
 @export.route("/customers.csv")
 def export_customers():
-    """Export all customer features as CSV."""
+    """Export all customer features as CSV (cached per snapshot content)."""
     try:
-        features = data_service.get_all_features()
+        service = get_data_service()
+        as_of = request.args.get("as_of")
+        job = get_export_queue().run_now(service, "customers", as_of=as_of)
         
-        # Convert to CSV
-        output = io.StringIO()
-        features.to_csv(output, index=False)
-        output.seek(0)
-        
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = "attachment; filename=customers_features.csv"
-        response.headers["Content-Type"] = "text/csv"
+        response = _send_export(job)
+        if job.snapshot_version is not None:
+            # Starting point for /export/customers_delta?since=<version>: the
+            # version of the snapshot the file was rendered from
+            response.headers["X-Snapshot-Version"] = str(job.snapshot_version)
         
         return response
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        return _unavailable("Export file was evicted, retry later", config.RETRY_AFTER_SECONDS)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@export.route("/top_risk.csv")
-def export_top_risk():
-    """Export top 50 risk customers as CSV."""
+@export.route("/jobs", methods=["POST"])
+def submit_export_job():
+    """
+    Queue an export (?kind=customers|top_risk&as_of=) in the background.
+    
+    Returns 202 with the job status; poll /export/jobs/<id> and download
+    /export/jobs/<id>/download once status is "done". Identical requests
+    share one job, or the cached file when the data hasn't changed.
+    """
     try:
+        job = get_export_queue().submit(
+            get_data_service(),
+            request.args.get("kind", "customers"),
+            as_of=request.args.get("as_of")
+        )
+        return jsonify(job.to_dict()), 202, {"Location": f"{request.script_root}{request.path}/{job.id}"}
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@export.route("/jobs/<job_id>")
+def export_job_status(job_id: str):
+    """Get the status of an export job."""
+    job = get_export_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown export job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@export.route("/jobs/<job_id>/download")
+def download_export_job(job_id: str):
+    """Download the file of a finished export job (409 until it is done)."""
+    job = get_export_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown export job: {job_id}"}), 404
+    if job.status != "done":
+        return jsonify({"error": f"Export job is {job.status}", "job": job.to_dict()}), 409
+    try:
+        return _send_export(job)
+    except FileNotFoundError:
+        return jsonify({"error": "Export file expired; submit the export again"}), 410
+
+
+@export.route("/customers_delta")
+def export_customers_delta():
+    """
+    Stream customer rows changed since ?since=<version> as CSV.
+    
+    The first column, change, is "upsert" for inserted or changed customers
+    and "delete" for removed ones (only customer_unique_id is filled).
+    X-Snapshot-Version carries the version to pass as since next time.
+    """
+    try:
+        version, rows, deleted = get_data_service().get_customers_delta(request.args.get("since"))
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    columns = ["change"] + list(rows.columns)
+    
+    def generate():
         import pandas as pd
         
-        top_risk_data = data_service.get_top_risk(n=50)
-        df = pd.DataFrame(top_risk_data)
+        yield ",".join(columns) + "\n"
+        for start in range(0, len(rows), DELTA_CHUNK_ROWS):
+            chunk = rows.iloc[start:start + DELTA_CHUNK_ROWS]
+            yield chunk.assign(change="upsert")[columns].to_csv(index=False, header=False)
+        for start in range(0, len(deleted), DELTA_CHUNK_ROWS):
+            chunk = pd.DataFrame({"change": "delete", "customer_unique_id": deleted[start:start + DELTA_CHUNK_ROWS]})
+            yield chunk.reindex(columns=columns).to_csv(index=False, header=False)
+    
+    response = Response(generate(), mimetype="text/csv")
+    response.headers["Content-Disposition"] = "attachment; filename=customers_delta.csv"
+    response.headers["X-Snapshot-Version"] = str(version)
+    return response
+
+
+@export.route("/top_risk.csv")
+def export_top_risk():
+    """Export top 50 risk customers as CSV (cached per snapshot content)."""
+    try:
+        job = get_export_queue().run_now(get_data_service(), "top_risk", as_of=request.args.get("as_of"))
+        return _send_export(job)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        return _unavailable("Export file was evicted, retry later", config.RETRY_AFTER_SECONDS)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@export.route("/segment_changes.csv")
+def export_segment_changes():
+    """Export customers whose risk segment changed in the last refresh as CSV."""
+    try:
+        changes = get_data_service().get_segment_changes()
+        if changes is None:
+            return jsonify({"error": "No segment changes between refreshes yet"}), 404
         
         output = io.StringIO()
-        df.to_csv(output, index=False)
+        changes.to_csv(output, index=False)
         output.seek(0)
         
         response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = "attachment; filename=top_risk.csv"
+        response.headers["Content-Disposition"] = "attachment; filename=segment_changes.csv"
         response.headers["Content-Type"] = "text/csv"
         
         return response
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,168 @@
+"""
+Headless batch runner.
+
+Runs the full pipeline on a data directory, computes the dashboard
+aggregates and publishes everything as a versioned artifact that the web
+tier can load (ARTIFACTS_DIR) instead of recomputing on startup:
+
+    python -m app.cli --data-dir data --output-dir artifacts --profile
+
+A JSON summary with per-stage timings is printed to stdout.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import hashlib
+import io
+import json
+import pstats
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app import config
+
+
+DEFAULT_OUTPUT_DIR = str(config.BASE_DIR / "artifacts")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Run the ChurnLens pipeline in batch.")
+    parser.add_argument("--data-dir", default=str(config.DATA_DIR), help="Directory with the Olist CSVs")
+    parser.add_argument("--output-dir", default=config.ARTIFACTS_DIR or DEFAULT_OUTPUT_DIR, help="Artifacts root directory")
+    parser.add_argument("--workers", type=int, default=None, help="Files read in parallel (default: LOAD_WORKERS)")
+    parser.add_argument("--profile", action="store_true", help="Profile the run and save profile.pstats with the artifact")
+    parser.add_argument("--keep", type=int, default=None, help="Keep only the newest N versions")
+    return parser.parse_args(argv)
+
+
+def artifact_version(fingerprints: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """
+    Build a sortable version name: UTC timestamp (to the microsecond, so
+    back-to-back runs on the same inputs don't collide) plus a digest of
+    the inputs.
+    
+    Args:
+        fingerprints: Input file fingerprints
+        params: Pipeline parameters
+    
+    Returns:
+        Version name, e.g. 20180903T120000123456Z-1a2b3c4d
+    """
+    digest = hashlib.sha1(json.dumps([fingerprints, params], sort_keys=True).encode()).hexdigest()[:8]
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}-{digest}"
+
+
+def compute_aggregates(service) -> Dict[str, Any]:
+    """Compute the aggregates shipped with an artifact from the service's snapshot."""
+    return {
+        "kpis": service.get_kpis(),
+        "churn_by_rfm": service.get_churn_by_rfm(),
+        "rfm_matrix": service.get_rfm_matrix(),
+        "risk_summary": service.get_risk_summary(),
+        "recency_hist": service.get_recency_histogram(),
+        "cohorts": service.get_cohorts(),
+        "churn_trend": service.get_churn_trend(),
+        "churn_model": service.get_churn_model(),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the pipeline and publish an artifact.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        JSON-ready run summary
+    """
+    from app.services import artifacts, loader
+    from app.services.data_service import DataService, _timed
+    
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    
+    service = DataService(data_dir=args.data_dir)
+    fingerprints = loader.file_fingerprints(service.data_paths())
+    params = {
+        "churn_threshold_days": config.CHURN_THRESHOLD_DAYS,
+        "valid_status": sorted(config.VALID_STATUS),
+    }
+    version = artifact_version(fingerprints, params)
+    
+    snapshot = service.build_snapshot(timings=timings, workers=args.workers)
+    service.use_snapshot(snapshot)
+    
+    with _timed(timings, "aggregates"):
+        aggregates = compute_aggregates(service)
+    
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "as_of_date": snapshot.as_of_date.isoformat(),
+        "customers": len(snapshot.features),
+        "orders": len(snapshot.orders),
+        "inputs": fingerprints,
+        "params": params,
+        "timings": timings,
+    }
+    
+    with _timed(timings, "write"):
+        path = artifacts.write_artifacts(
+            args.output_dir,
+            version,
+            features=snapshot.features,
+            orders=snapshot.orders,
+            quality=service.get_data_quality(),
+            aggregates=aggregates,
+            manifest=manifest,
+        )
+    
+    pruned = artifacts.prune_versions(args.output_dir, args.keep) if args.keep else []
+    timings["total"] = round(time.perf_counter() - start, 4)
+    
+    return {
+        "version": version,
+        "output": str(path),
+        "as_of_date": manifest["as_of_date"],
+        "customers": manifest["customers"],
+        "orders": manifest["orders"],
+        "timings": timings,
+        "pruned": pruned,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """CLI entry point; prints a JSON summary and returns the exit code."""
+    args = parse_args(argv)
+    profiler = cProfile.Profile() if args.profile else None
+    
+    try:
+        if profiler:
+            profiler.enable()
+        summary = run(args)
+    except Exception as e:
+        print(json.dumps({"status": "error", "error": f"{type(e).__name__}: {e}"}), file=sys.stdout)
+        return 1
+    finally:
+        if profiler:
+            profiler.disable()
+    
+    if profiler:
+        stats_path = f"{summary['output']}/profile.pstats"
+        profiler.dump_stats(stats_path)
+        summary["profile"] = stats_path
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(20)
+        print(out.getvalue(), file=sys.stderr)
+    
+    print(json.dumps({"status": "ok", **summary}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,14 +9,45 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent  # ChurnLens/
 DATA_DIR = BASE_DIR / "data"
 
+# Data file names (same in every data directory)
+DATA_FILES = {
+    "customers": "olist_customers_dataset.csv",
+    "orders": "olist_orders_dataset.csv",
+    "payments": "olist_order_payments_dataset.csv",
+}
+
 # Data file paths
-PATH_CUSTOMERS = str(DATA_DIR / "olist_customers_dataset.csv")
-PATH_ORDERS = str(DATA_DIR / "olist_orders_dataset.csv")
-PATH_PAYMENTS = str(DATA_DIR / "olist_order_payments_dataset.csv")
+PATH_CUSTOMERS = str(DATA_DIR / DATA_FILES["customers"])
+PATH_ORDERS = str(DATA_DIR / DATA_FILES["orders"])
+PATH_PAYMENTS = str(DATA_DIR / DATA_FILES["payments"])
+
+# Batch artifacts: when set, the web tier loads the latest artifact written
+# by `python -m app.cli` instead of running the pipeline itself
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR") or None
+
+# Pipeline stage memo: when set, stage outputs (prepared orders, features,
+# scores, churn model) are stored on disk keyed by a hash of their inputs, so
+# a rebuild only reruns the stages whose inputs changed; least recently used
+# entries are deleted above MEMO_MAX_MB
+MEMO_DIR = os.getenv("MEMO_DIR") or None
+MEMO_MAX_MB = int(os.getenv("MEMO_MAX_MB", "1024"))
+
+# Extra named datasets served next to the default one, as
+# "name=/path/to/dir,other=/path/to/other" (same file names as DATA_DIR)
+DATASETS = dict(
+    item.split("=", 1) for item in os.getenv("DATASETS", "").split(",") if "=" in item
+)
+DEFAULT_DATASET = "default"
+
+# CSV loading: "auto" uses pyarrow when installed, else pandas' C parser
+CSV_ENGINE = os.getenv("CSV_ENGINE", "auto")
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "3"))  # Files read concurrently
 
 # Analysis parameters
 CHURN_THRESHOLD_DAYS = int(os.getenv("CHURN_THRESHOLD_DAYS", "270"))
 VALID_STATUS = {"delivered"}  # Can be expanded if needed
+# churn_probability: chance of no purchase in the next N days
+CHURN_MODEL_HORIZON_DAYS = int(os.getenv("CHURN_MODEL_HORIZON_DAYS", str(CHURN_THRESHOLD_DAYS)))
 
 # Flask config
 DEBUG = os.getenv("FLASK_DEBUG", "True").lower() in ("true", "1", "yes")
@@ -25,3 +56,47 @@ PORT = int(os.getenv("FLASK_PORT", "5000"))
 
 # Cache control
 CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+AS_OF_CACHE_SIZE = int(os.getenv("AS_OF_CACHE_SIZE", "8"))  # Replayed as_of snapshots kept in memory
+# Approximate mode: while the first full build runs, the dashboard KPIs,
+# churn by RFM and risk summary are estimated (with 95% CIs) from a
+# stratified sample of customers drawn right after loading
+APPROX_MODE = os.getenv("APPROX_MODE", "False").lower() in ("true", "1", "yes")
+APPROX_SAMPLE_SIZE = int(os.getenv("APPROX_SAMPLE_SIZE", "20000"))
+
+# Snapshot versions whose row hashes are kept for /export/customers_delta
+SNAPSHOT_VERSIONS_KEPT = int(os.getenv("SNAPSHOT_VERSIONS_KEPT", "24"))
+# Memory budget for cached snapshots across all datasets (0 = unlimited);
+# least recently used datasets are evicted first
+SNAPSHOT_MEMORY_BUDGET_MB = int(os.getenv("SNAPSHOT_MEMORY_BUDGET_MB", "0"))
+
+# Admission control: /export/* requests run at most EXPORT_CONCURRENCY at a
+# time, with up to EXPORT_QUEUE_SIZE more waiting EXPORT_QUEUE_TIMEOUT
+# seconds for a slot; beyond that, and for data requests while the cache is
+# cold and being built, the answer is 503 with Retry-After
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "2"))
+EXPORT_QUEUE_SIZE = int(os.getenv("EXPORT_QUEUE_SIZE", "4"))
+EXPORT_QUEUE_TIMEOUT = float(os.getenv("EXPORT_QUEUE_TIMEOUT", "10"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))  # When no build time is known
+
+# Export jobs (/export/jobs): rendered by EXPORT_WORKERS threads into
+# EXPORT_DIR, keyed by snapshot content and parameters; the
+# EXPORT_FILES_KEPT most recently used files are kept
+EXPORT_DIR = os.getenv("EXPORT_DIR") or str(BASE_DIR / "exports")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "1"))
+EXPORT_FILES_KEPT = int(os.getenv("EXPORT_FILES_KEPT", "20"))
+
+# Maximum IDs per batch customer lookup
+CUSTOMER_BATCH_LIMIT = int(os.getenv("CUSTOMER_BATCH_LIMIT", "1000"))
+
+# Maximum bins per histogram (/api/recency_hist, /api/histogram)
+HISTOGRAM_MAX_BINS = int(os.getenv("HISTOGRAM_MAX_BINS", "1000"))
+
+# Admin endpoints (/admin/*) require this token; disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+# A request profile (/admin/profile/requests) ends after this many seconds
+# even if fewer requests than asked for arrived
+PROFILE_REQUESTS_TIMEOUT = float(os.getenv("PROFILE_REQUESTS_TIMEOUT", "300"))
+
+# Startup: build the cache in a background thread right after boot
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "True").lower() in ("true", "1", "yes")
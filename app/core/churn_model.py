@@ -0,0 +1,155 @@
+"""
+Churn probability model.
+
+A logistic regression on log-scaled RFM features, fitted with NumPy
+(Newton-Raphson / IRLS with a small L2 penalty). Training examples come from
+replaying the order index at as_of_date - horizon: a customer known then is
+labelled churned if they placed no order in the following horizon days. The
+fitted model is then applied to the current features, so churn_probability is
+the estimated chance of no purchase in the next horizon days.
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core import order_index
+
+
+MODEL_FEATURES = ["recency_days", "frequency", "monetary", "tenure_days"]
+
+# Below this many training rows (or with a single class) the model falls
+# back to the base rate
+MIN_TRAIN_ROWS = 20
+
+
+@dataclass
+class ChurnModel:
+    """Fitted logistic regression parameters."""
+    coef: list[float]           # intercept first, then one weight per MODEL_FEATURES
+    mean: list[float]           # standardization of log1p(features)
+    scale: list[float]
+    horizon_days: int
+    train_as_of: Optional[str]  # replay date the training features were taken at
+    n_train: int
+    churn_rate: float           # share of training customers labelled churned
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChurnModel":
+        """Rebuild a model from asdict() output."""
+        return cls(**data)
+
+
+def _log_features(features: pd.DataFrame) -> np.ndarray:
+    """log1p of the model features (clipped at 0) as a float64 matrix."""
+    return np.log1p(np.clip(features[MODEL_FEATURES].to_numpy(dtype="float64"), 0, None))
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float = 1.0, max_iter: int = 25, tol: float = 1e-8) -> np.ndarray:
+    """
+    Fit logistic regression weights with Newton-Raphson.
+
+    Args:
+        X: Design matrix, first column all ones (intercept, not penalized)
+        y: 0/1 labels
+        l2: L2 penalty on the non-intercept weights
+        max_iter: Maximum Newton steps
+        tol: Stop when the largest weight update is below tol
+
+    Returns:
+        Weight vector
+    """
+    n_features = X.shape[1]
+    penalty = np.full(n_features, l2)
+    penalty[0] = 0.0
+    w = np.zeros(n_features)
+
+    for _ in range(max_iter):
+        p = 1.0 / (1.0 + np.exp(-(X @ w)))
+        gradient = X.T @ (p - y) + penalty * w
+        hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty) + 1e-9 * np.eye(n_features)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < tol:
+            break
+    return w
+
+
+def _base_rate_model(rate: float, horizon_days: int, train_as_of: Optional[str], n_train: int) -> ChurnModel:
+    """Intercept-only model predicting a constant (clipped) rate."""
+    rate = float(np.clip(rate, 0.01, 0.99))
+    k = len(MODEL_FEATURES)
+    return ChurnModel(
+        coef=[float(np.log(rate / (1 - rate)))] + [0.0] * k,
+        mean=[0.0] * k,
+        scale=[1.0] * k,
+        horizon_days=horizon_days,
+        train_as_of=train_as_of,
+        n_train=n_train,
+        churn_rate=rate,
+    )
+
+
+def train_churn_model(index: order_index.OrderIndex, as_of_date: pd.Timestamp, horizon_days: int) -> ChurnModel:
+    """
+    Train the model on a replay of the order index horizon_days before as_of_date.
+
+    Args:
+        index: Order index
+        as_of_date: Reference date of the snapshot being scored
+        horizon_days: Days without purchase that count as churn
+
+    Returns:
+        Fitted ChurnModel (base rate model when there's too little history)
+    """
+    train_as_of = pd.Timestamp(as_of_date) - pd.Timedelta(days=horizon_days)
+    if train_as_of < index.first_time:
+        return _base_rate_model(0.5, horizon_days, None, 0)
+
+    start = index.offsets[:-1]
+    end_train = order_index.prefix_positions(index, train_as_of)
+    end_now = order_index.prefix_positions(index, as_of_date)
+    known = end_train > start
+    y = (end_now[known] == end_train[known]).astype("float64")
+
+    label = train_as_of.strftime("%Y-%m-%d")
+    if len(y) < MIN_TRAIN_ROWS or y.min() == y.max():
+        return _base_rate_model(y.mean() if len(y) else 0.5, horizon_days, label, len(y))
+
+    X = _log_features(order_index.features_as_of(index, train_as_of))
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    X = np.column_stack([np.ones(len(X)), (X - mean) / scale])
+
+    return ChurnModel(
+        coef=fit_logistic(X, y).tolist(),
+        mean=mean.tolist(),
+        scale=scale.tolist(),
+        horizon_days=horizon_days,
+        train_as_of=label,
+        n_train=int(len(y)),
+        churn_rate=float(y.mean()),
+    )
+
+
+def predict_churn_probability(model: ChurnModel, features: pd.DataFrame) -> np.ndarray:
+    """
+    Score customers with the model.
+
+    Args:
+        model: Fitted ChurnModel
+        features: Features DataFrame with MODEL_FEATURES
+
+    Returns:
+        float64 array of churn probabilities, one per row
+    """
+    coef = np.asarray(model.coef)
+    X = (_log_features(features) - np.asarray(model.mean)) / np.asarray(model.scale)
+    z = np.clip(X @ coef[1:] + coef[0], -500, 500)
+    return 1.0 / (1.0 + np.exp(-z))
@@ -0,0 +1,139 @@
+"""
+Cohort and churn trend rollups.
+
+Both rollups are computed in a single sweep over the joined orders, instead of
+rerunning the pipeline once per month:
+
+- Cohort matrix: acquisition month (first purchase) x months since first
+  purchase, counting distinct customers with an order in that month.
+- Churn trend: churn rate at the end of every month, using the same rule as
+  add_churn_label (recency_days >= threshold).
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def month_index(timestamps: pd.Series) -> np.ndarray:
+    """
+    Convert timestamps to an integer month counter (year * 12 + month - 1).
+
+    Args:
+        timestamps: Datetime Series
+
+    Returns:
+        int64 array of month indexes
+    """
+    return (timestamps.dt.year.to_numpy() * 12 + timestamps.dt.month.to_numpy() - 1).astype("int64")
+
+
+def _month_label(index: int) -> str:
+    """Format a month index as YYYY-MM."""
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def compute_cohort_matrix(orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Count active customers per acquisition cohort and months since acquisition.
+
+    Args:
+        orders: Joined orders DataFrame with customer_unique_id and
+            order_purchase_timestamp
+
+    Returns:
+        DataFrame indexed by cohort (YYYY-MM) with one integer column per
+        month offset; column 0 is the cohort size
+    """
+    months = month_index(orders["order_purchase_timestamp"])
+    codes, _ = pd.factorize(orders["customer_unique_id"])
+
+    first_month = np.full(codes.max() + 1, np.iinfo("int64").max, dtype="int64")
+    np.minimum.at(first_month, codes, months)
+
+    m0 = months.min()
+    n_months = int(months.max() - m0 + 1)
+
+    # Distinct (customer, month) pairs, then one bincount over (cohort, offset)
+    pairs = np.unique(codes.astype("int64") * n_months + (months - m0))
+    pair_codes = pairs // n_months
+    pair_months = pairs % n_months
+    cohort = first_month[pair_codes] - m0
+    offset = pair_months - cohort
+
+    counts = np.bincount(cohort * n_months + offset, minlength=n_months * n_months)
+    matrix = counts.reshape(n_months, n_months)
+
+    result = pd.DataFrame(matrix, index=[_month_label(m0 + i) for i in range(n_months)])
+    result.index.name = "cohort"
+    # Drop months in which nobody was acquired
+    return result[result[0] > 0]
+
+
+def compute_churn_trend(orders: pd.DataFrame, threshold_days: int) -> pd.DataFrame:
+    """
+    Compute churn rate at the end of every month covered by the orders.
+
+    A customer is known at time t once their first order is <= t and active
+    while some order satisfies order <= t < order + threshold_days. The active
+    intervals of each customer are merged in one sorted sweep and counted per
+    month-end with a difference array. The last point uses the latest order
+    timestamp, so it matches the snapshot computed by run_pipeline.
+
+    Args:
+        orders: Joined orders DataFrame with customer_unique_id and
+            order_purchase_timestamp
+        threshold_days: Days threshold for churn
+
+    Returns:
+        DataFrame with month, as_of_date, customers, active_customers,
+        churned_customers and churn_rate (%)
+    """
+    ts = orders["order_purchase_timestamp"].to_numpy(dtype="datetime64[ns]").astype("int64")
+    codes, _ = pd.factorize(orders["customer_unique_id"])
+
+    # As-of points: end of each month, last one capped to the latest order
+    periods = pd.period_range(
+        orders["order_purchase_timestamp"].min(),
+        orders["order_purchase_timestamp"].max(),
+        freq="M"
+    )
+    points = periods.end_time.to_numpy(dtype="datetime64[ns]").astype("int64")
+    points[-1] = ts.max()
+
+    # Sort by (customer, time) and merge overlapping [order, order + T) windows
+    order = np.lexsort((ts, codes))
+    ts_sorted = ts[order]
+    codes_sorted = codes[order]
+    window = np.int64(threshold_days) * 86_400 * 10**9
+    ends = ts_sorted + window
+
+    starts_group = np.ones(len(ts_sorted), dtype=bool)
+    starts_group[1:] = (codes_sorted[1:] != codes_sorted[:-1]) | (ts_sorted[1:] >= ends[:-1])
+    first = np.flatnonzero(starts_group)
+    last = np.append(first[1:], len(ts_sorted)) - 1
+
+    lo = np.searchsorted(points, ts_sorted[first], side="left")
+    hi = np.searchsorted(points, ends[last], side="left")
+    n_points = len(points)
+    delta = np.bincount(lo, minlength=n_points + 1) - np.bincount(hi, minlength=n_points + 1)
+    active = np.cumsum(delta)[:n_points]
+
+    # Known customers: first purchase <= as-of point
+    first_purchase = ts_sorted[codes_sorted != np.append(-1, codes_sorted[:-1])]
+    known = np.searchsorted(np.sort(first_purchase), points, side="right")
+
+    churned = known - active
+    with np.errstate(divide="ignore", invalid="ignore"):
+        churn_rate = np.where(known > 0, churned / known * 100, 0.0)
+
+    return pd.DataFrame({
+        "month": periods.strftime("%Y-%m"),
+        "as_of_date": pd.to_datetime(points).strftime("%Y-%m-%d"),
+        "customers": known,
+        "active_customers": active,
+        "churned_customers": churned,
+        "churn_rate": churn_rate.round(2),
+    })
@@ -0,0 +1,84 @@
+"""
+Pre-aggregated churn cube over customer dimensions.
+
+The cube holds counts, churn sums and monetary sums for every observed
+combination of the dimensions. It is built once per snapshot, and any
+roll-up or filter is answered from it without touching the per-customer
+frame.
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+# Cube dimensions, in features column names
+CUBE_DIMENSIONS = ["risk_segment", "RFM_score", "customer_state", "payment_type"]
+
+CUBE_MEASURES = ["count", "churned", "monetary_sum"]
+
+
+def build_cube(features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate features over all available cube dimensions.
+
+    Args:
+        features: Scored features DataFrame
+
+    Returns:
+        DataFrame with one row per observed dimension combination and
+        count, churned and monetary_sum columns
+    """
+    dims = [d for d in CUBE_DIMENSIONS if d in features.columns]
+    return (
+        features.groupby(dims, observed=True, dropna=False, sort=False)
+        .agg(
+            count=("churn", "size"),
+            churned=("churn", "sum"),
+            monetary_sum=("monetary", "sum")
+        )
+        .reset_index()
+    )
+
+
+def rollup(
+    cube: pd.DataFrame,
+    by: List[str],
+    filters: Optional[Dict[str, object]] = None
+) -> pd.DataFrame:
+    """
+    Roll the cube up to the given dimensions, optionally filtered.
+
+    Args:
+        cube: Output of build_cube
+        by: Dimensions to group by (empty for a grand total)
+        filters: Dimension values to keep (exact match)
+
+    Returns:
+        DataFrame with the by columns, count, churn_rate (%) and monetary_sum
+
+    Raises:
+        ValueError: If a dimension is not in the cube
+    """
+    filters = filters or {}
+    unknown = [d for d in [*by, *filters] if d not in cube.columns or d in CUBE_MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown breakdown dimensions: {unknown}")
+
+    df = cube
+    for dim, value in filters.items():
+        df = df[df[dim] == value]
+
+    if by:
+        result = df.groupby(by, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index()
+    else:
+        result = df[CUBE_MEASURES].sum().to_frame().T
+
+    result["churn_rate"] = (result["churned"] / result["count"] * 100).round(2)
+    result["monetary_sum"] = result["monetary_sum"].round(2)
+    return result[[*by, "count", "churn_rate", "monetary_sum"]].sort_values(
+        "count", ascending=False, kind="stable"
+    ).reset_index(drop=True)
@@ -0,0 +1,92 @@
+"""
+Risk segment migration between pipeline runs.
+
+Customers are mapped to a stable integer position in an append-only index of
+every customer seen so far, and each run is reduced to one int8 segment code
+per position (-1 when the customer is absent). Two runs are then compared
+position by position: no join on customer_unique_id is needed, and the only
+state kept from the previous run is its code array.
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+ABSENT = -1
+
+
+@dataclass
+class SegmentMigration:
+    """Segment transitions between two runs over a shared customer index."""
+    labels: list[str]           # segment labels; the last row/column is "absent"
+    matrix: np.ndarray          # int64 (K + 1) x (K + 1), previous x current
+    changed: np.ndarray         # positions whose segment changed
+    previous: np.ndarray        # int8 codes of the previous run, by position
+    current: np.ndarray         # int8 codes of the current run, by position
+
+
+def segment_codes(
+    customer_ids: pd.Series,
+    segments: pd.Series,
+    labels: Sequence[str],
+    universe: pd.Index
+) -> Tuple[pd.Index, np.ndarray]:
+    """
+    Encode one run's segments as a dense code array over the customer index.
+
+    Args:
+        customer_ids: customer_unique_id per row
+        segments: Segment label per row
+        labels: Known segment labels (code = position in labels)
+        universe: Customer index of previous runs
+
+    Returns:
+        (universe extended with new customers, int8 codes by position with
+        ABSENT for customers missing from this run)
+    """
+    positions = universe.get_indexer(customer_ids)
+    new = positions < 0
+    if new.any():
+        universe = universe.append(pd.Index(customer_ids[new].to_numpy()))
+        positions[new] = np.arange(len(universe) - new.sum(), len(universe))
+
+    codes = np.full(len(universe), ABSENT, dtype="int8")
+    codes[positions] = pd.Categorical(segments, categories=labels).codes
+    return universe, codes
+
+
+def segment_migration(previous: np.ndarray, current: np.ndarray, labels: Sequence[str]) -> SegmentMigration:
+    """
+    Compare two runs' code arrays.
+
+    Args:
+        previous: Codes of the previous run (may be shorter than current,
+            since the customer index only grows)
+        current: Codes of the current run
+        labels: Segment labels
+
+    Returns:
+        SegmentMigration with the transition matrix and changed positions
+    """
+    previous = np.concatenate([previous, np.full(len(current) - len(previous), ABSENT, dtype="int8")])
+
+    # Map ABSENT (-1) to the extra last category
+    k = len(labels) + 1
+    prev_idx = np.where(previous < 0, k - 1, previous).astype("int64")
+    cur_idx = np.where(current < 0, k - 1, current).astype("int64")
+    matrix = np.bincount(prev_idx * k + cur_idx, minlength=k * k).reshape(k, k)
+    matrix[k - 1, k - 1] = 0  # absent in both runs
+
+    return SegmentMigration(
+        labels=list(labels),
+        matrix=matrix,
+        changed=np.flatnonzero(previous != current),
+        previous=previous,
+        current=current,
+    )
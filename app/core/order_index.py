@@ -0,0 +1,193 @@
+"""
+Per-customer order-time index for point-in-time (as_of_date) replay.
+
+Orders are sorted by (customer, timestamp) and stored CSR-style: customer i
+owns positions offsets[i]:offsets[i + 1] of the sorted arrays. Each position
+also gets a composite int64 key (customer code << 32 | dense timestamp rank),
+which is globally sorted, so "orders of every customer up to as_of" is one
+vectorized binary search. Monetary values are kept as prefix sums of integer
+cents so any prefix total is exact; the per-order payment mix (installments,
+value per payment type and per-type usage counts from payment_type_mask) is
+kept as prefix sums too, so the payment features of any prefix are O(1) per
+customer.
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.core import pipeline
+
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+@dataclass
+class OrderIndex:
+    """CSR index of order timestamps and payments per customer."""
+    customer_ids: pd.Index      # customer_unique_id by code (first-appearance order)
+    offsets: np.ndarray         # int64, len n_customers + 1
+    times: np.ndarray           # int64 ns, sorted within each customer
+    keys: np.ndarray            # int64 composite (code << 32 | time rank), sorted
+    unique_times: np.ndarray    # int64 ns, sorted distinct timestamps
+    cum_cents: np.ndarray       # int64 prefix sums of payment cents, len n_orders + 1
+    rows: np.ndarray            # original row position of each sorted order
+    attributes: Dict[str, Any] = field(default_factory=dict)  # per-order columns, sorted
+    # Prefix sums of the payment mix columns, len n_orders + 1 ({type}_value
+    # in int64 cents, installments in float64)
+    payment_cums: Dict[str, np.ndarray] = field(default_factory=dict)
+    # int64 prefix counts of orders using payment type bit t, shape
+    # (n_orders + 1, bits); None without payment_type_mask
+    type_cums: Optional[np.ndarray] = None
+
+    @property
+    def first_time(self) -> pd.Timestamp:
+        """Earliest order timestamp in the index."""
+        return pd.Timestamp(self.unique_times[0])
+
+    @property
+    def last_time(self) -> pd.Timestamp:
+        """Latest order timestamp in the index."""
+        return pd.Timestamp(self.unique_times[-1])
+
+
+def build_order_index(orders: pd.DataFrame, attributes: Sequence[str] = ()) -> OrderIndex:
+    """
+    Build the order index from joined orders.
+
+    Args:
+        orders: Joined orders DataFrame with customer_unique_id,
+            order_purchase_timestamp, payment_value and optionally the
+            pipeline.PAYMENT_ORDER_COLUMNS
+        attributes: Extra per-order columns to carry (e.g. customer
+            dimensions); features_as_of reports them from the last order
+
+    Returns:
+        OrderIndex over all orders
+    """
+    codes, customer_ids = pd.factorize(orders["customer_unique_id"])
+    times = orders["order_purchase_timestamp"].to_numpy(dtype="datetime64[ns]").astype("int64")
+    cents = np.rint(orders["payment_value"].to_numpy(dtype="float64") * 100).astype("int64")
+
+    order = np.lexsort((times, codes))
+    codes_sorted = codes[order].astype("int64")
+    times_sorted = times[order]
+
+    unique_times = np.unique(times_sorted)
+    ranks = np.searchsorted(unique_times, times_sorted)
+
+    offsets = np.zeros(len(customer_ids) + 1, dtype="int64")
+    np.cumsum(np.bincount(codes_sorted, minlength=len(customer_ids)), out=offsets[1:])
+
+    cum_cents = _prefix_sums(cents[order])
+
+    payment_cums = {}
+    for col in pipeline.PAYMENT_ORDER_COLUMNS:
+        if col not in orders.columns or col == "payment_type_mask":
+            continue
+        values = orders[col].to_numpy(dtype="float64")[order]
+        payment_cums[col] = _prefix_sums(np.rint(values * 100).astype("int64") if col.endswith("_value") else values)
+
+    type_cums = None
+    if "payment_type_mask" in orders.columns:
+        mask = orders["payment_type_mask"].to_numpy(dtype="int64")[order]
+        bits = int(mask.max(initial=0)).bit_length()
+        used = (mask[:, None] >> np.arange(bits, dtype="int64")) & 1
+        type_cums = _prefix_sums(used)
+
+    return OrderIndex(
+        customer_ids=pd.Index(customer_ids),
+        offsets=offsets,
+        times=times_sorted,
+        keys=(codes_sorted << 32) | ranks,
+        unique_times=unique_times,
+        cum_cents=cum_cents,
+        rows=order,
+        attributes={col: orders[col].array[order] for col in attributes},
+        payment_cums=payment_cums,
+        type_cums=type_cums,
+    )
+
+
+def _prefix_sums(values: np.ndarray) -> np.ndarray:
+    """Prefix sums along the first axis with a leading zero row."""
+    out = np.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def prefix_positions(index: OrderIndex, as_of_date: pd.Timestamp) -> np.ndarray:
+    """
+    Find, for every customer, the end of their orders placed on or before as_of_date.
+
+    Args:
+        index: OrderIndex
+        as_of_date: Reference timestamp (inclusive)
+
+    Returns:
+        int64 array p where customer i has orders offsets[i]:p[i] up to as_of_date
+    """
+    as_of_ns = pd.Timestamp(as_of_date).as_unit("ns").value
+    rank = np.searchsorted(index.unique_times, as_of_ns, side="right") - 1
+    n_customers = len(index.customer_ids)
+    queries = (np.arange(n_customers, dtype="int64") << 32) + rank
+    return np.searchsorted(index.keys, queries, side="right")
+
+
+def features_as_of(index: OrderIndex, as_of_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Compute RFM features per customer as they were at as_of_date.
+
+    Equivalent to compute_customer_features over the orders placed on or
+    before as_of_date, without filtering or regrouping the orders.
+
+    Args:
+        index: OrderIndex
+        as_of_date: Reference timestamp (inclusive)
+
+    Returns:
+        DataFrame with the same columns as compute_customer_features (index
+        attributes taken from each customer's last order, payment features
+        from the payment mix prefix sums), one row per customer with at
+        least one order up to as_of_date
+    """
+    as_of_ns = pd.Timestamp(as_of_date).as_unit("ns").value
+
+    end = prefix_positions(index, as_of_date)
+    start = index.offsets[:-1]
+    present = end > start
+    start, end = start[present], end[present]
+
+    frequency = end - start
+    last_ns = index.times[end - 1]
+    first_ns = index.times[start]
+    monetary = (index.cum_cents[end] - index.cum_cents[start]) / 100.0
+
+    features = pd.DataFrame({
+        "customer_unique_id": index.customer_ids[present],
+        "frequency": frequency,
+        "last_purchase": pd.to_datetime(last_ns),
+        "first_purchase": pd.to_datetime(first_ns),
+        "monetary": monetary,
+    })
+
+    features["recency_days"] = ((as_of_ns - last_ns) // _NS_PER_DAY).astype("int64")
+    features["tenure_days"] = ((as_of_ns - first_ns) // _NS_PER_DAY).astype("int64")
+    features["avg_ticket"] = features["monetary"] / features["frequency"]
+
+    for col, values in index.attributes.items():
+        features[col] = values[end - 1]
+
+    totals = {"payment_value": monetary}
+    for col, cums in index.payment_cums.items():
+        total = cums[end] - cums[start]
+        totals[col] = total / 100.0 if col.endswith("_value") else total
+    methods = None
+    if index.type_cums is not None:
+        methods = ((index.type_cums[end] - index.type_cums[start]) > 0).sum(axis=1).astype("int64")
+    return features.assign(**pipeline.payment_features_from_totals(totals, methods))
@@ -16,10 +16,46 @@ All functions are pure: no I/O, no side effects, only DataFrame transformations.
 """
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.core import validation
+from app.core.schemas import DataQualityReport
+
+
+# Per-customer dimensions taken from the customer's most recent order
+CUSTOMER_DIMENSIONS = ["customer_state", "payment_type"]
+
+# Payment types whose share of a customer's spend is a feature ({type}_share)
+PAYMENT_SHARE_TYPES = ["voucher", "credit_card", "boleto"]
+
+# Per-order payment mix columns from aggregate_payments_by_order, summed per
+# customer by compute_customer_features
+PAYMENT_ORDER_COLUMNS = (
+    ["installments_sum", "installments_count"]
+    + [f"{name}_value" for name in PAYMENT_SHARE_TYPES]
+    + ["payment_type_mask"]
+)
+
+# Payment types tracked in payment_type_mask (bits of a non-negative int64)
+MAX_MASK_TYPES = 63
+
+# RFM_segment labels "R-F-M" indexed by segment code (R-1)*25 + (F-1)*5 + (M-1)
+RFM_SEGMENT_LABELS = [f"{r}-{f}-{m}" for r in range(1, 6) for f in range(1, 6) for m in range(1, 6)]
+
+# risk_segment labels from lowest to highest risk (compute_risk_segments)
+RISK_SEGMENT_LABELS = [
+    "Risco baixo",
+    "Risco médio",
+    "Risco alto",
+    "Risco alto (prioritário)",
+    "Churn",
+    "Churn (prioritário)",
+    "Risco muito alto",
+]
+
 
 def clean_orders(orders: pd.DataFrame, valid_status: set[str]) -> pd.DataFrame:
     """
@@ -32,9 +68,7 @@ def clean_orders(orders: pd.DataFrame, valid_status: set[str]) -> pd.DataFrame:
     Returns:
         Cleaned orders DataFrame
     """
-    df = orders.dropna(subset=["order_id", "customer_id", "order_purchase_timestamp"])
-    df = df.drop_duplicates(subset=["order_id"])
-    df = df[df["order_status"].isin(valid_status)].copy()
+    df, _ = validation.check_order_rows(orders, valid_status)
     return df
 
 
@@ -48,24 +82,68 @@ def clean_payments(payments: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned payments DataFrame
     """
-    df = payments.dropna(subset=["order_id", "payment_value"])
-    df["payment_value"] = pd.to_numeric(df["payment_value"], errors="coerce")
-    df = df.dropna(subset=["payment_value"])
-    df = df[df["payment_value"] >= 0].copy()
+    df, _ = validation.check_payment_rows(payments)
     return df
 
 
 def aggregate_payments_by_order(payments: pd.DataFrame) -> pd.DataFrame:
     """
-    Sum payment values per order.
+    Sum payment values per order, plus the per-order payment mix.
+    
+    One pass over integer order codes (np.bincount) instead of groupbys on
+    the string order_id. When payment_type is present, the order's primary
+    payment_type (the type with the largest total value in the order) is
+    kept, along with the PAYMENT_ORDER_COLUMNS that compute_customer_features
+    turns into per-customer payment features.
     
     Args:
         payments: Cleaned payments DataFrame
     
     Returns:
-        DataFrame with order_id and total payment_value
+        DataFrame with order_id, total payment_value and, if available,
+        payment_type and the payment mix columns
     """
-    return payments.groupby("order_id", as_index=False)["payment_value"].sum()
+    order_codes, order_ids = pd.factorize(payments["order_id"].array)
+    n_orders = len(order_ids)
+    value = payments["payment_value"].to_numpy(dtype="float64")
+    
+    agg = pd.DataFrame({
+        "order_id": order_ids,
+        "payment_value": np.bincount(order_codes, weights=value, minlength=n_orders),
+    })
+    
+    if "payment_installments" in payments.columns:
+        installments = pd.to_numeric(payments["payment_installments"], errors="coerce").to_numpy(dtype="float64")
+        known = ~np.isnan(installments)
+        agg["installments_sum"] = np.bincount(order_codes[known], weights=installments[known], minlength=n_orders)
+        agg["installments_count"] = np.bincount(order_codes[known], minlength=n_orders)
+    
+    if "payment_type" not in payments.columns:
+        return agg
+    
+    # (order, type) totals and row counts as dense n_orders x n_types matrices
+    type_codes, types = pd.factorize(payments["payment_type"].array, sort=True)
+    n_types = len(types)
+    typed = type_codes >= 0
+    cell = order_codes[typed].astype("int64") * n_types + type_codes[typed]
+    by_type = np.bincount(cell, weights=value[typed], minlength=n_orders * n_types).reshape(n_orders, n_types)
+    used = np.bincount(cell, minlength=n_orders * n_types).reshape(n_orders, n_types) > 0
+    
+    # Largest total wins, ties go to the first type in sorted order
+    primary = np.where(used, by_type, -1.0).argmax(axis=1)
+    primary_type = pd.Categorical.from_codes(np.where(used.any(axis=1), primary, -1), categories=pd.Index(types))
+    dtype = payments["payment_type"].dtype
+    agg["payment_type"] = primary_type if isinstance(dtype, pd.CategoricalDtype) else pd.array(primary_type, dtype=dtype)
+    
+    type_position = {t: i for i, t in enumerate(types)}
+    for name in PAYMENT_SHARE_TYPES:
+        i = type_position.get(name)
+        agg[f"{name}_value"] = by_type[:, i] if i is not None else 0.0
+    # Bit i set when the order used payment type i (the first MAX_MASK_TYPES types)
+    bits = min(n_types, MAX_MASK_TYPES)
+    agg["payment_type_mask"] = (used[:, :bits] * (1 << np.arange(bits, dtype="int64"))).sum(axis=1)
+    
+    return agg
 
 
 def join_datasets(
@@ -78,18 +156,25 @@ def join_datasets(
     
     Args:
         orders: Cleaned orders DataFrame
-        customers: Customers DataFrame (customer_id, customer_unique_id)
+        customers: Customers DataFrame (customer_id, customer_unique_id and
+            optionally customer_state)
         payments_agg: Aggregated payments by order
     
     Returns:
-        Joined DataFrame with customer_unique_id and payment_value
+        Joined DataFrame with customer_unique_id, payment_value and any
+        available customer dimensions; orders without payments get 0 in
+        payment_value and the payment mix columns
     """
-    cust_map = customers[["customer_id", "customer_unique_id"]].dropna()
+    cust_cols = ["customer_id", "customer_unique_id"]
+    cust_map = customers[cust_cols + [c for c in CUSTOMER_DIMENSIONS if c in customers.columns]]
+    cust_map = cust_map.dropna(subset=cust_cols)
     cust_map = cust_map.drop_duplicates(subset=["customer_id"])
     
     df = orders.merge(cust_map, on="customer_id", how="inner")
     df = df.merge(payments_agg, on="order_id", how="left")
-    df["payment_value"] = df["payment_value"].fillna(0.0)
+    for col in ["payment_value"] + PAYMENT_ORDER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype(payments_agg[col].dtype)
     
     return df
 
@@ -107,6 +192,7 @@ def compute_customer_features(
     
     Returns:
         DataFrame with customer features (frequency, monetary, recency, etc.)
+        plus customer dimensions from each customer's most recent order
     """
     g = orders.groupby("customer_unique_id", sort=False)
     
@@ -125,9 +211,90 @@ def compute_customer_features(
     features["tenure_days"] = (as_of_date - features["first_purchase"]).dt.days.astype("int64")
     features["avg_ticket"] = features["monetary"] / features["frequency"]
     
+    dims = [c for c in CUSTOMER_DIMENSIONS if c in orders.columns]
+    if dims:
+        last_order = g["order_purchase_timestamp"].idxmax().to_numpy()
+        for col in dims:
+            features[col] = orders.loc[last_order, col].array
+    
+    if any(c in orders.columns for c in PAYMENT_ORDER_COLUMNS):
+        # groupby(sort=False) numbers customers by first appearance, like factorize
+        codes, _ = pd.factorize(orders["customer_unique_id"])
+        features = features.assign(**payment_features(orders, codes, len(features)))
+    
     return features
 
 
+def payment_features(orders: pd.DataFrame, codes: np.ndarray, n_customers: int) -> Dict[str, np.ndarray]:
+    """
+    Per-customer payment features from the per-order payment mix columns.
+    
+    Each total is a weighted np.bincount over the customer codes of the
+    orders, so all of them take one pass per column with no regrouping.
+    
+    Args:
+        orders: Joined orders with (some of) PAYMENT_ORDER_COLUMNS
+        codes: Customer code of each order (0..n_customers-1)
+        n_customers: Number of customers
+    
+    Returns:
+        Column name to array (see payment_features_from_totals)
+    """
+    totals = {
+        col: np.bincount(codes, weights=orders[col].to_numpy(dtype="float64"), minlength=n_customers)
+        for col in ["payment_value"] + PAYMENT_ORDER_COLUMNS
+        if col in orders.columns and col != "payment_type_mask"
+    }
+    
+    methods = None
+    if "payment_type_mask" in orders.columns:
+        mask = np.zeros(n_customers, dtype="int64")
+        np.bitwise_or.at(mask, codes, orders["payment_type_mask"].to_numpy(dtype="int64"))
+        # Popcount over the bits in use (at most MAX_MASK_TYPES)
+        methods = np.zeros(n_customers, dtype="int64")
+        for bit in range(int(mask.max(initial=0)).bit_length()):
+            methods += (mask >> bit) & 1
+    
+    return payment_features_from_totals(totals, methods)
+
+
+def payment_features_from_totals(
+    totals: Dict[str, np.ndarray],
+    methods: Optional[np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    Payment features from per-customer totals of the payment mix columns.
+    
+    Shared by compute_customer_features (totals from bincounts) and
+    order_index.features_as_of (totals from prefix sums).
+    
+    Args:
+        totals: Per-customer sums of payment_value and the available
+            PAYMENT_ORDER_COLUMNS (except payment_type_mask)
+        methods: Distinct payment types used per customer, or None when
+            payment types are unknown
+    
+    Returns:
+        Column name to array: avg_installments (mean installments per
+        payment), {type}_share (share of spend paid with each
+        PAYMENT_SHARE_TYPES type) and payment_methods (distinct payment
+        types used); 0 where the customer has no such payments
+    """
+    columns: Dict[str, np.ndarray] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "installments_sum" in totals:
+            count = totals["installments_count"]
+            columns["avg_installments"] = np.where(count > 0, totals["installments_sum"] / count, 0.0)
+        
+        if methods is not None:
+            spent = totals["payment_value"]
+            for name in PAYMENT_SHARE_TYPES:
+                columns[f"{name}_share"] = np.where(spent > 0, totals[f"{name}_value"] / spent, 0.0)
+            columns["payment_methods"] = methods
+    
+    return columns
+
+
 def add_churn_label(features: pd.DataFrame, threshold_days: int) -> pd.DataFrame:
     """
     Add binary churn label based on recency threshold.
@@ -184,15 +351,67 @@ def compute_rfm_scores(features: pd.DataFrame) -> pd.DataFrame:
     
     # RFM Score: Média de R, F e M (resultado de 1.0 a 5.0, arredondado para 1 casa decimal)
     df["RFM_score"] = ((df["R_score"] + df["F_score"] + df["M_score"]) / 3.0).round(1)
-    df["RFM_segment"] = (
-        df["R_score"].astype(str) + "-"
-        + df["F_score"].astype(str) + "-"
-        + df["M_score"].astype(str)
+    # Segment stored as a compact code (0-124); labels are decoded only on output
+    df["RFM_segment"] = pd.Categorical.from_codes(
+        rfm_segment_codes(df["R_score"], df["F_score"], df["M_score"]),
+        categories=RFM_SEGMENT_LABELS
     )
     
     return df
 
 
+def rfm_segment_codes(r: pd.Series, f: pd.Series, m: pd.Series) -> np.ndarray:
+    """
+    Encode R, F, M scores (1-5) as a segment code 0-124.
+    
+    Args:
+        r: R_score Series
+        f: F_score Series
+        m: M_score Series
+    
+    Returns:
+        int8 array of segment codes
+    """
+    codes = (r.to_numpy("int16") - 1) * 25 + (f.to_numpy("int16") - 1) * 5 + (m.to_numpy("int16") - 1)
+    return codes.astype("int8")
+
+
+def compute_rfm_matrix(features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate count, churn rate and monetary for all 125 R-F-M cells.
+    
+    One bincount per measure over the segment codes; empty cells have
+    count 0 and a NaN churn rate.
+    
+    Args:
+        features: Features DataFrame with RFM_segment and churn
+    
+    Returns:
+        DataFrame with one row per segment code (R, F, M, segment, count,
+        churn_rate %, monetary_sum)
+    """
+    codes = features["RFM_segment"].cat.codes.to_numpy()
+    n = len(RFM_SEGMENT_LABELS)
+    
+    count = np.bincount(codes, minlength=n)
+    churned = np.bincount(codes, weights=features["churn"].to_numpy("float64"), minlength=n)
+    monetary = np.bincount(codes, weights=features["monetary"].to_numpy("float64"), minlength=n)
+    
+    all_codes = np.arange(n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        churn_rate = np.where(count > 0, churned / count * 100, np.nan)
+    
+    return pd.DataFrame({
+        "R_score": all_codes // 25 + 1,
+        "F_score": all_codes // 5 % 5 + 1,
+        "M_score": all_codes % 5 + 1,
+        "RFM_segment": RFM_SEGMENT_LABELS,
+        "count": count,
+        "churn_rate": churn_rate.round(2),
+        "monetary_sum": monetary.round(2),
+    })
+
+
 def compute_risk_segments(features: pd.DataFrame) -> pd.DataFrame:
     """
     Compute risk segments using business rules based on recency and value.
@@ -233,48 +452,102 @@ def compute_risk_segments(features: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def run_pipeline(
+def prepare_orders(
     customers: pd.DataFrame,
     orders: pd.DataFrame,
     payments: pd.DataFrame,
-    churn_threshold_days: int,
     valid_status: set[str]
-) -> Tuple[pd.DataFrame, pd.Timestamp]:
+) -> Tuple[pd.DataFrame, Dict[str, DataQualityReport]]:
     """
-    Execute the complete churn analysis pipeline.
+    Clean raw datasets and join them into one row per valid order.
     
     Args:
         customers: Raw customers DataFrame
         orders: Raw orders DataFrame
         payments: Raw payments DataFrame
-        churn_threshold_days: Threshold for churn label
         valid_status: Valid order statuses to include
     
     Returns:
-        Tuple of (features DataFrame, as_of_date)
-    
-    Raises:
-        ValueError: If no valid data after filtering
+        Tuple of (joined orders DataFrame with customer_unique_id and
+        payment_value, data quality reports by dataset)
     """
-    # Clean
-    orders_clean = clean_orders(orders, valid_status)
-    payments_clean = clean_payments(payments)
-    
-    # Aggregate payments
+    orders_clean, orders_report = validation.check_order_rows(orders, valid_status)
+    payments_clean, payments_report = validation.check_payment_rows(payments)
     payments_agg = aggregate_payments_by_order(payments_clean)
     
-    # Join datasets
     orders_joined = join_datasets(orders_clean, customers, payments_agg)
+    return orders_joined, {"orders": orders_report, "payments": payments_report}
+
+
+def score_features(features: pd.DataFrame, churn_threshold_days: int) -> pd.DataFrame:
+    """
+    Apply churn label, RFM scores and risk segments to customer features.
     
-    # Compute as_of_date
+    Args:
+        features: Customer features from compute_customer_features
+        churn_threshold_days: Threshold for churn label
+    
+    Returns:
+        Scored features DataFrame
+    """
+    features = add_churn_label(features, churn_threshold_days)
+    features = compute_rfm_scores(features)
+    features = compute_risk_segments(features)
+    return features
+
+
+def features_from_orders(
+    orders_joined: pd.DataFrame,
+    churn_threshold_days: int
+) -> Tuple[pd.DataFrame, pd.Timestamp]:
+    """
+    Compute scored customer features from joined orders.
+    
+    Args:
+        orders_joined: Output of prepare_orders
+        churn_threshold_days: Threshold for churn label
+    
+    Returns:
+        Tuple of (features DataFrame, as_of_date)
+    
+    Raises:
+        ValueError: If there is no valid order timestamp
+    """
     as_of_date = orders_joined["order_purchase_timestamp"].max()
     if pd.isna(as_of_date):
         raise ValueError("No valid order_purchase_timestamp after filtering")
     
-    # Features
     features = compute_customer_features(orders_joined, as_of_date)
-    features = add_churn_label(features, churn_threshold_days)
-    features = compute_rfm_scores(features)
-    features = compute_risk_segments(features)
+    features = score_features(features, churn_threshold_days)
     
     return features, as_of_date
+
+
+def run_pipeline(
+    customers: pd.DataFrame,
+    orders: pd.DataFrame,
+    payments: pd.DataFrame,
+    churn_threshold_days: int,
+    valid_status: set[str]
+) -> Tuple[pd.DataFrame, pd.Timestamp]:
+    """
+    Execute the complete churn analysis pipeline.
+    
+    Args:
+        customers: Raw customers DataFrame
+        orders: Raw orders DataFrame
+        payments: Raw payments DataFrame
+        churn_threshold_days: Threshold for churn label
+        valid_status: Valid order statuses to include
+    
+    Returns:
+        Tuple of (features DataFrame, as_of_date)
+    
+    Raises:
+        ValueError: If no valid data after filtering
+    """
+    # Clean, aggregate payments and join datasets
+    orders_joined, _ = prepare_orders(customers, orders, payments, valid_status)
+    
+    # Features at the latest order timestamp
+    return features_from_orders(orders_joined, churn_threshold_days)
@@ -0,0 +1,234 @@
+"""
+Stratified customer sample and estimates with confidence intervals.
+
+The sample is a reservoir sample per stratum (customer_state), drawn with
+bottom-k priorities: every customer gets a pseudo-random priority from a hash
+of its ID, and each stratum keeps its k lowest. This is a uniform sample
+without replacement within each stratum, is reproducible, and needs a single
+pass over the customers table.
+
+Estimates use the standard stratified estimators: totals are
+sum_h N_h * mean_h(y), and ratios (rates) are ratios of totals with a
+linearized variance. Customers of the sample with no valid order count as
+zeros, so any subset of customers is a domain of the same design.
+
+All functions are pure: no I/O, no side effects.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+Z_95 = 1.959964
+
+
+@dataclass
+class SampleDesign:
+    """Sampled customers and the stratum sizes needed to weight them."""
+    customer_ids: pd.Index      # sampled customer_unique_id
+    codes: np.ndarray           # stratum code of each sampled customer
+    strata: pd.Index            # stratum label by code
+    population: np.ndarray      # customers per stratum (N_h)
+    sampled: np.ndarray         # sampled customers per stratum (n_h)
+
+
+def stratified_sample(customers: pd.DataFrame, size: int, stratum: str = "customer_state", seed: int = 0) -> SampleDesign:
+    """
+    Draw a stratified reservoir sample of unique customers.
+
+    Sample sizes are proportional to stratum sizes, with at least two per
+    stratum (when available) so every stratum has a variance estimate.
+
+    Args:
+        customers: Raw customers DataFrame (customer_unique_id, stratum column)
+        size: Target total sample size
+        stratum: Stratum column (a single stratum when missing)
+        seed: Priority hash key
+
+    Returns:
+        SampleDesign
+    """
+    unique = customers.drop_duplicates("customer_unique_id")
+    ids = unique["customer_unique_id"].to_numpy()
+    if stratum in unique.columns:
+        codes, strata = pd.factorize(unique[stratum].astype(object).fillna(""), sort=True)
+    else:
+        codes, strata = np.zeros(len(unique), dtype="int64"), pd.Index([""])
+
+    population = np.bincount(codes, minlength=len(strata))
+    quota = np.minimum(population, np.maximum(2, np.round(size * population / max(1, len(unique)))).astype("int64"))
+
+    priority = pd.util.hash_array(ids, hash_key=f"{seed:016d}")
+    order = np.lexsort((priority, codes))
+    # Rank of each customer within its stratum, in priority order
+    starts = np.concatenate([[0], np.cumsum(population)[:-1]])
+    rank = np.arange(len(order)) - starts[codes[order]]
+    chosen = order[rank < quota[codes[order]]]
+
+    return SampleDesign(
+        customer_ids=pd.Index(ids[chosen]),
+        codes=codes[chosen],
+        strata=pd.Index(strata),
+        population=population,
+        sampled=np.bincount(codes[chosen], minlength=len(strata)),
+    )
+
+
+def _total(design: SampleDesign, y: np.ndarray) -> Tuple[float, float]:
+    """Stratified estimate of a total and its variance."""
+    k = len(design.strata)
+    n = design.sampled.astype("float64")
+    N = design.population.astype("float64")
+    s1 = np.bincount(design.codes, weights=y, minlength=k)
+    s2 = np.bincount(design.codes, weights=y * y, minlength=k)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, s1 / n, 0.0)
+        var = np.where(n > 1, (s2 - n * mean ** 2) / (n - 1), 0.0)
+        fpc = np.where(N > 0, 1 - n / N, 0.0)
+        variance = np.where(n > 0, N ** 2 * fpc * np.clip(var, 0, None) / n, 0.0)
+    return float((N * mean).sum()), float(variance.sum())
+
+
+def estimate_total(design: SampleDesign, y: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Estimate a population total with a 95% confidence interval.
+
+    Args:
+        design: Sample design
+        y: Value per sampled customer (aligned with design.customer_ids)
+
+    Returns:
+        (estimate, ci_low, ci_high)
+    """
+    total, variance = _total(design, y)
+    half = Z_95 * np.sqrt(variance)
+    return total, total - half, total + half
+
+
+def estimate_ratio(design: SampleDesign, y: np.ndarray, x: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Estimate a ratio of totals (e.g. churned / customers) with a 95% CI.
+
+    Args:
+        design: Sample design
+        y: Numerator value per sampled customer
+        x: Denominator value per sampled customer
+
+    Returns:
+        (estimate, ci_low, ci_high); NaN when the denominator is 0
+    """
+    total_x, _ = _total(design, x)
+    if total_x == 0:
+        return float("nan"), float("nan"), float("nan")
+    ratio = _total(design, y)[0] / total_x
+    _, variance = _total(design, y - ratio * x)
+    half = Z_95 * np.sqrt(variance) / total_x
+    return ratio, ratio - half, ratio + half
+
+
+def sample_values(design: SampleDesign, features: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    Align a features column with the sampled customers (0 where absent).
+
+    Args:
+        design: Sample design
+        features: Features computed for the sampled customers
+        column: Column to align
+
+    Returns:
+        float64 array aligned with design.customer_ids
+    """
+    values = np.zeros(len(design.customer_ids))
+    positions = design.customer_ids.get_indexer(features["customer_unique_id"])
+    values[positions] = features[column].to_numpy(dtype="float64")
+    return values
+
+
+def _interval(low: float, high: float, scale: float = 1.0) -> list[float]:
+    """Round a confidence interval for JSON output."""
+    return [round(float(low) * scale, 2), round(float(high) * scale, 2)]
+
+
+def approximate_kpis(design: SampleDesign, features: pd.DataFrame, as_of_date: pd.Timestamp) -> dict:
+    """
+    Estimate the dashboard KPIs (features_to_kpis) from the sample.
+
+    Args:
+        design: Sample design
+        features: Scored features of the sampled customers
+        as_of_date: Reference date
+
+    Returns:
+        Dict with the features_to_dict keys (point estimates) plus ci95
+        intervals, approximate=True and sample_size
+    """
+    present = sample_values(design, features.assign(_one=1.0), "_one")
+    churn = sample_values(design, features, "churn")
+    monetary = sample_values(design, features, "monetary")
+
+    customers = estimate_total(design, present)
+    churned = estimate_total(design, churn)
+    active = estimate_total(design, present - churn)
+    revenue = estimate_total(design, monetary)
+    rate = estimate_ratio(design, churn, present)
+
+    return {
+        "as_of_date": as_of_date.strftime("%Y-%m-%d"),
+        "total_customers": int(round(customers[0])),
+        "churn_rate": round(rate[0] * 100, 2),
+        "total_revenue": round(revenue[0], 2),
+        "churned_customers": int(round(churned[0])),
+        "active_customers": int(round(active[0])),
+        "approximate": True,
+        "sample_size": int(len(features)),
+        "ci95": {
+            "total_customers": _interval(*customers[1:]),
+            "churn_rate": _interval(*rate[1:], scale=100),
+            "total_revenue": _interval(*revenue[1:]),
+            "churned_customers": _interval(*churned[1:]),
+            "active_customers": _interval(*active[1:]),
+        },
+    }
+
+
+def approximate_groups(design: SampleDesign, features: pd.DataFrame, by: str) -> list[dict]:
+    """
+    Estimate count, churn rate and monetary sum per group from the sample.
+
+    Args:
+        design: Sample design
+        features: Scored features of the sampled customers
+        by: Grouping column (e.g. RFM_score, risk_segment)
+
+    Returns:
+        One record per group present in the sample, with count, churn_rate
+        (%), monetary_sum and their *_ci95 intervals
+    """
+    churn = sample_values(design, features, "churn")
+    monetary = sample_values(design, features, "monetary")
+    positions = design.customer_ids.get_indexer(features["customer_unique_id"])
+    group_codes, groups = pd.factorize(features[by], sort=True)
+    member_codes = np.full(len(design.customer_ids), -1)
+    member_codes[positions] = group_codes
+
+    records = []
+    for code, group in enumerate(groups):
+        member = (member_codes == code).astype("float64")
+        count = estimate_total(design, member)
+        rate = estimate_ratio(design, churn * member, member)
+        revenue = estimate_total(design, monetary * member)
+        records.append({
+            by: group.item() if hasattr(group, "item") else group,
+            "count": int(round(count[0])),
+            "churn_rate": round(rate[0] * 100, 2),
+            "monetary_sum": round(revenue[0], 2),
+            "count_ci95": _interval(*count[1:]),
+            "churn_rate_ci95": _interval(*rate[1:], scale=100),
+            "monetary_sum_ci95": _interval(*revenue[1:]),
+        })
+    return records
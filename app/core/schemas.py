@@ -49,6 +49,24 @@ class TopRiskCustomer:
     RFM_score: int
 
 
+@dataclass
+class RuleViolation:
+    """Rows failing one data quality rule."""
+    rule: str
+    count: int
+    sample_keys: List[str]
+
+
+@dataclass
+class DataQualityReport:
+    """Row-level data quality summary for one raw dataset."""
+    dataset: str
+    total_rows: int
+    kept_rows: int
+    dropped_rows: int
+    violations: List[RuleViolation]
+
+
 def features_to_kpis(features, as_of_date) -> KPIs:
     """Convert features DataFrame to KPIs dataclass."""
     return KPIs(
@@ -71,3 +89,14 @@ def features_to_dict(kpis: KPIs) -> Dict[str, Any]:
         "churned_customers": kpis.churned_customers,
         "active_customers": kpis.active_customers
     }
+
+
+def quality_report_from_dict(data: Dict[str, Any]) -> DataQualityReport:
+    """Rebuild a DataQualityReport from its dict form (e.g. loaded JSON)."""
+    return DataQualityReport(
+        dataset=data["dataset"],
+        total_rows=data["total_rows"],
+        kept_rows=data["kept_rows"],
+        dropped_rows=data["dropped_rows"],
+        violations=[RuleViolation(**v) for v in data["violations"]]
+    )
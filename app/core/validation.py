@@ -1,8 +1,39 @@
 """Validation utilities for data integrity checks."""
 from __future__ import annotations
 
+from typing import Dict, Tuple
+
+import numpy as np
 import pandas as pd
 
+from app.core.schemas import DataQualityReport, RuleViolation
+
+
+# Columns (and dtypes) the pipeline reads from each raw dataset
+CUSTOMERS_COLUMNS = {"customer_id": "string", "customer_unique_id": "string"}
+ORDERS_COLUMNS = {
+    "order_id": "string",
+    "customer_id": "string",
+    "order_status": "string",
+    "order_purchase_timestamp": "datetime64[ns]",
+}
+# payment_value is left to inference so unparseable values reach check_payment_rows
+PAYMENTS_COLUMNS = {"order_id": "string", "payment_value": None}
+
+# Optional columns: read when present, used as breakdown dimensions and
+# payment features (payment_installments is inferred, then coerced)
+CUSTOMERS_OPTIONAL_COLUMNS = {"customer_state": "category"}
+PAYMENTS_OPTIONAL_COLUMNS = {"payment_type": "category", "payment_installments": None}
+
+# Order statuses present in the Olist dataset
+KNOWN_ORDER_STATUSES = {
+    "created", "approved", "invoiced", "processing",
+    "shipped", "delivered", "unavailable", "canceled",
+}
+
+# Offending keys listed per rule in data quality reports
+SAMPLE_SIZE = 5
+
 
 def validate_customers_schema(df: pd.DataFrame) -> None:
     """
@@ -14,7 +45,7 @@ def validate_customers_schema(df: pd.DataFrame) -> None:
     Raises:
         ValueError: If required columns are missing
     """
-    required = {"customer_id", "customer_unique_id"}
+    required = set(CUSTOMERS_COLUMNS)
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns in customers: {missing}")
@@ -30,7 +61,7 @@ def validate_orders_schema(df: pd.DataFrame) -> None:
     Raises:
         ValueError: If required columns are missing
     """
-    required = {"order_id", "customer_id", "order_status", "order_purchase_timestamp"}
+    required = set(ORDERS_COLUMNS)
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns in orders: {missing}")
@@ -46,7 +77,7 @@ def validate_payments_schema(df: pd.DataFrame) -> None:
     Raises:
         ValueError: If required columns are missing
     """
-    required = {"order_id", "payment_value"}
+    required = set(PAYMENTS_COLUMNS)
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns in payments: {missing}")
@@ -78,3 +109,120 @@ def validate_datasets(
     validate_customers_schema(customers)
     validate_orders_schema(orders)
     validate_payments_schema(payments)
+
+
+def _quality_report(
+    dataset: str,
+    masks: Dict[str, np.ndarray],
+    keys: pd.Series,
+    keep: np.ndarray
+) -> DataQualityReport:
+    """
+    Summarize rule masks into a data quality report.
+    
+    Args:
+        dataset: Dataset name
+        masks: Boolean mask of offending rows per rule
+        keys: Row keys used for samples (row position when null)
+        keep: Boolean mask of rows kept
+    
+    Returns:
+        DataQualityReport with counts and sample keys per rule
+    """
+    violations = []
+    for rule, mask in masks.items():
+        positions = np.flatnonzero(mask)
+        samples = keys.iloc[positions[:SAMPLE_SIZE]]
+        violations.append(RuleViolation(
+            rule=rule,
+            count=len(positions),
+            sample_keys=[
+                str(key) if pd.notna(key) else f"row:{pos}"
+                for pos, key in zip(positions[:SAMPLE_SIZE], samples)
+            ]
+        ))
+    
+    kept = int(keep.sum())
+    return DataQualityReport(
+        dataset=dataset,
+        total_rows=len(keep),
+        kept_rows=kept,
+        dropped_rows=len(keep) - kept,
+        violations=violations
+    )
+
+
+def check_order_rows(
+    orders: pd.DataFrame,
+    valid_status: set[str]
+) -> Tuple[pd.DataFrame, DataQualityReport]:
+    """
+    Validate order rows in one vectorized pass and drop the invalid ones.
+    
+    Every rule mask is computed over the raw frame, then a single filter keeps
+    rows that pass all rules. Duplicates are checked among rows with complete
+    keys, keeping the first occurrence.
+    
+    Args:
+        orders: Raw orders DataFrame
+        valid_status: Set of valid order statuses (e.g., {"delivered"})
+    
+    Returns:
+        Tuple of (cleaned orders, data quality report)
+    """
+    status = orders["order_status"]
+    missing_order = orders["order_id"].isna().to_numpy()
+    missing_customer = orders["customer_id"].isna().to_numpy()
+    missing_timestamp = orders["order_purchase_timestamp"].isna().to_numpy()
+    
+    complete = ~(missing_order | missing_customer | missing_timestamp)
+    duplicate = np.zeros(len(orders), dtype=bool)
+    duplicate[complete] = orders["order_id"][complete].duplicated().to_numpy()
+    
+    allowed = status.isin(valid_status).to_numpy()
+    known = status.isin(KNOWN_ORDER_STATUSES | valid_status).to_numpy()
+    
+    masks = {
+        "missing_order_id": missing_order,
+        "missing_customer_id": missing_customer,
+        "missing_purchase_timestamp": missing_timestamp,
+        "duplicate_order_id": duplicate,
+        "unknown_status": ~known,
+        "excluded_status": known & ~allowed,
+    }
+    keep = complete & ~duplicate & allowed
+    
+    report = _quality_report("orders", masks, orders["order_id"], keep)
+    return orders[keep].copy(), report
+
+
+def check_payment_rows(payments: pd.DataFrame) -> Tuple[pd.DataFrame, DataQualityReport]:
+    """
+    Validate payment rows in one vectorized pass and drop the invalid ones.
+    
+    Args:
+        payments: Raw payments DataFrame
+    
+    Returns:
+        Tuple of (cleaned payments with numeric payment_value, data quality report)
+    """
+    raw_value = payments["payment_value"]
+    value = raw_value if pd.api.types.is_numeric_dtype(raw_value) else pd.to_numeric(raw_value, errors="coerce")
+    
+    missing_order = payments["order_id"].isna().to_numpy()
+    missing_value = raw_value.isna().to_numpy()
+    unparseable = value.isna().to_numpy() & ~missing_value
+    negative = (value < 0).fillna(False).to_numpy()
+    
+    masks = {
+        "missing_order_id": missing_order,
+        "missing_payment_value": missing_value,
+        "unparseable_payment_value": unparseable,
+        "negative_payment_value": negative,
+    }
+    keep = ~(missing_order | missing_value | unparseable | negative)
+    
+    report = _quality_report("payments", masks, payments["order_id"], keep)
+    df = payments[keep].copy()
+    df["payment_value"] = value[keep].astype("float64")
+    return df, report
@@ -1 +1,34 @@
 """Services package initialization."""
+from __future__ import annotations
+
+from typing import Optional
+
+from flask import g, has_request_context, request
+
+
+class InvalidRequest(ValueError):
+    """Raised when a client-supplied parameter is invalid (HTTP 400)."""
+
+
+def get_data_service(dataset: Optional[str] = None):
+    """
+    Get the DataService of a dataset, importing it on first use.
+    
+    The service module imports pandas, so routes resolve it lazily to keep
+    application startup and ``/health`` free of heavy imports. Inside a
+    request, the dataset defaults to the ``/d/<dataset>/`` URL prefix or the
+    ``?dataset=`` query parameter.
+    
+    Args:
+        dataset: Dataset name (defaults to the request's, else the default one)
+    
+    Returns:
+        DataService instance
+    
+    Raises:
+        InvalidRequest: If the dataset is not registered
+    """
+    from app.services.registry import registry
+    if dataset is None and has_request_context():
+        dataset = g.get("dataset") or request.args.get("dataset")
+    return registry.get(dataset)
@@ -0,0 +1,107 @@
+"""Admission control for expensive endpoints: bounded concurrency and queue."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator
+
+from app import config
+
+
+class Limiter:
+    """
+    Concurrency limiter with a bounded wait queue.
+    
+    Up to `concurrency` callers hold a slot at once; up to `queue_size` more
+    wait (at most `timeout` seconds) for one. Anyone beyond that is rejected
+    immediately, so a saturated server answers fast instead of piling up
+    requests until they time out.
+    """
+    
+    def __init__(self, concurrency: int, queue_size: int, timeout: float):
+        """
+        Args:
+            concurrency: Slots held at once
+            queue_size: Callers allowed to wait for a slot
+            timeout: Seconds a queued caller waits before giving up
+        """
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if there is room.
+        
+        Returns:
+            True if a slot was taken (call release() afterwards), False if
+            the limiter is saturated
+        """
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                return False
+        
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            return True
+    
+    def release(self) -> None:
+        """Give back a slot and wake one queued caller."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+    
+    def stats(self) -> Dict[str, int]:
+        """Current occupancy and the number of rejected callers so far."""
+        with self._cond:
+            return {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+            }
+
+
+def release_once(limiter: Limiter) -> Callable[[], None]:
+    """A release callback for one slot that is safe to call more than once."""
+    released = threading.Event()
+    lock = threading.Lock()
+    
+    def release() -> None:
+        with lock:
+            if released.is_set():
+                return
+            released.set()
+        limiter.release()
+    
+    return release
+
+
+def release_after(body: Iterable, release: Callable[[], None]) -> Iterator:
+    """Yield a streamed response body, then release its slot."""
+    try:
+        yield from body
+    finally:
+        release()
+
+
+# Shared by every /export/* route (across datasets)
+export_limiter = Limiter(config.EXPORT_CONCURRENCY, config.EXPORT_QUEUE_SIZE, config.EXPORT_QUEUE_TIMEOUT)
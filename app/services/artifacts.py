@@ -0,0 +1,120 @@
+"""Versioned pipeline artifacts written by the batch CLI and read by the web tier."""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+
+LATEST_FILE = "LATEST"
+
+
+def write_artifacts(
+    output_dir: str,
+    version: str,
+    features: pd.DataFrame,
+    orders: pd.DataFrame,
+    quality: Dict[str, Any],
+    aggregates: Dict[str, Any],
+    manifest: Dict[str, Any]
+) -> Path:
+    """
+    Write one artifact version and point LATEST at it.
+    
+    Files are written into a temporary directory that is renamed into place,
+    and LATEST is replaced atomically last, so readers never see a partial
+    version.
+    
+    Args:
+        output_dir: Artifacts root directory
+        version: Version name (directory under output_dir)
+        features: Features DataFrame
+        orders: Joined orders kept with the snapshot
+        quality: Data quality reports (JSON-ready)
+        aggregates: Dashboard aggregates (JSON-ready)
+        manifest: Run metadata (JSON-ready)
+    
+    Returns:
+        Path of the written version directory
+    """
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f".{version}.tmp"
+    target = root / version
+    tmp.mkdir()
+    
+    features.to_parquet(tmp / "features.parquet", index=False)
+    orders.to_parquet(tmp / "orders.parquet", index=False)
+    for name, payload in [("quality", quality), ("aggregates", aggregates), ("manifest", manifest)]:
+        (tmp / f"{name}.json").write_text(json.dumps(payload, ensure_ascii=False, indent=2, default=str))
+    
+    tmp.rename(target)
+    
+    latest_tmp = root / f".{LATEST_FILE}.tmp"
+    latest_tmp.write_text(version)
+    os.replace(latest_tmp, root / LATEST_FILE)
+    
+    return target
+
+
+def latest_version(artifacts_dir: str) -> Optional[str]:
+    """Get the version LATEST points at, or None if nothing was published."""
+    path = Path(artifacts_dir) / LATEST_FILE
+    if not path.exists():
+        return None
+    return path.read_text().strip() or None
+
+
+def read_artifacts(artifacts_dir: str, version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read an artifact version (the latest by default).
+    
+    Args:
+        artifacts_dir: Artifacts root directory
+        version: Version to read (defaults to LATEST)
+    
+    Returns:
+        Dict with features, orders, quality, aggregates and manifest
+    
+    Raises:
+        FileNotFoundError: If no artifact has been published
+    """
+    version = version or latest_version(artifacts_dir)
+    if version is None:
+        raise FileNotFoundError(f"No artifacts published in {artifacts_dir}")
+    
+    base = Path(artifacts_dir) / version
+    result: Dict[str, Any] = {
+        "features": pd.read_parquet(base / "features.parquet"),
+        "orders": pd.read_parquet(base / "orders.parquet"),
+    }
+    for name in ["quality", "aggregates", "manifest"]:
+        result[name] = json.loads((base / f"{name}.json").read_text())
+    return result
+
+
+def prune_versions(artifacts_dir: str, keep: int) -> list[str]:
+    """
+    Delete all but the newest `keep` versions (never the LATEST one).
+    
+    Args:
+        artifacts_dir: Artifacts root directory
+        keep: Number of versions to keep
+    
+    Returns:
+        Names of deleted versions
+    """
+    root = Path(artifacts_dir)
+    latest = latest_version(artifacts_dir)
+    versions = sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    
+    deleted = []
+    for name in versions[:max(0, len(versions) - keep)]:
+        if name != latest:
+            shutil.rmtree(root / name)
+            deleted.append(name)
+    return deleted
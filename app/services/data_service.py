@@ -1,24 +1,259 @@
 """Data service for loading and caching pipeline results."""
 from __future__ import annotations
 
-from typing import Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from app import config
-from app.core import pipeline, validation
+from app.core import (
+    churn_model, cohorts, cube, delta, histogram, migration, order_index, pipeline, sampling, validation
+)
+from app.core.schemas import quality_report_from_dict
+from app.services import InvalidRequest, artifacts, loader, memo
+
+
+# Joined order columns kept with the snapshot for time-based rollups
+SNAPSHOT_ORDER_COLUMNS = ["order_id", "customer_unique_id", "order_purchase_timestamp", "payment_value"]
+
+# Part of every memoized stage key; bump when stage outputs change shape
+# (2: per-order payment mix columns and payment features)
+MEMO_SCHEMA_VERSION = 2
+
+# Integer features with cumulative count indexes (histograms, range counts)
+HISTOGRAM_FIELDS = ["recency_days", "tenure_days", "frequency"]
+
+# Aggregates stored in batch artifacts in the same shape the getters cache
+ARTIFACT_SEEDED_AGGREGATES = ["cohorts", "churn_trend", "rfm_matrix"]
+
+
+@dataclass
+class Snapshot:
+    """Pipeline output cached by DataService, plus derived aggregates."""
+    features: pd.DataFrame
+    as_of_date: pd.Timestamp
+    orders: pd.DataFrame
+    quality: Dict[str, Any] = field(default_factory=dict)
+    aggregates: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0  # Set when published; same content keeps the same version
+
+
+class CustomerLookup:
+    """Hash index over customer_unique_id with per-column arrays for row access."""
+    
+    def __init__(self, features: pd.DataFrame):
+        self.index = pd.Index(features["customer_unique_id"])
+        if len(self.index):
+            self.index.get_loc(self.index[0])  # build the hash table now, not on first lookup
+        self.columns = list(features.columns)
+        self._arrays = [features[col].to_numpy() for col in self.columns]
+    
+    def positions(self, customer_ids: list[str]) -> np.ndarray:
+        """Get row positions for IDs (-1 for unknown)."""
+        if len(customer_ids) == 1:
+            try:
+                return np.array([self.index.get_loc(customer_ids[0])])
+            except KeyError:
+                return np.array([-1])
+        return self.index.get_indexer(customer_ids)
+    
+    def records(self, positions: np.ndarray) -> list[dict]:
+        """Build JSON-safe dicts for row positions (timestamps as strings)."""
+        values = []
+        for arr in self._arrays:
+            taken = arr[positions]
+            if taken.dtype.kind == "M":
+                values.append([v.replace("T", " ") for v in np.datetime_as_string(taken, unit="s")])
+            else:
+                values.append(taken.tolist())
+        return [dict(zip(self.columns, row)) for row in zip(*values)]
+
+
+def _build_order_index(snapshot: Snapshot) -> order_index.OrderIndex:
+    """Order index over the snapshot's orders, carrying customer dimensions."""
+    dims = [c for c in pipeline.CUSTOMER_DIMENSIONS if c in snapshot.orders.columns]
+    return order_index.build_order_index(snapshot.orders, attributes=dims)
+
+
+def _json_safe(df: pd.DataFrame) -> list[dict]:
+    """Convert a small aggregate frame to records, with NaN as None."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+@contextmanager
+def _timed(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """Record the wall time of a block into timings[stage] (if given)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def memory_usage(obj: Any) -> int:
+    """
+    Estimate the memory held by a snapshot or cached aggregate, in bytes.
+    
+    DataFrames are measured with memory_usage(deep=True) so string columns
+    count their Python objects; containers are walked recursively.
+    
+    Args:
+        obj: Snapshot, DataFrame, array or container of them
+    
+    Returns:
+        Estimated size in bytes (0 for objects that aren't accounted)
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, Snapshot):
+        return memory_usage(obj.features) + memory_usage(obj.orders) + memory_usage(obj.aggregates)
+    if isinstance(obj, order_index.OrderIndex):
+        return sum(memory_usage(v) for v in vars(obj).values())
+    if isinstance(obj, CustomerLookup):
+        return memory_usage(obj.index) + memory_usage(obj._arrays)
+    if isinstance(obj, dict):
+        return sum(memory_usage(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(memory_usage(v) for v in obj)
+    return 0
+
+
+def parse_as_of(value: str) -> pd.Timestamp:
+    """
+    Parse an as_of request parameter.
+    
+    Date-only values (YYYY-MM-DD) mean the end of that day, so every order
+    placed on that date is included.
+    
+    Args:
+        value: Timestamp string
+    
+    Returns:
+        Parsed timestamp
+    
+    Raises:
+        InvalidRequest: If the value is not a valid timestamp
+    """
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise InvalidRequest(f"Invalid as_of: {value!r}")
+    if pd.isna(ts):
+        raise InvalidRequest(f"Invalid as_of: {value!r}")
+    
+    if ":" not in value and ts == ts.normalize():
+        ts = ts + pd.Timedelta(days=1) - pd.Timedelta(nanoseconds=1)
+    return ts
 
 
 class DataService:
     """Service to load data and run pipeline with simple caching."""
     
-    def __init__(self):
-        self._features: Optional[pd.DataFrame] = None
-        self._as_of_date: Optional[pd.Timestamp] = None
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        artifacts_dir: Optional[str] = None,
+        name: str = config.DEFAULT_DATASET
+    ):
+        """
+        Args:
+            data_dir: Directory with the Olist CSVs (defaults to config.PATH_*)
+            artifacts_dir: Batch artifacts to serve instead of running the
+                pipeline (defaults to config.ARTIFACTS_DIR for the default
+                data directory)
+            name: Dataset name
+        """
+        self.name = name
+        self.data_dir = data_dir
+        self._artifacts_dir = artifacts_dir
+        self._snapshot: Optional[Snapshot] = None
+        self._build_lock = threading.Lock()
+        self._build_started: Optional[float] = None
+        self._last_build_seconds: Optional[float] = None
+        self._history_lock = threading.Lock()
+        # Set by DatasetRegistry to account published snapshots
+        self.registry = None
+        # Compact per-customer risk segment codes of the published snapshot,
+        # kept across refreshes and evictions to diff against the next one
+        self._customer_universe = pd.Index([], dtype=object)
+        self._segment_codes: Optional[np.ndarray] = None
+        self._previous_as_of: Optional[pd.Timestamp] = None
+        self._migration: Optional[migration.SegmentMigration] = None
+        self._migration_as_of: Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]] = (None, None)
+        # Sample-based snapshot served by the dashboard getters during the
+        # first build (APPROX_MODE)
+        self._approximation: Optional[Snapshot] = None
+        # Per-customer content hashes of the last published versions
+        self._version = 0
+        self._version_hashes: OrderedDict[int, np.ndarray] = OrderedDict()
+    
+    @property
+    def artifacts_dir(self) -> Optional[str]:
+        """Artifacts directory served by this instance, if any."""
+        if self._artifacts_dir:
+            return self._artifacts_dir
+        return config.ARTIFACTS_DIR if self.data_dir is None else None
+    
+    def memo_store(self) -> Optional[memo.MemoStore]:
+        """On-disk memo of pipeline stage outputs (None when MEMO_DIR is unset)."""
+        if not config.MEMO_DIR:
+            return None
+        return memo.MemoStore(config.MEMO_DIR, config.MEMO_MAX_MB * 1024 * 1024)
+    
+    def data_paths(self) -> Dict[str, str]:
+        """Get the customers/orders/payments CSV paths for this instance."""
+        if self.data_dir is None:
+            return {
+                "customers": config.PATH_CUSTOMERS,
+                "orders": config.PATH_ORDERS,
+                "payments": config.PATH_PAYMENTS,
+            }
+        return {name: str(Path(self.data_dir) / filename) for name, filename in config.DATA_FILES.items()}
+    
+    def is_warm(self) -> bool:
+        """Check whether the features cache is populated."""
+        return self._snapshot is not None
+    
+    def is_building(self) -> bool:
+        """Check whether a snapshot build (or artifact load) is running."""
+        return self._build_lock.locked()
     
-    def load_raw_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    def has_approximation(self) -> bool:
+        """Check whether sample-based answers are available during the first build."""
+        return self._approximate_snapshot(None) is not None
+    
+    def retry_after(self) -> int:
         """
-        Load raw CSV datasets.
+        Estimate the seconds until the running build finishes.
+        
+        Returns:
+            Remaining time of the build, from the duration of the last one,
+            between 1 and 60 seconds (config.RETRY_AFTER_SECONDS if unknown)
+        """
+        started, last = self._build_started, self._last_build_seconds
+        if started is None or last is None:
+            return config.RETRY_AFTER_SECONDS
+        remaining = last - (time.perf_counter() - started)
+        return int(min(60, max(1, np.ceil(remaining))))
+    
+    def load_raw_data(self, workers: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Load raw CSV datasets (only the columns the pipeline uses).
+        
+        Args:
+            workers: Files read in parallel (defaults to config.LOAD_WORKERS)
         
         Returns:
             Tuple of (customers, orders, payments) DataFrames
@@ -27,78 +262,466 @@ class DataService:
             FileNotFoundError: If CSV files don't exist
             ValueError: If validation fails
         """
-        try:
-            customers = pd.read_csv(
-                config.PATH_CUSTOMERS,
-                dtype={"customer_id": "string", "customer_unique_id": "string"}
-            )
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Customers file not found: {config.PATH_CUSTOMERS}")
-        
-        try:
-            orders = pd.read_csv(
-                config.PATH_ORDERS,
-                dtype={"order_id": "string", "customer_id": "string", "order_status": "string"},
-                parse_dates=["order_purchase_timestamp"]
-            )
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Orders file not found: {config.PATH_ORDERS}")
-        
-        try:
-            payments = pd.read_csv(
-                config.PATH_PAYMENTS,
-                dtype={"order_id": "string", "payment_type": "string"}
-            )
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Payments file not found: {config.PATH_PAYMENTS}")
+        customers, orders, payments = loader.load_datasets(self.data_paths(), workers=workers)
         
         # Validate schemas
         validation.validate_datasets(customers, orders, payments)
         
         return customers, orders, payments
     
-    def get_features(self, force_refresh: bool = False) -> Tuple[pd.DataFrame, pd.Timestamp]:
+    def build_snapshot(
+        self,
+        timings: Optional[Dict[str, float]] = None,
+        workers: Optional[int] = None,
+        approximate: bool = False
+    ) -> Snapshot:
         """
-        Get customer features, running pipeline if needed.
+        Load raw data and run the pipeline, keeping the joined orders.
+        
+        Args:
+            timings: Optional dict receiving seconds per stage
+            workers: Files read in parallel (defaults to config.LOAD_WORKERS)
+            approximate: Publish a sample-based snapshot for the dashboard
+                right after loading, while the full pipeline runs
+        
+        Returns:
+            Fresh Snapshot (not cached)
+        """
+        store = self.memo_store()
+        fingerprints = loader.file_fingerprints(self.data_paths()) if store is not None else None
+        
+        def stage(name: str, inputs: Dict[str, Any], compute: Callable[[], memo.StageOutput]) -> memo.StageResult:
+            start = time.perf_counter()
+            result = memo.run_stage(store, name, {**inputs, "schema": MEMO_SCHEMA_VERSION}, compute)
+            if result.hit and timings is not None:
+                timings[name] = round(time.perf_counter() - start, 4)
+            return result
+        
+        # Stage DAG: prepare -> features -> score -> model (which also reads
+        # prepare); each stage is keyed on its parameters and the content
+        # digests of its upstream outputs
+        def prepare() -> memo.StageOutput:
+            with _timed(timings, "load"):
+                customers, orders, payments = self.load_raw_data(workers=workers)
+            
+            if approximate:
+                with _timed(timings, "approximate"):
+                    self._approximation = self.build_approximation(customers, orders, payments)
+            
+            with _timed(timings, "prepare"):
+                orders_joined, quality = pipeline.prepare_orders(
+                    customers=customers,
+                    orders=orders,
+                    payments=payments,
+                    valid_status=config.VALID_STATUS
+                )
+                extra = [c for c in pipeline.CUSTOMER_DIMENSIONS + pipeline.PAYMENT_ORDER_COLUMNS if c in orders_joined.columns]
+                kept = orders_joined[SNAPSHOT_ORDER_COLUMNS + extra].reset_index(drop=True)
+            return {"orders": kept}, {"quality": {name: asdict(r) for name, r in quality.items()}}
+        
+        prepared = stage("prepare", {"files": fingerprints, "valid_status": sorted(config.VALID_STATUS)}, prepare)
+        orders_joined = prepared.frames["orders"]
+        
+        def customer_features() -> memo.StageOutput:
+            with _timed(timings, "features"):
+                as_of_date = orders_joined["order_purchase_timestamp"].max()
+                if pd.isna(as_of_date):
+                    raise ValueError("No valid order_purchase_timestamp after filtering")
+                features = pipeline.compute_customer_features(orders_joined, as_of_date)
+            return {"features": features}, {"as_of_date": as_of_date.isoformat()}
+        
+        computed = stage("features", {"orders": prepared.digest}, customer_features)
+        
+        def score() -> memo.StageOutput:
+            with _timed(timings, "score"):
+                features = pipeline.score_features(computed.frames["features"], config.CHURN_THRESHOLD_DAYS)
+            return {"features": features}, {}
+        
+        scored = stage("score", {"features": computed.digest, "churn_threshold_days": config.CHURN_THRESHOLD_DAYS}, score)
+        
+        snapshot = Snapshot(
+            features=scored.frames["features"],
+            as_of_date=pd.Timestamp(computed.meta["as_of_date"]),
+            orders=orders_joined,
+            quality={name: quality_report_from_dict(r) for name, r in prepared.meta["quality"].items()}
+        )
+        
+        def model() -> memo.StageOutput:
+            with _timed(timings, "model"):
+                index = self._memoize(snapshot, "order_index", _build_order_index)
+                fitted, probability = self._fit_churn_model(index, snapshot.features, snapshot.as_of_date)
+            return {"scores": pd.DataFrame({"churn_probability": probability})}, {"churn_model": asdict(fitted)}
+        
+        scored_model = stage(
+            "model",
+            {
+                "features": scored.digest,
+                "orders": prepared.digest,
+                "horizon_days": config.CHURN_MODEL_HORIZON_DAYS,
+            },
+            model
+        )
+        snapshot.aggregates["churn_model"] = churn_model.ChurnModel.from_dict(scored_model.meta["churn_model"])
+        snapshot.features["churn_probability"] = scored_model.frames["scores"]["churn_probability"].to_numpy()
+        
+        return snapshot
+    
+    @staticmethod
+    def build_approximation(customers: pd.DataFrame, orders: pd.DataFrame, payments: pd.DataFrame) -> Snapshot:
+        """
+        Run the pipeline on a stratified sample of customers.
+        
+        Args:
+            customers: Raw customers DataFrame
+            orders: Raw orders DataFrame
+            payments: Raw payments DataFrame
+        
+        Returns:
+            Snapshot of the sampled customers, with the SampleDesign in
+            aggregates["sample_design"]
+        """
+        def members(values: pd.Series, keys) -> np.ndarray:
+            # Hash lookups; much faster than Series.isin on Arrow strings
+            return pd.Index(keys).get_indexer(values) >= 0
+        
+        design = sampling.stratified_sample(customers, config.APPROX_SAMPLE_SIZE)
+        customers = customers[members(customers["customer_unique_id"], design.customer_ids)]
+        # Reference date of the full run (up to orders without payments)
+        valid = orders["order_status"].isin(config.VALID_STATUS)
+        as_of_date = orders.loc[valid, "order_purchase_timestamp"].max()
+        orders = orders[members(orders["customer_id"], customers["customer_id"])]
+        payments = payments[members(payments["order_id"], orders["order_id"])]
+        
+        orders_joined, _ = pipeline.prepare_orders(customers, orders, payments, config.VALID_STATUS)
+        if orders_joined.empty:
+            features = pd.DataFrame(columns=["customer_unique_id", "churn", "monetary", "RFM_score", "risk_segment"])
+        else:
+            dims = [c for c in pipeline.CUSTOMER_DIMENSIONS if c in orders_joined.columns]
+            index = order_index.build_order_index(orders_joined, attributes=dims)
+            features = order_index.features_as_of(index, as_of_date)
+            features = pipeline.score_features(features, config.CHURN_THRESHOLD_DAYS)
+        
+        return Snapshot(
+            features=features,
+            as_of_date=as_of_date,
+            orders=orders_joined,
+            aggregates={"sample_design": design}
+        )
+    
+    def _approximate_snapshot(self, as_of: Optional[str]) -> Optional[Snapshot]:
+        """Sample snapshot to answer from while the first full build is running."""
+        if not config.APPROX_MODE or as_of is not None or self._snapshot is not None:
+            return None
+        approximation = self._approximation
+        if approximation is None or not self._build_lock.locked():
+            return None
+        return approximation
+    
+    @staticmethod
+    def _fit_churn_model(
+        index: order_index.OrderIndex,
+        features: pd.DataFrame,
+        as_of_date: pd.Timestamp
+    ) -> Tuple[churn_model.ChurnModel, np.ndarray]:
+        """
+        Train the churn model on the history before as_of_date and score customers.
+        
+        Shared by the model stage of live builds and by as_of replays, so
+        both use the same horizon, features and rounding.
+        
+        Returns:
+            (fitted model, churn_probability per row of features)
+        """
+        model = churn_model.train_churn_model(index, as_of_date, config.CHURN_MODEL_HORIZON_DAYS)
+        return model, churn_model.predict_churn_probability(model, features).round(4)
+    
+    def load_artifact_snapshot(self) -> Snapshot:
+        """
+        Load the latest batch artifact as a snapshot.
+        
+        Returns:
+            Snapshot with features, orders, quality reports and the
+            precomputed aggregates of the artifact
+        
+        Raises:
+            FileNotFoundError: If no artifact has been published
+        """
+        data = artifacts.read_artifacts(self.artifacts_dir)
+        snapshot = Snapshot(
+            features=data["features"],
+            as_of_date=pd.Timestamp(data["manifest"]["as_of_date"]),
+            orders=data["orders"],
+            quality={name: quality_report_from_dict(r) for name, r in data["quality"].items()}
+        )
+        # Seed aggregates cached under the same names by the getters
+        for name in ARTIFACT_SEEDED_AGGREGATES:
+            if name in data["aggregates"]:
+                snapshot.aggregates[name] = data["aggregates"][name]
+        if "churn_model" in data["aggregates"]:
+            snapshot.aggregates["churn_model"] = churn_model.ChurnModel.from_dict(data["aggregates"]["churn_model"])
+        snapshot.aggregates["artifact_version"] = data["manifest"]["version"]
+        return snapshot
+    
+    def _artifact_superseded(self, snapshot: Snapshot) -> bool:
+        """Check whether LATEST now points at another artifact than the one loaded."""
+        loaded = snapshot.aggregates.get("artifact_version")
+        if loaded is None or not self.artifacts_dir:
+            return False
+        latest = artifacts.latest_version(self.artifacts_dir)
+        return latest is not None and latest != loaded
+    
+    def use_snapshot(self, snapshot: Snapshot) -> None:
+        """Publish an externally built snapshot as the current one."""
+        self._memoize(snapshot, "customer_lookup", lambda s: CustomerLookup(s.features))
+        self._publish(snapshot)
+    
+    def _publish(self, snapshot: Snapshot) -> None:
+        """Cache a snapshot, diff its segments against the previous one and account it."""
+        self._track_segments(snapshot)
+        self._track_version(snapshot)
+        self._snapshot = snapshot
+        self._approximation = None
+        if self.registry is not None:
+            self.registry.admit(self)
+    
+    def _track_segments(self, snapshot: Snapshot) -> None:
+        """
+        Update the segment migration with a newly published snapshot.
+        
+        A rebuild that leaves every segment unchanged (e.g. after an
+        eviction) keeps the migration of the last real change.
+        """
+        features = snapshot.features
+        universe, codes = migration.segment_codes(
+            features["customer_unique_id"],
+            features["risk_segment"],
+            pipeline.RISK_SEGMENT_LABELS,
+            self._customer_universe
+        )
+        previous = self._segment_codes
+        self._customer_universe = universe
+        self._segment_codes = codes
+        
+        if previous is None:
+            self._previous_as_of = snapshot.as_of_date
+            return
+        if len(previous) == len(codes) and np.array_equal(previous, codes):
+            return
+        
+        self._migration = migration.segment_migration(previous, codes, pipeline.RISK_SEGMENT_LABELS)
+        self._migration_as_of = (self._previous_as_of, snapshot.as_of_date)
+        self._previous_as_of = snapshot.as_of_date
+    
+    def _track_version(self, snapshot: Snapshot) -> None:
+        """
+        Assign the snapshot's version and store its per-customer row hashes.
+        
+        A rebuild with identical customer data (see delta.DERIVED_COLUMNS)
+        keeps the current version number.
+        """
+        universe = self._customer_universe
+        positions = universe.get_indexer(snapshot.features["customer_unique_id"])
+        hashes = delta.row_hashes(snapshot.features, positions, len(universe))
+        snapshot.aggregates["row_positions"] = positions
+        
+        current = self._version_hashes.get(self._version)
+        if current is not None and delta.same_content(current, hashes):
+            snapshot.version = self._version
+            return
+        
+        self._version += 1
+        snapshot.version = self._version
+        self._version_hashes[self._version] = hashes
+        while len(self._version_hashes) > max(1, config.SNAPSHOT_VERSIONS_KEPT):
+            self._version_hashes.popitem(last=False)
+    
+    def evict(self) -> None:
+        """Drop the cached snapshot; the next request rebuilds it."""
+        self._snapshot = None
+    
+    def get_snapshot(self, force_refresh: bool = False, as_of: Optional[str] = None) -> Snapshot:
+        """
+        Get the current snapshot, running pipeline if needed.
         
         Args:
             force_refresh: If True, ignore cache and recompute
+            as_of: Optional point in time to replay the snapshot at
         
         Returns:
-            Tuple of (features DataFrame, as_of_date)
+            Snapshot with features, as_of_date and joined orders
+        """
+        snapshot = self._current_snapshot(force_refresh)
+        if as_of is None:
+            return snapshot
+        return self._snapshot_as_of(snapshot, parse_as_of(as_of))
+    
+    def _current_snapshot(self, force_refresh: bool = False) -> Snapshot:
+        """
+        Get the latest snapshot, building it if needed.
+        
+        A snapshot loaded from artifacts is reloaded once the CLI publishes a
+        newer version (LATEST changed).
+        """
+        def cached() -> Optional[Snapshot]:
+            snapshot = self._snapshot
+            if not config.CACHE_ENABLED or force_refresh or snapshot is None:
+                return None
+            return None if self._artifact_superseded(snapshot) else snapshot
+        
+        snapshot = cached()
+        if snapshot is not None:
+            return snapshot
+        
+        # Serialize builds so warmup and concurrent requests share one run
+        with self._build_lock:
+            snapshot = cached()
+            if snapshot is not None:
+                return snapshot
+            
+            self._build_started = time.perf_counter()
+            try:
+                if self.artifacts_dir:
+                    snapshot = self.load_artifact_snapshot()
+                else:
+                    snapshot = self.build_snapshot(approximate=config.APPROX_MODE and self._snapshot is None)
+            finally:
+                self._last_build_seconds = time.perf_counter() - self._build_started
+                self._build_started = None
+            
+            # Lookup index is built with the snapshot, before it is published
+            self._memoize(snapshot, "customer_lookup", lambda s: CustomerLookup(s.features))
+            
+            # Cache
+            if config.CACHE_ENABLED:
+                self._publish(snapshot)
+        
+        return snapshot
+    
+    def _snapshot_as_of(self, current: Snapshot, as_of_date: pd.Timestamp) -> Snapshot:
+        """
+        Replay the snapshot at an earlier as_of_date using the order index.
+        
+        Replayed snapshots are kept in a small LRU attached to the current
+        snapshot, so they are dropped together with it on refresh.
+        
+        Args:
+            current: Latest snapshot
+            as_of_date: Point in time to replay
+        
+        Returns:
+            Snapshot as of as_of_date (the current one if as_of_date is later)
+        
+        Raises:
+            InvalidRequest: If there are no orders up to as_of_date
         """
-        if config.CACHE_ENABLED and not force_refresh and self._features is not None:
-            return self._features, self._as_of_date
+        if as_of_date >= current.as_of_date:
+            return current
+        
+        key = as_of_date.isoformat()
+        with self._history_lock:
+            history = current.aggregates.setdefault("as_of_history", OrderedDict())
+            if key in history:
+                history.move_to_end(key)
+                return history[key]
         
-        # Load and process
-        customers, orders, payments = self.load_raw_data()
+        index = self._memoize(current, "order_index", _build_order_index)
+        if as_of_date < index.first_time:
+            raise InvalidRequest(f"No orders on or before as_of {key}")
         
-        features, as_of_date = pipeline.run_pipeline(
-            customers=customers,
-            orders=orders,
-            payments=payments,
-            churn_threshold_days=config.CHURN_THRESHOLD_DAYS,
-            valid_status=config.VALID_STATUS
+        features = order_index.features_as_of(index, as_of_date)
+        features = pipeline.score_features(features, config.CHURN_THRESHOLD_DAYS)
+        orders = current.orders
+        snapshot = Snapshot(
+            features=features,
+            as_of_date=as_of_date,
+            orders=orders[orders["order_purchase_timestamp"] <= as_of_date].reset_index(drop=True),
+            quality=current.quality
         )
+        # Model trained on history before as_of_date only
+        model, probability = self._fit_churn_model(index, features, as_of_date)
+        snapshot.aggregates["churn_model"] = model
+        snapshot.features["churn_probability"] = probability
         
-        # Cache
-        if config.CACHE_ENABLED:
-            self._features = features
-            self._as_of_date = as_of_date
+        with self._history_lock:
+            history[key] = snapshot
+            while len(history) > config.AS_OF_CACHE_SIZE:
+                history.popitem(last=False)
         
-        return features, as_of_date
+        return snapshot
     
-    def get_kpis(self) -> dict:
-        """Get summary KPIs."""
+    def get_features(
+        self,
+        force_refresh: bool = False,
+        as_of: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, pd.Timestamp]:
+        """
+        Get customer features, running pipeline if needed.
+        
+        Args:
+            force_refresh: If True, ignore cache and recompute
+            as_of: Optional point in time to replay the features at
+        
+        Returns:
+            Tuple of (features DataFrame, as_of_date)
+        """
+        snapshot = self.get_snapshot(force_refresh=force_refresh, as_of=as_of)
+        return snapshot.features, snapshot.as_of_date
+    
+    @staticmethod
+    def _memoize(snapshot: Snapshot, name: str, builder: Callable[[Snapshot], Any]) -> Any:
+        """Compute an aggregate of a snapshot once and keep it with the snapshot."""
+        if name not in snapshot.aggregates:
+            snapshot.aggregates[name] = builder(snapshot)
+        return snapshot.aggregates[name]
+    
+    def _aggregate(
+        self,
+        name: str,
+        builder: Callable[[Snapshot], Any],
+        as_of: Optional[str] = None
+    ) -> Any:
+        """
+        Get an aggregate of the current (or replayed) snapshot, computing it once.
+        
+        Args:
+            name: Cache key within the snapshot
+            builder: Function computing the aggregate from the snapshot
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Cached or freshly computed aggregate
+        """
+        return self._memoize(self.get_snapshot(as_of=as_of), name, builder)
+    
+    def get_kpis(self, as_of: Optional[str] = None) -> dict:
+        """Get summary KPIs (estimates with ci95 while an approximation is served)."""
         from app.core.schemas import features_to_kpis, features_to_dict
         
-        features, as_of_date = self.get_features()
+        approximation = self._approximate_snapshot(as_of)
+        if approximation is not None:
+            return sampling.approximate_kpis(
+                approximation.aggregates["sample_design"],
+                approximation.features,
+                approximation.as_of_date
+            )
+        
+        features, as_of_date = self.get_features(as_of=as_of)
         kpis = features_to_kpis(features, as_of_date)
         return features_to_dict(kpis)
     
-    def get_churn_by_rfm(self) -> list[dict]:
+    def get_churn_by_rfm(self, as_of: Optional[str] = None) -> list[dict]:
         """Get churn rate aggregated by RFM score."""
-        features, _ = self.get_features()
+        approximation = self._approximate_snapshot(as_of)
+        if approximation is not None:
+            groups = sampling.approximate_groups(
+                approximation.aggregates["sample_design"], approximation.features, "RFM_score"
+            )
+            return [
+                {k: v for k, v in group.items() if not k.startswith("monetary_sum")}
+                for group in groups
+            ]
+        
+        features, _ = self.get_features(as_of=as_of)
         
         rfm_churn = (
             features.groupby("RFM_score", as_index=False)
@@ -108,35 +731,156 @@ class DataService:
         
         return rfm_churn.to_dict(orient="records")
     
-    def get_recency_histogram(self, bins: int = 20) -> dict:
+    def get_rfm_matrix(self, as_of: Optional[str] = None) -> list[dict]:
+        """Get count, churn rate and monetary for all 125 R-F-M cells."""
+        def build(snapshot: Snapshot) -> list[dict]:
+            matrix = pipeline.compute_rfm_matrix(snapshot.features)
+            records = matrix.to_dict(orient="records")
+            for record in records:
+                if record["count"] == 0:
+                    record["churn_rate"] = None
+            return records
+        
+        return self._aggregate("rfm_matrix", build, as_of=as_of)
+    
+    def get_breakdown(
+        self,
+        by: list[str],
+        filters: Optional[Dict[str, str]] = None,
+        as_of: Optional[str] = None
+    ) -> list[dict]:
         """
-        Get recency distribution as histogram.
+        Get churn broken down by any cube dimensions, from the snapshot cube.
         
         Args:
-            bins: Number of bins for histogram
+            by: Dimensions to group by (risk_segment, RFM_score,
+                customer_state, payment_type)
+            filters: Dimension values to keep, as strings
+            as_of: Optional point in time to replay the snapshot at
         
         Returns:
-            Dict with bin_edges and counts
+            List of dicts with the by columns, count, churn_rate and monetary_sum
+        
+        Raises:
+            InvalidRequest: If a dimension or filter value is invalid
         """
-        features, _ = self.get_features()
+        churn_cube = self._aggregate("cube", lambda s: cube.build_cube(s.features), as_of=as_of)
+        dimensions = [c for c in churn_cube.columns if c not in cube.CUBE_MEASURES]
         
-        counts, bin_edges = pd.cut(
-            features["recency_days"],
-            bins=bins,
-            retbins=True,
-            duplicates="drop"
+        unknown = [d for d in [*by, *(filters or {})] if d not in dimensions]
+        if unknown:
+            raise InvalidRequest(f"Unknown breakdown dimensions: {unknown}; available: {dimensions}")
+        
+        typed_filters = {}
+        for dim, value in (filters or {}).items():
+            if pd.api.types.is_numeric_dtype(churn_cube[dim]):
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise InvalidRequest(f"Invalid value for {dim}: {value!r}")
+            typed_filters[dim] = value
+        
+        return _json_safe(cube.rollup(churn_cube, by, typed_filters))
+    
+    def _cumulative_counts(self, field: str, as_of: Optional[str] = None) -> histogram.CumulativeCounts:
+        """Get (building once per snapshot) the cumulative count index of a field."""
+        if field not in HISTOGRAM_FIELDS:
+            raise InvalidRequest(f"Invalid field: {field!r} (expected one of {', '.join(HISTOGRAM_FIELDS)})")
+        return self._aggregate(
+            f"cumulative_counts:{field}",
+            lambda s: histogram.build_cumulative_counts(s.features[field].to_numpy()),
+            as_of=as_of
         )
+    
+    def get_histogram(
+        self,
+        field: str = "recency_days",
+        bins: int = 20,
+        low: Optional[int] = None,
+        high: Optional[int] = None,
+        as_of: Optional[str] = None
+    ) -> dict:
+        """
+        Get the distribution of an integer feature as an equal-width histogram.
         
-        hist_data = counts.value_counts().sort_index()
+        Args:
+            field: recency_days, tenure_days or frequency
+            bins: Number of bins
+            low: Lower bound, inclusive (defaults to the minimum)
+            high: Upper bound, inclusive (defaults to the maximum)
+            as_of: Optional point in time to replay the snapshot at
         
-        return {
-            "bins": [f"{int(interval.left)}-{int(interval.right)}" for interval in hist_data.index],
-            "counts": hist_data.values.tolist()
-        }
+        Returns:
+            Dict with bin labels ("lo-hi") and counts
+        
+        Raises:
+            InvalidRequest: On an unknown field, bins outside
+                1..HISTOGRAM_MAX_BINS or low > high
+        """
+        if not 1 <= bins <= config.HISTOGRAM_MAX_BINS:
+            raise InvalidRequest(f"bins must be between 1 and {config.HISTOGRAM_MAX_BINS}")
+        if low is not None and high is not None and low > high:
+            raise InvalidRequest("min must not be greater than max")
+        
+        counts = self._cumulative_counts(field, as_of=as_of)
+        labels, values = histogram.histogram(counts, bins, low, high)
+        return {"bins": labels, "counts": values}
     
-    def get_risk_summary(self) -> list[dict]:
+    def get_recency_histogram(
+        self,
+        bins: int = 20,
+        as_of: Optional[str] = None,
+        low: Optional[int] = None,
+        high: Optional[int] = None
+    ) -> dict:
+        """
+        Get recency distribution as histogram.
+        
+        Args:
+            bins: Number of bins for histogram
+            as_of: Optional point in time to replay the snapshot at
+            low: Lower recency bound, inclusive (defaults to the minimum)
+            high: Upper recency bound, inclusive (defaults to the maximum)
+        
+        Returns:
+            Dict with bin labels and counts
+        """
+        return self.get_histogram("recency_days", bins, low, high, as_of=as_of)
+    
+    def count_in_range(
+        self,
+        field: str,
+        low: Optional[int] = None,
+        high: Optional[int] = None,
+        as_of: Optional[str] = None
+    ) -> int:
+        """
+        Count customers with low <= field <= high.
+        
+        Args:
+            field: recency_days, tenure_days or frequency
+            low: Lower bound, inclusive (unbounded when None)
+            high: Upper bound, inclusive (unbounded when None)
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Number of customers in the range
+        """
+        counts = self._cumulative_counts(field, as_of=as_of)
+        return counts.count_between(
+            counts.low if low is None else low,
+            counts.high if high is None else high
+        )
+    
+    def get_risk_summary(self, as_of: Optional[str] = None) -> list[dict]:
         """Get aggregation by risk segment."""
-        features, _ = self.get_features()
+        approximation = self._approximate_snapshot(as_of)
+        if approximation is not None:
+            return sampling.approximate_groups(
+                approximation.aggregates["sample_design"], approximation.features, "risk_segment"
+            )
+        
+        features, _ = self.get_features(as_of=as_of)
         
         risk_summary = (
             features.groupby("risk_segment", as_index=False)
@@ -151,17 +895,18 @@ class DataService:
         
         return risk_summary.to_dict(orient="records")
     
-    def get_top_risk(self, n: int = 50) -> list[dict]:
+    def get_top_risk(self, n: int = 50, as_of: Optional[str] = None) -> list[dict]:
         """
         Get top N customers by risk.
         
         Args:
             n: Number of customers to return
+            as_of: Optional point in time to replay the snapshot at
         
         Returns:
             List of customer dicts
         """
-        features, _ = self.get_features()
+        features, _ = self.get_features(as_of=as_of)
         
         top_risk = (
             features.sort_values(["churn", "recency_days", "monetary"], ascending=[False, False, False])
@@ -175,9 +920,209 @@ class DataService:
         
         return top_risk.to_dict(orient="records")
     
-    def get_all_features(self) -> pd.DataFrame:
+    def get_cohorts(self, as_of: Optional[str] = None) -> dict:
+        """
+        Get acquisition cohorts with active customers per month offset.
+        
+        Args:
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Dict with max_offset and one entry per cohort (size, active
+            counts and retention % for each observed month)
+        """
+        def build(snapshot: Snapshot) -> dict:
+            matrix = cohorts.compute_cohort_matrix(snapshot.orders)
+            last_month = snapshot.as_of_date.to_period("M")
+            
+            rows = []
+            for cohort, counts in matrix.iterrows():
+                # Only offsets observable up to the last month of data
+                n_observed = (last_month - pd.Period(cohort, freq="M")).n + 1
+                observed = counts.to_numpy()[:n_observed]
+                size = int(observed[0])
+                rows.append({
+                    "cohort": cohort,
+                    "size": size,
+                    "active": observed.tolist(),
+                    "retention": (observed / size * 100).round(2).tolist(),
+                })
+            
+            return {"max_offset": matrix.shape[1] - 1, "cohorts": rows}
+        
+        return self._aggregate("cohorts", build, as_of=as_of)
+    
+    def get_churn_trend(self, as_of: Optional[str] = None) -> list[dict]:
+        """Get churn rate and active customers at the end of every month."""
+        def build(snapshot: Snapshot) -> list[dict]:
+            trend = cohorts.compute_churn_trend(snapshot.orders, config.CHURN_THRESHOLD_DAYS)
+            return trend.to_dict(orient="records")
+        
+        return self._aggregate("churn_trend", build, as_of=as_of)
+    
+    def get_data_quality(self) -> dict:
+        """Get row-level data quality reports from the last pipeline run."""
+        snapshot = self.get_snapshot()
+        return {name: asdict(report) for name, report in snapshot.quality.items()}
+    
+    def get_customers(
+        self,
+        customer_ids: list[str],
+        as_of: Optional[str] = None
+    ) -> Tuple[list[dict], list[str]]:
+        """
+        Look up customer profiles by customer_unique_id.
+        
+        Args:
+            customer_ids: IDs to look up
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Tuple of (found customer dicts in request order, missing IDs)
+        """
+        snapshot = self.get_snapshot(as_of=as_of)
+        lookup = self._memoize(snapshot, "customer_lookup", lambda s: CustomerLookup(s.features))
+        
+        positions = lookup.positions(customer_ids)
+        found = positions >= 0
+        missing = [cid for cid, ok in zip(customer_ids, found) if not ok]
+        
+        return lookup.records(positions[found]), missing
+    
+    def get_customer(self, customer_id: str, as_of: Optional[str] = None) -> Optional[dict]:
+        """
+        Look up a single customer profile.
+        
+        Args:
+            customer_id: customer_unique_id
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Customer dict, or None if unknown
+        """
+        found, _ = self.get_customers([customer_id], as_of=as_of)
+        return found[0] if found else None
+    
+    def get_segment_migration(self) -> Optional[dict]:
+        """
+        Get the risk segment transition matrix between the last two runs.
+        
+        Returns:
+            Dict with previous/current as_of dates, segment labels ("Ausente"
+            last, for customers missing from one of the runs), matrix rows
+            (previous segment) x columns (current segment) and the number of
+            changed customers; None if no refresh changed any segment yet
+        """
+        self.get_snapshot()
+        if self._migration is None:
+            return None
+        
+        result = self._migration
+        previous_as_of, as_of = self._migration_as_of
+        return {
+            "previous_as_of_date": previous_as_of.strftime("%Y-%m-%d"),
+            "as_of_date": as_of.strftime("%Y-%m-%d"),
+            "segments": result.labels + ["Ausente"],
+            "matrix": result.matrix.tolist(),
+            "changed_customers": int(len(result.changed)),
+        }
+    
+    def get_segment_changes(self) -> Optional[pd.DataFrame]:
+        """
+        Get the customers whose risk segment changed in the last migration.
+        
+        Returns:
+            DataFrame with customer_unique_id, previous_segment and
+            current_segment (empty for absent); None if there's no migration
+        """
+        self.get_snapshot()
+        if self._migration is None:
+            return None
+        
+        result = self._migration
+        labels = np.array(result.labels + [""], dtype=object)
+        changed = result.changed
+        return pd.DataFrame({
+            "customer_unique_id": self._customer_universe[changed],
+            "previous_segment": labels[result.previous[changed]],
+            "current_segment": labels[result.current[changed]],
+        })
+    
+    def get_churn_model(self, as_of: Optional[str] = None) -> Optional[dict]:
+        """Get the parameters of the churn probability model of the snapshot."""
+        model = self.get_snapshot(as_of=as_of).aggregates.get("churn_model")
+        return None if model is None else asdict(model)
+    
+    def get_content_digest(self, as_of: Optional[str] = None) -> str:
+        """
+        Hash of the snapshot's features and as_of_date.
+        
+        Unlike the version number, the digest is the same across restarts for
+        the same data, so it can key files cached on disk.
+        """
+        return self.get_export_stamp(as_of=as_of)[0]
+    
+    def get_export_stamp(self, as_of: Optional[str] = None) -> Tuple[str, Optional[int]]:
+        """
+        Get the content digest of a snapshot together with its version.
+        
+        Both come from the same snapshot, so a refresh landing in between
+        can't pair one snapshot's digest with another's version.
+        
+        Returns:
+            (content digest, version; None for as_of replays, which are
+            not published versions)
+        """
+        current = self.get_snapshot()
+        snapshot = current if as_of is None else self._snapshot_as_of(current, parse_as_of(as_of))
+        digest = self._memoize(
+            snapshot,
+            "content_digest",
+            lambda s: memo.content_digest({"features": s.features}, {"as_of_date": s.as_of_date.isoformat()})
+        )
+        return digest, (current.version if as_of is None else None)
+    
+    def get_version(self) -> int:
+        """Get the version of the current snapshot (built if needed)."""
+        return self.get_snapshot().version
+    
+    def get_customers_delta(self, since: str) -> Tuple[int, pd.DataFrame, pd.Index]:
+        """
+        Get the customer rows that changed since an earlier snapshot version.
+        
+        Args:
+            since: Version the client last synced (e.g. from the
+                X-Snapshot-Version header of a previous export)
+        
+        Returns:
+            (current version, features rows inserted or changed since then,
+            customer_unique_id of customers no longer present)
+        
+        Raises:
+            InvalidRequest: If since is not a version still kept in memory
+        """
+        snapshot = self.get_snapshot()
+        try:
+            version = int(since)
+        except (TypeError, ValueError):
+            raise InvalidRequest(f"Invalid since: {since!r}")
+        previous = self._version_hashes.get(version)
+        current = self._version_hashes.get(snapshot.version)
+        if previous is None or current is None:
+            raise InvalidRequest(f"Version {version} is not available; run a full export")
+        
+        upserts, deletes = delta.delta_positions(previous, current)
+        
+        positions = snapshot.aggregates["row_positions"]
+        row_of = np.full(len(current), -1, dtype="int64")
+        row_of[positions] = np.arange(len(positions))
+        
+        rows = snapshot.features.iloc[np.sort(row_of[upserts])]
+        return snapshot.version, rows, self._customer_universe[deletes]
+    
+    def get_all_features(self, as_of: Optional[str] = None) -> pd.DataFrame:
         """Get all customer features (for export)."""
-        features, _ = self.get_features()
+        features, _ = self.get_features(as_of=as_of)
         return features
 
 
@@ -0,0 +1,287 @@
+"""
+Background CSV export jobs, with the rendered files cached on disk.
+
+An export is identified by its kind, dataset, parameters and the content
+digest of the snapshot it is rendered from, so an identical request against
+unchanged data (even after a restart) is answered from the file written the
+first time. Jobs run in a small worker pool: clients submit, poll and then
+download the file, which is sent with send_file (zero-copy where the WSGI
+server supports it).
+
+Workers update jobs under the queue's lock; callers only ever get copies
+taken under it, so a status read never sees a half-updated job.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app import config
+from app.services import InvalidRequest
+
+
+# Export kinds and the download file name of each
+KINDS = {
+    "customers": "customers_features.csv",
+    "top_risk": "top_risk.csv",
+}
+
+# Jobs remembered for polling (oldest finished jobs are forgotten first)
+MAX_JOBS = 1000
+
+# Renders retried when the snapshot changes while one is running
+MAX_RENDER_ATTEMPTS = 3
+
+
+@dataclass
+class ExportJob:
+    """One export request and its progress."""
+    id: str
+    kind: str
+    dataset: str
+    params: Dict[str, Any]
+    key: str                            # cache key of the file (updated if the data changed meanwhile)
+    status: str = "queued"              # queued | running | done | failed
+    error: Optional[str] = None
+    size: Optional[int] = None          # file size in bytes, once done
+    snapshot_version: Optional[int] = None  # version of the snapshot the file holds (None for as_of)
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    
+    @property
+    def filename(self) -> str:
+        """Download file name."""
+        return KINDS[self.kind]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready status."""
+        return asdict(self)
+
+
+def export_key(kind: str, dataset: str, digest: str, params: Dict[str, Any]) -> str:
+    """Cache key of an export: kind plus a hash of dataset, snapshot content and params."""
+    payload = json.dumps({"dataset": dataset, "digest": digest, "params": params}, sort_keys=True)
+    return f"{kind}-{hashlib.sha256(payload.encode()).hexdigest()[:24]}"
+
+
+def render(service, kind: str, params: Dict[str, Any]):
+    """Build the DataFrame of an export."""
+    import pandas as pd
+    
+    as_of = params.get("as_of")
+    if kind == "customers":
+        return service.get_all_features(as_of=as_of)
+    return pd.DataFrame(service.get_top_risk(n=50, as_of=as_of))
+
+
+class ExportQueue:
+    """Worker pool rendering exports into a directory of cached CSV files."""
+    
+    def __init__(self, root: str, workers: int, max_files: int):
+        """
+        Args:
+            root: Directory of the rendered files (created on first write)
+            workers: Exports rendered concurrently
+            max_files: Files kept; least recently used ones are deleted
+        """
+        self.root = Path(root)
+        self.max_files = max_files
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="churnlens-export")
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, ExportJob] = OrderedDict()
+        self._pending: Dict[str, ExportJob] = {}  # queued or running job by key
+        self._futures: Dict[str, Future] = {}     # by job ID, while pending
+    
+    def path(self, key: str) -> Path:
+        """Path of the cached file of a key."""
+        return self.root / f"{key}.csv"
+    
+    def _new_job(self, service, kind: str, as_of: Optional[str]) -> ExportJob:
+        """Validate an export request and compute its current cache key."""
+        if kind not in KINDS:
+            raise InvalidRequest(f"Invalid kind: {kind!r} (expected one of {', '.join(KINDS)})")
+        params = {"as_of": as_of}
+        digest, version = service.get_export_stamp(as_of=as_of)
+        key = export_key(kind, service.name, digest, params)
+        return ExportJob(
+            id=uuid.uuid4().hex, kind=kind, dataset=service.name, params=params, key=key, snapshot_version=version
+        )
+    
+    def _remember(self, job: ExportJob) -> None:
+        """Add a job to the table, forgetting the oldest finished ones."""
+        self._jobs[job.id] = job
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= MAX_JOBS:
+                break
+            if self._jobs[job_id].status in ("done", "failed"):
+                del self._jobs[job_id]
+    
+    def _cached(self, job: ExportJob) -> bool:
+        """
+        Mark a job done if its file already exists (refreshing its LRU time).
+        Call with the lock held.
+        """
+        path = self.path(job.key)
+        try:
+            os.utime(path)
+            job.size = path.stat().st_size
+        except OSError:
+            return False
+        job.status = "done"
+        job.finished_at = time.time()
+        return True
+    
+    def _submit(self, service, kind: str, as_of: Optional[str]) -> Tuple[ExportJob, Optional[Future]]:
+        """Queue an export; returns the live job and its future (None if already done)."""
+        job = self._new_job(service, kind, as_of)
+        with self._lock:
+            pending = self._pending.get(job.key)
+            if pending is not None:
+                return pending, self._futures.get(pending.id)
+            self._remember(job)
+            if self._cached(job):
+                return job, None
+            self._pending[job.key] = job
+            future = self._pool.submit(self._run, job, service)
+            self._futures[job.id] = future
+        return job, future
+    
+    def submit(self, service, kind: str, as_of: Optional[str] = None) -> ExportJob:
+        """
+        Queue an export, reusing a cached file or an identical pending job.
+        
+        Args:
+            service: DataService of the dataset
+            kind: Export kind (see KINDS)
+            as_of: Optional point in time to replay the snapshot at
+        
+        Returns:
+            Copy of the ExportJob (already done on a cache hit)
+        
+        Raises:
+            InvalidRequest: On an unknown kind or invalid as_of
+        """
+        job, _ = self._submit(service, kind, as_of)
+        with self._lock:
+            return replace(job)
+    
+    def run_now(self, service, kind: str, as_of: Optional[str] = None) -> ExportJob:
+        """
+        Submit an export and wait for it (concurrent identical requests share
+        one render; a cached file is reused without rendering).
+        
+        The file is marked recently used before returning so prune() keeps it
+        for the caller to send; if it was pruned before that, the export is
+        rendered once more.
+        
+        Returns:
+            Copy of the finished ExportJob
+        
+        Raises:
+            InvalidRequest: On an unknown kind or invalid as_of
+            RuntimeError: If the export failed
+            FileNotFoundError: If the file was pruned again before it could
+                be sent
+        """
+        for _ in range(2):
+            job, future = self._submit(service, kind, as_of)
+            if future is not None:
+                future.result()
+            with self._lock:
+                if job.status != "done":
+                    raise RuntimeError(job.error or f"Export job is {job.status}")
+                if self._cached(job):
+                    return replace(job)
+        raise FileNotFoundError(f"Export file {job.key} was deleted before it could be sent")
+    
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Get a copy of a job by ID."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else replace(job)
+    
+    def _run(self, job: ExportJob, service) -> None:
+        """Worker body: render the job and record the outcome."""
+        key = job.key
+        try:
+            self._render(job, service)
+        except Exception as e:
+            with self._lock:
+                job.status, job.error, job.finished_at = "failed", str(e), time.time()
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._futures.pop(job.id, None)
+    
+    def _render(self, job: ExportJob, service) -> None:
+        """Render a job's file under the key of the snapshot it was rendered from."""
+        with self._lock:
+            job.status = "running"
+            key = job.key
+        as_of = job.params["as_of"]
+        for _ in range(MAX_RENDER_ATTEMPTS):
+            frame = render(service, job.kind, job.params)
+            digest, version = service.get_export_stamp(as_of=as_of)
+            rendered = export_key(job.kind, job.dataset, digest, job.params)
+            if rendered == key:
+                break
+            # The data changed since the key was computed; render again
+            key = rendered
+        
+        path = self.path(key)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        frame.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        size = path.stat().st_size
+        
+        with self._lock:
+            job.key, job.size, job.snapshot_version = key, size, version
+            job.status, job.finished_at = "done", time.time()
+        self.prune()
+    
+    def prune(self) -> list[str]:
+        """
+        Delete the least recently used files beyond max_files.
+        
+        Returns:
+            Deleted file names
+        """
+        files = []
+        for path in self.root.glob("*.csv"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        files.sort(reverse=True)
+        
+        deleted = []
+        for _, path in files[self.max_files:]:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            deleted.append(path.name)
+        return deleted
+
+
+_queue: Optional[ExportQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_export_queue() -> ExportQueue:
+    """Get the process-wide export queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExportQueue(config.EXPORT_DIR, config.EXPORT_WORKERS, config.EXPORT_FILES_KEPT)
+        return _queue
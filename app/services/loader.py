@@ -0,0 +1,123 @@
+"""CSV loading with column projection and concurrent file reads."""
+from __future__ import annotations
+
+import importlib.util
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from app import config
+from app.core import validation
+
+
+def csv_engine() -> str:
+    """
+    Resolve the configured CSV parser engine.
+    
+    "auto" picks the multithreaded pyarrow parser when pyarrow is installed
+    and falls back to pandas' C parser otherwise.
+    """
+    if config.CSV_ENGINE != "auto":
+        return config.CSV_ENGINE
+    return "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def read_projected_csv(
+    path: str,
+    columns: Dict[str, Optional[str]],
+    engine: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Read only the given columns of a CSV, with explicit dtypes.
+    
+    Columns missing from the file are skipped here, so schema validation
+    can report them instead of the parser failing.
+    
+    Args:
+        path: CSV file path
+        columns: Column name to dtype ("datetime64[ns]" parses dates,
+            None lets the parser infer)
+        engine: Parser engine (defaults to csv_engine())
+    
+    Returns:
+        DataFrame with the projected columns
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in columns if col in header]
+    
+    dates = [col for col in usecols if columns[col] == "datetime64[ns]"]
+    dtype = {
+        col: columns[col] for col in usecols
+        if columns[col] is not None and col not in dates
+    }
+    
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=dtype,
+        parse_dates=dates,
+        engine=engine or csv_engine()
+    )
+
+
+def load_datasets(
+    paths: Dict[str, str],
+    workers: Optional[int] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Read customers, orders and payments CSVs concurrently.
+    
+    Args:
+        paths: Dict with "customers", "orders" and "payments" file paths
+        workers: Number of files read in parallel (defaults to config.LOAD_WORKERS)
+    
+    Returns:
+        Tuple of (customers, orders, payments) DataFrames
+    
+    Raises:
+        FileNotFoundError: If a CSV file doesn't exist
+    """
+    specs = {
+        "customers": {**validation.CUSTOMERS_COLUMNS, **validation.CUSTOMERS_OPTIONAL_COLUMNS},
+        "orders": validation.ORDERS_COLUMNS,
+        "payments": {**validation.PAYMENTS_COLUMNS, **validation.PAYMENTS_OPTIONAL_COLUMNS},
+    }
+    engine = csv_engine()
+    
+    def read(name: str) -> pd.DataFrame:
+        try:
+            return read_projected_csv(paths[name], specs[name], engine=engine)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{name.capitalize()} file not found: {paths[name]}")
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers or config.LOAD_WORKERS)) as pool:
+        customers, orders, payments = pool.map(read, ["customers", "orders", "payments"])
+    
+    return customers, orders, payments
+
+
+def file_fingerprints(paths: Dict[str, str]) -> Dict[str, Dict[str, object]]:
+    """
+    Cheap fingerprints (path, size, mtime) of input files.
+    
+    Args:
+        paths: Dataset name to file path
+    
+    Returns:
+        Dataset name to fingerprint dict
+    
+    Raises:
+        FileNotFoundError: If a file doesn't exist
+    """
+    fingerprints = {}
+    for name, path in paths.items():
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{name.capitalize()} file not found: {path}")
+        stat = os.stat(path)
+        fingerprints[name] = {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return fingerprints
@@ -0,0 +1,194 @@
+"""
+Content-addressed on-disk memo of pipeline stage outputs.
+
+Each stage output is stored under a key hashing the stage name and its
+inputs: parameters, source file fingerprints and the content digests of the
+upstream stage outputs it reads. A stage whose inputs didn't change is read
+back instead of recomputed; since downstream keys use upstream *content*
+digests, a rerun upstream stage producing the same output (e.g. a touched
+but unchanged file) still lets every downstream stage hit.
+
+Entries are directories of parquet frames plus a meta.json. The store is
+kept under max_bytes by deleting the least recently used entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+
+META_FILE = "meta.json"
+
+StageOutput = Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]
+
+
+@dataclass
+class StageResult:
+    """Output of a stage run, computed or read from the memo."""
+    frames: Dict[str, pd.DataFrame]
+    meta: Dict[str, Any]
+    digest: str     # content hash of the output ("" when not memoized)
+    hit: bool
+
+
+def stage_key(stage: str, inputs: Dict[str, Any]) -> str:
+    """Hash a stage name and its JSON-serializable inputs."""
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def content_digest(frames: Dict[str, pd.DataFrame], meta: Dict[str, Any]) -> str:
+    """Hash the content of a stage output (row values, columns and meta)."""
+    h = hashlib.sha256()
+    for name in sorted(frames):
+        frame = frames[name]
+        h.update(name.encode())
+        h.update(json.dumps([str(c) for c in frame.columns]).encode())
+        h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    h.update(json.dumps(meta, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:32]
+
+
+class MemoStore:
+    """Directory of memoized stage outputs with size-bounded LRU eviction."""
+    
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Args:
+            root: Memo directory (created on first write)
+            max_bytes: Size bound of the store (0 = unbounded)
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+    
+    def get(self, key: str) -> Optional[Tuple[Dict[str, pd.DataFrame], Dict[str, Any], str]]:
+        """
+        Read an entry and mark it recently used.
+        
+        Returns:
+            (frames, meta, digest), or None on a miss or unreadable entry
+        """
+        path = self.root / key
+        try:
+            stored = json.loads((path / META_FILE).read_text())
+            frames = {name: pd.read_parquet(path / f"{name}.parquet") for name in stored["frames"]}
+        except (OSError, ValueError, KeyError):
+            return None
+        # Parquet has no second resolution; restore the datetime units written
+        for name, units in stored.get("datetime_units", {}).items():
+            frames[name] = frames[name].astype(units)
+        os.utime(path / META_FILE)
+        return frames, stored["meta"], stored["digest"]
+    
+    def put(self, key: str, frames: Dict[str, pd.DataFrame], meta: Dict[str, Any], digest: str) -> None:
+        """Write an entry (atomically renamed into place), then enforce the size bound."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        for name, frame in frames.items():
+            frame.to_parquet(tmp / f"{name}.parquet", index=False)
+        stored = {
+            "frames": sorted(frames),
+            "datetime_units": {
+                name: {col: str(dtype) for col, dtype in frame.dtypes.items() if dtype.kind == "M"}
+                for name, frame in frames.items()
+            },
+            "meta": meta,
+            "digest": digest,
+            "created_at": time.time(),
+        }
+        (tmp / META_FILE).write_text(json.dumps(stored, default=str))
+        try:
+            tmp.rename(self.root / key)
+        except OSError:
+            # Written concurrently by another build; keep that one
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+    
+    def _entries(self) -> list[Tuple[float, int, Path]]:
+        """(last used, size in bytes, path) of every entry."""
+        entries = []
+        for path in self.root.iterdir():
+            if path.name.startswith(".") or not path.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append(((path / META_FILE).stat().st_mtime, size, path))
+            except OSError:
+                continue
+        return entries
+    
+    def size(self) -> int:
+        """Total size of the stored entries in bytes."""
+        if not self.root.exists():
+            return 0
+        return sum(size for _, size, _ in self._entries())
+    
+    def evict(self, keep: Optional[str] = None) -> list[str]:
+        """
+        Delete least recently used entries until the store fits max_bytes.
+        
+        Args:
+            keep: Entry never deleted (the one just written)
+        
+        Returns:
+            Deleted keys
+        """
+        if not self.max_bytes or not self.root.exists():
+            return []
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        
+        deleted = []
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.name == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            deleted.append(path.name)
+        return deleted
+
+
+def run_stage(
+    store: Optional[MemoStore],
+    stage: str,
+    inputs: Dict[str, Any],
+    compute: Callable[[], StageOutput]
+) -> StageResult:
+    """
+    Run a pipeline stage through the memo.
+    
+    Args:
+        store: Memo store (None runs the stage without memoizing)
+        stage: Stage name
+        inputs: Everything the output depends on: parameters, file
+            fingerprints and upstream StageResult.digest values
+        compute: Computes (frames, JSON-ready meta)
+    
+    Returns:
+        StageResult
+    """
+    if store is None:
+        frames, meta = compute()
+        return StageResult(frames, meta, digest="", hit=False)
+    
+    key = stage_key(stage, inputs)
+    cached = store.get(key)
+    if cached is not None:
+        return StageResult(*cached, hit=True)
+    
+    frames, meta = compute()
+    digest = content_digest(frames, meta)
+    store.put(key, frames, meta, digest)
+    return StageResult(frames, meta, digest, hit=False)
@@ -0,0 +1,320 @@
+"""
+On-demand profiling for the admin endpoints.
+
+Two profilers are available:
+
+- "sample": a background thread reads the stacks of the profiled threads
+  from sys._current_frames() at a fixed interval and counts them as
+  collapsed stacks ("frame;frame;frame count"), ready for flamegraph tools.
+- "cprofile": deterministic cProfile per profiled thread, merged into one
+  pstats report.
+
+Profiling of live requests is done by temporarily wrapping the WSGI app;
+the wrapper removes itself after N requests, or when the session times out
+or is cancelled, so nothing runs when no profile session is active.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+
+MODES = ("sample", "cprofile")
+
+# Returned by the profiled next() once a response body is exhausted
+_END = object()
+
+
+def collapse_stack(frame) -> str:
+    """Format a frame's stack root-first as "file:function;file:function"."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stacks of registered threads into collapsed-stack counts."""
+    
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._threads: set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def add_thread(self, ident: int) -> None:
+        """Start sampling a thread."""
+        with self._lock:
+            self._threads.add(ident)
+    
+    def remove_thread(self, ident: int) -> None:
+        """Stop sampling a thread."""
+        with self._lock:
+            self._threads.discard(ident)
+    
+    def start(self) -> None:
+        """Start the sampling thread."""
+        self._thread = threading.Thread(target=self._run, name="churnlens-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the sampling thread and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self) -> None:
+        """Sampling loop: one pass over the registered threads per interval."""
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[collapse_stack(frame)] += 1
+                    self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Collapsed stacks, one "stack count" line each, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class ProfileSession:
+    """One profiling run over a block of code or the next N requests."""
+    
+    def __init__(
+        self,
+        mode: str,
+        requests: int = 0,
+        interval: float = 0.005,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            mode: "sample" or "cprofile"
+            requests: Requests to profile (0 when profiling a block)
+            interval: Sampling interval for the "sample" mode
+            timeout: Seconds after which the session finishes even if fewer
+                requests arrived (None = no deadline)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode: {mode!r}")
+        self.mode = mode
+        self.requests = requests
+        self.started_at = time.time()
+        self.finished = threading.Event()
+        self.end_reason: Optional[str] = None   # completed | timeout | cancelled
+        self._on_finish: list[Callable[[], None]] = []
+        self._claimed = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+        self._sampler = StackSampler(interval) if mode == "sample" else None
+        self._stats: Optional[pstats.Stats] = None
+        if self._sampler is not None:
+            self._sampler.start()
+        self._timer: Optional[threading.Timer] = None
+        if timeout is not None:
+            self._timer = threading.Timer(timeout, self.finish, kwargs={"reason": "timeout"})
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def on_finish(self, callback: Callable[[], None]) -> None:
+        """Register a callback run once when the session finishes (now if it has)."""
+        with self._lock:
+            if self.end_reason is None:
+                self._on_finish.append(callback)
+                return
+        callback()
+    
+    def claim(self) -> bool:
+        """Reserve one of the session's request slots."""
+        with self._lock:
+            if self.finished.is_set() or self._claimed >= self.requests:
+                return False
+            self._claimed += 1
+            return True
+    
+    def profile(self, func: Callable[[], Any]) -> Any:
+        """Run func in the current thread under the session's profiler."""
+        if self._sampler is not None:
+            ident = threading.get_ident()
+            self._sampler.add_thread(ident)
+            try:
+                return func()
+            finally:
+                self._sampler.remove_thread(ident)
+    
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func)
+        finally:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+    
+    def request_done(self) -> None:
+        """Count a profiled request; the session finishes after the last one."""
+        with self._lock:
+            self._completed += 1
+            done = self._completed >= self.requests
+        if done:
+            self.finish()
+    
+    def finish(self, reason: str = "completed") -> None:
+        """Stop sampling, mark the session finished and run the callbacks (once)."""
+        with self._lock:
+            if self.end_reason is not None:
+                return
+            self.end_reason = reason
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.finished.set()
+        for callback in self._on_finish:
+            callback()
+    
+    def status(self) -> Dict[str, Any]:
+        """Progress of the session."""
+        return {
+            "mode": self.mode,
+            "requests": self.requests,
+            "profiled": self._completed,
+            "finished": self.finished.is_set(),
+            "end_reason": self.end_reason,
+        }
+    
+    def report(self) -> str:
+        """Collapsed stacks ("sample") or a pstats listing ("cprofile")."""
+        if self._sampler is not None:
+            return self._sampler.collapsed()
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats("cumulative").print_stats(50)
+        return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """WSGI wrapper profiling requests for a session, then uninstalling itself."""
+    
+    def __init__(self, app, session: ProfileSession, skip_prefix: str = "/admin"):
+        """
+        Args:
+            app: Flask app whose wsgi_app is wrapped
+            session: Session collecting the profiles
+            skip_prefix: Paths not profiled (the admin endpoints themselves)
+        """
+        self.app = app
+        self.wrapped = app.wsgi_app
+        self.session = session
+        self.skip_prefix = skip_prefix
+    
+    def install(self) -> None:
+        """Start profiling the app's requests."""
+        self.app.wsgi_app = self
+    
+    def uninstall(self) -> None:
+        """Restore the original WSGI app."""
+        if self.app.wsgi_app is self:
+            self.app.wsgi_app = self.wrapped
+    
+    def __call__(self, environ, start_response):
+        """Serve a request, profiling it if the session has slots left."""
+        if environ.get("PATH_INFO", "").startswith(self.skip_prefix) or not self.session.claim():
+            return self.wrapped(environ, start_response)
+        
+        try:
+            body = self.session.profile(lambda: self.wrapped(environ, start_response))
+        except BaseException:
+            self.session.request_done()
+            raise
+        return self._profiled_body(body)
+    
+    def _profiled_body(self, body):
+        """
+        Stream the response body, producing each chunk under the profiler.
+        
+        Chunks are passed on as they come, so streamed responses stay
+        streamed; the request counts as done once the body is exhausted or
+        closed.
+        """
+        iterator = iter(body)
+        try:
+            while True:
+                chunk = self.session.profile(lambda: next(iterator, _END))
+                if chunk is _END:
+                    break
+                yield chunk
+        finally:
+            try:
+                if hasattr(body, "close"):
+                    body.close()
+            finally:
+                self.session.request_done()
+
+
+_lock = threading.Lock()
+_session: Optional[ProfileSession] = None
+
+
+def start_request_profile(
+    app,
+    mode: str,
+    requests: int,
+    interval: float = 0.005,
+    timeout: Optional[float] = None
+) -> ProfileSession:
+    """
+    Profile the next `requests` requests served by app, for at most
+    `timeout` seconds.
+    
+    Raises:
+        RuntimeError: If a request profile is already running
+    """
+    global _session
+    with _lock:
+        if _session is not None and not _session.finished.is_set():
+            raise RuntimeError("A profile session is already running")
+        _session = ProfileSession(mode, requests=requests, interval=interval, timeout=timeout)
+        middleware = ProfilingMiddleware(app, _session)
+        _session.on_finish(middleware.uninstall)
+        middleware.install()
+        return _session
+
+
+def current_session() -> Optional[ProfileSession]:
+    """Latest request profile session, if any."""
+    return _session
+
+
+def profile_call(func: Callable[[], Any], mode: str, interval: float = 0.005) -> str:
+    """Run func under a profiler and return the report."""
+    session = ProfileSession(mode, interval=interval)
+    try:
+        session.profile(func)
+    finally:
+        session.finish()
+    return session.report()
@@ -0,0 +1,118 @@
+"""Named datasets served by one process, with a shared snapshot memory budget."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app import config
+from app.services import InvalidRequest
+from app.services.data_service import DataService, data_service, memory_usage
+
+
+class DatasetRegistry:
+    """
+    One DataService per dataset, evicting least recently used snapshots.
+    
+    Every published snapshot is admitted here. When the measured size of all
+    cached snapshots exceeds the budget, snapshots of the least recently used
+    datasets are dropped (never the one just admitted); they are rebuilt on
+    their next request.
+    """
+    
+    def __init__(self, default: DataService, budget_bytes: int = 0):
+        """
+        Args:
+            default: Service for the default dataset
+            budget_bytes: Memory budget for cached snapshots (0 = unlimited)
+        """
+        self.budget_bytes = budget_bytes
+        self._services: Dict[str, DataService] = {}
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.register(default)
+    
+    def register(self, service: DataService) -> DataService:
+        """Add a dataset service (replacing one with the same name)."""
+        service.registry = self
+        with self._lock:
+            self._services[service.name] = service
+        return service
+    
+    def names(self) -> list[str]:
+        """Registered dataset names."""
+        return list(self._services)
+    
+    def get(self, name: Optional[str] = None) -> DataService:
+        """
+        Get the service of a dataset and mark it as recently used.
+    
+        Args:
+            name: Dataset name (defaults to config.DEFAULT_DATASET)
+    
+        Returns:
+            DataService for the dataset
+    
+        Raises:
+            InvalidRequest: If the dataset is not registered
+        """
+        name = name or config.DEFAULT_DATASET
+        service = self._services.get(name)
+        if service is None:
+            raise InvalidRequest(f"Unknown dataset: {name!r}")
+        with self._lock:
+            if name in self._recent:
+                self._recent.move_to_end(name)
+        return service
+    
+    def admit(self, service: DataService) -> None:
+        """
+        Account a newly published snapshot and evict others over budget.
+    
+        Resident snapshots are re-measured here, so aggregates cached since
+        they were admitted are counted too.
+    
+        Args:
+            service: Service that just published a snapshot
+        """
+        with self._lock:
+            self._recent[service.name] = None
+            self._recent.move_to_end(service.name)
+            for name in list(self._recent):
+                snapshot = self._services[name]._snapshot
+                if snapshot is None:
+                    self._recent.pop(name)
+                    self._sizes.pop(name, None)
+                else:
+                    self._sizes[name] = memory_usage(snapshot)
+    
+            if not self.budget_bytes:
+                return
+            for name in list(self._recent):
+                if sum(self._sizes.values()) <= self.budget_bytes or name == service.name:
+                    break
+                self._services[name].evict()
+                self._recent.pop(name)
+                self._sizes.pop(name)
+    
+    def usage(self) -> dict:
+        """Report measured snapshot sizes per dataset, in LRU order."""
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": sum(self._sizes.values()),
+                "datasets": {name: self._sizes[name] for name in self._recent},
+            }
+
+
+def build_registry() -> DatasetRegistry:
+    """Create the registry from config: default dataset plus config.DATASETS."""
+    registry = DatasetRegistry(data_service, budget_bytes=config.SNAPSHOT_MEMORY_BUDGET_MB * 1024 * 1024)
+    for name, data_dir in config.DATASETS.items():
+        registry.register(DataService(data_dir=data_dir, name=name))
+    return registry
+
+
+# Global registry
+registry = build_registry()
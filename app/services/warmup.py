@@ -0,0 +1,86 @@
+"""Background cache warmup and readiness tracking."""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_state: Dict[str, Any] = {
+    "status": "idle",
+    "error": None,
+    "duration_seconds": None,
+}
+
+
+def start_warmup() -> bool:
+    """
+    Build the features cache in a background thread.
+    
+    Returns:
+        True if a warmup was started, False if one is already running
+    """
+    global _thread
+    
+    with _lock:
+        if _state["status"] == "running":
+            return False
+        _state.update(status="running", error=None, duration_seconds=None)
+        _thread = threading.Thread(target=_run, name="churnlens-warmup", daemon=True)
+        _thread.start()
+    
+    return True
+
+
+def _run() -> None:
+    """Warmup thread body: run the pipeline once and record the outcome."""
+    from app.services import get_data_service
+    
+    start = time.perf_counter()
+    try:
+        get_data_service().get_features()
+    except Exception as e:
+        status, error = "failed", str(e)
+    else:
+        status, error = "ready", None
+    
+    with _lock:
+        _state.update(
+            status=status,
+            error=error,
+            duration_seconds=round(time.perf_counter() - start, 3)
+        )
+
+
+def disable_warmup() -> None:
+    """Mark warmup as disabled (cache is built lazily on first request)."""
+    with _lock:
+        _state.update(status="disabled", error=None, duration_seconds=None)
+
+
+def is_ready() -> bool:
+    """
+    Check whether the app can serve data requests without a cold build.
+    
+    With warmup disabled the app is always considered ready, since the first
+    request builds the cache as before.
+    """
+    with _lock:
+        if _state["status"] in ("ready", "disabled"):
+            return True
+    
+    # Only consult the service if something already imported it: readiness
+    # probes must not trigger the pandas import themselves.
+    module = sys.modules.get("app.services.data_service")
+    return module is not None and module.data_service.is_warm()
+
+
+def warmup_status() -> Dict[str, Any]:
+    """Get a copy of the warmup state plus the readiness flag."""
+    with _lock:
+        state = dict(_state)
+    state["ready"] = is_ready()
+    return state
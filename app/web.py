@@ -1,9 +1,9 @@
 """Web routes for rendering templates."""
 from __future__ import annotations
 
-from flask import Blueprint, render_template
+from flask import Blueprint, g, render_template, request
 
-from app.services.data_service import data_service
+from app.services import get_data_service, warmup
 
 
 web = Blueprint("web", __name__)
@@ -13,13 +13,26 @@ web = Blueprint("web", __name__)
 def dashboard():
     """Render main dashboard page."""
     try:
-        kpis = data_service.get_kpis()
-        return render_template("dashboard.html", kpis=kpis)
+        kpis = get_data_service().get_kpis()
+        return render_template("dashboard.html", kpis=kpis, base=_dataset_prefix())
     except Exception as e:
-        return render_template("error.html", error=str(e)), 500
+        return render_template("error.html", error=str(e), base=_dataset_prefix()), 500
+
+
+def _dataset_prefix() -> str:
+    """URL prefix of the dataset being served ("" for the default one)."""
+    dataset = g.get("dataset") or request.args.get("dataset")
+    return f"/d/{dataset}" if dataset else ""
 
 
 @web.route("/health")
 def health():
-    """Health check endpoint."""
+    """Health check endpoint (liveness)."""
     return {"status": "ok"}, 200
+
+
+@web.route("/ready")
+def ready():
+    """Readiness check: 200 once the features cache is built."""
+    state = warmup.warmup_status()
+    return state, 200 if state["ready"] else 503
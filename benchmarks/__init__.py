@@ -0,0 +1 @@
+"""Benchmarks and load-test tooling (not shipped with the app image)."""
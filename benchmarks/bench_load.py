@@ -0,0 +1,107 @@
+"""
+Benchmark raw CSV loading: legacy full reads vs. column-pruned parallel reads.
+
+Each variant runs in a fresh subprocess so peak RSS is measured in isolation.
+
+Usage:
+    python -m benchmarks.bench_load [--orders N] [--repeat R] [--data-dir DIR]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+VARIANTS = ["legacy", "pruned-c", "pruned-pyarrow"]
+
+
+def _paths(data_dir: Path) -> dict:
+    return {
+        "customers": str(data_dir / "olist_customers_dataset.csv"),
+        "orders": str(data_dir / "olist_orders_dataset.csv"),
+        "payments": str(data_dir / "olist_order_payments_dataset.csv"),
+    }
+
+
+def _load_legacy(paths: dict):
+    """Sequential full-width reads, as DataService did before pruning."""
+    import pandas as pd
+
+    customers = pd.read_csv(
+        paths["customers"], dtype={"customer_id": "string", "customer_unique_id": "string"}
+    )
+    orders = pd.read_csv(
+        paths["orders"],
+        dtype={"order_id": "string", "customer_id": "string", "order_status": "string"},
+        parse_dates=["order_purchase_timestamp"],
+    )
+    payments = pd.read_csv(paths["payments"], dtype={"order_id": "string", "payment_type": "string"})
+    return customers, orders, payments
+
+
+def run_variant(variant: str, data_dir: Path, repeat: int) -> dict:
+    """Time one variant in this process and report frame memory and peak RSS."""
+    import pandas as pd  # noqa: F401  (import cost excluded from timings)
+
+    from app import config
+    from app.services import loader
+
+    paths = _paths(data_dir)
+    if variant == "legacy":
+        load = lambda: _load_legacy(paths)  # noqa: E731
+    else:
+        config.CSV_ENGINE = variant.split("-", 1)[1]
+        load = lambda: loader.load_datasets(paths)  # noqa: E731
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = load()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "variant": variant,
+        "best_seconds": round(min(timings), 4),
+        "frames_mb": round(sum(f.memory_usage(deep=True).sum() for f in frames) / 2**20, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, help="Existing Olist CSV directory (default: synthetic)")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.data_dir, args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from benchmarks.synthetic import write_dataset
+            data_dir = Path(tmp)
+            write_dataset(data_dir, n_orders=args.orders)
+
+        print(f"{'variant':<16}{'best (s)':>10}{'frames (MB)':>14}{'peak RSS (MB)':>16}")
+        for variant in VARIANTS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_load", "--variant", variant,
+                 "--data-dir", str(data_dir), "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True
+            )
+            r = json.loads(out.stdout)
+            print(f"{r['variant']:<16}{r['best_seconds']:>10}{r['frames_mb']:>14}{r['peak_rss_mb']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark the payments stage: legacy groupby aggregation vs. the bincount pass.
+
+"legacy" is aggregate_payments_by_order as it was before the payment mix
+features (groupby on order_id, a second groupby on (order_id, payment_type)
+and a sort for the primary type), followed by compute_customer_features.
+"bincount" is the current aggregate_payments_by_order, which also produces
+the per-order payment mix, followed by compute_customer_features with the
+per-customer payment features. "groupby-features" derives the same payment
+features with per-customer groupbys and a pivot, for comparison.
+
+Usage:
+    python -m benchmarks.bench_payments [--orders N] [--repeat R] [--data-dir DIR]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.core import pipeline, validation
+from app.services import loader
+
+
+def legacy_aggregate(payments: pd.DataFrame) -> pd.DataFrame:
+    """aggregate_payments_by_order before the bincount rewrite."""
+    agg = payments.groupby("order_id", as_index=False)["payment_value"].sum()
+    by_type = payments.groupby(["order_id", "payment_type"], as_index=False, observed=True)["payment_value"].sum()
+    primary = (
+        by_type.sort_values("payment_value", ascending=False, kind="stable")
+        .drop_duplicates(subset=["order_id"])
+        [["order_id", "payment_type"]]
+    )
+    return agg.merge(primary, on="order_id", how="left")
+
+
+def groupby_payment_features(payments: pd.DataFrame, orders: pd.DataFrame) -> pd.DataFrame:
+    """The same per-customer payment features with groupbys and a pivot."""
+    df = payments.merge(orders[["order_id", "customer_unique_id"]], on="order_id")
+    df["payment_installments"] = pd.to_numeric(df["payment_installments"], errors="coerce")
+    g = df.groupby("customer_unique_id", observed=True)
+    spend = df.pivot_table(
+        index="customer_unique_id", columns="payment_type", values="payment_value",
+        aggfunc="sum", fill_value=0.0, observed=True
+    )
+    total = spend.sum(axis=1).replace(0, np.nan)
+    out = pd.DataFrame({
+        "avg_installments": g["payment_installments"].mean(),
+        "payment_methods": g["payment_type"].nunique(),
+    })
+    for name in pipeline.PAYMENT_SHARE_TYPES:
+        column = spend[name] if name in spend.columns else 0.0
+        out[f"{name}_share"] = (column / total).fillna(0.0)
+    return out
+
+
+def _best(func, repeat: int) -> tuple[float, object]:
+    """Best wall time of func over repeat runs, and its last result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run(data_dir: Path, repeat: int) -> None:
+    """Time the variants on one dataset and check they agree."""
+    customers, orders, payments = loader.load_datasets({
+        "customers": str(data_dir / config.DATA_FILES["customers"]),
+        "orders": str(data_dir / config.DATA_FILES["orders"]),
+        "payments": str(data_dir / config.DATA_FILES["payments"]),
+    })
+    orders_clean, _ = validation.check_order_rows(orders, config.VALID_STATUS)
+    payments_clean, _ = validation.check_payment_rows(payments)
+
+    def features(aggregate):
+        joined = pipeline.join_datasets(orders_clean, customers, aggregate(payments_clean))
+        return joined, pipeline.compute_customer_features(joined, joined["order_purchase_timestamp"].max())
+
+    legacy_s, (legacy_joined, legacy) = _best(lambda: features(legacy_aggregate), repeat)
+    agg_legacy_s, _ = _best(lambda: legacy_aggregate(payments_clean), repeat)
+    new_s, (joined, current) = _best(lambda: features(pipeline.aggregate_payments_by_order), repeat)
+    agg_new_s, _ = _best(lambda: pipeline.aggregate_payments_by_order(payments_clean), repeat)
+    groupby_s, reference = _best(lambda: groupby_payment_features(payments_clean, legacy_joined), repeat)
+
+    # Same RFM features and primary payment type; same payment features
+    np.testing.assert_allclose(current["monetary"], legacy["monetary"])
+    assert (current["payment_type"].astype(object) == legacy["payment_type"].astype(object)).all()
+    reference = reference.reindex(current["customer_unique_id"])
+    for col in reference.columns:
+        np.testing.assert_allclose(current[col].to_numpy(dtype="float64"), reference[col].to_numpy(dtype="float64"))
+
+    print(f"{len(payments_clean)} payments, {len(joined)} orders, {len(current)} customers")
+    print(f"{'variant':<34}{'best (s)':>10}")
+    print(f"{'legacy aggregate':<34}{agg_legacy_s:>10.4f}")
+    print(f"{'bincount aggregate (+ mix)':<34}{agg_new_s:>10.4f}")
+    print(f"{'legacy aggregate + features':<34}{legacy_s:>10.4f}")
+    print(f"{'bincount aggregate + features':<34}{new_s:>10.4f}")
+    print(f"{'groupby/pivot payment features':<34}{groupby_s:>10.4f}")
+
+
+def main() -> None:
+    """Time the variants on a synthetic (or given) dataset and print the table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, help="Existing Olist CSV directory (default: synthetic)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from benchmarks.synthetic import write_dataset
+            data_dir = Path(tmp)
+            write_dataset(data_dir, n_orders=args.orders)
+        run(data_dir, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+HTTP load test: the app from create_app() under concurrent dashboard traffic.
+
+Starts the app in a subprocess (werkzeug threaded server) over a synthetic
+dataset, waits for /ready, then replays a weighted mix of dashboard requests
+from concurrent clients and reports throughput, latency percentiles, the
+server's peak RSS (VmHWM) over the run and, per endpoint, the highest server
+RSS sampled right after one of its requests completed. Server settings come
+from the environment (CACHE_ENABLED, APPROX_MODE, ...), so serving modes can
+be compared by running the script twice. Export files (and the stage memo,
+when MEMO_DIR is set) go to the run's temporary directory, so every run
+starts cold and nothing is written into the repository.
+
+Usage:
+    python -m benchmarks.loadtest [--orders N] [--concurrency C] [--requests R]
+                                  [--mix "/api/summary=5,/export/customers.csv=1"] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Roughly what one dashboard page view requests (dashboard.js fetches
+# risk_summary for several charts), plus occasional exports
+DEFAULT_MIX = {
+    "/": 1.0,
+    "/api/summary": 1.0,
+    "/api/risk_summary": 4.0,
+    "/api/churn_by_rfm": 2.0,
+    "/api/recency_hist": 2.0,
+    "/api/top_risk": 1.0,
+    "/api/rfm_matrix": 0.5,
+    "/api/cohorts": 0.5,
+    "/api/churn_trend": 0.5,
+    "/export/top_risk.csv": 0.2,
+    "/export/customers.csv": 0.1,
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "path=weight,path=weight" into a request mix."""
+    mix = {}
+    for item in value.split(","):
+        path, _, weight = item.strip().partition("=")
+        mix[path] = float(weight or 1)
+    return mix
+
+
+def serve(data_dir: Path, port: int) -> None:
+    """Server subprocess body: point config at data_dir and serve forever."""
+    from werkzeug.serving import make_server
+
+    from app import config
+    config.DATA_DIR = data_dir
+    config.PATH_CUSTOMERS = str(data_dir / config.DATA_FILES["customers"])
+    config.PATH_ORDERS = str(data_dir / config.DATA_FILES["orders"])
+    config.PATH_PAYMENTS = str(data_dir / config.DATA_FILES["payments"])
+    config.DEBUG = False
+
+    from app import create_app
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+
+def server_env(tmp: Path) -> Dict[str, str]:
+    """Environment of the server subprocess, with its caches under tmp."""
+    env = {
+        **os.environ,
+        "WARMUP_ON_STARTUP": os.environ.get("WARMUP_ON_STARTUP", "True"),
+        "EXPORT_DIR": str(tmp / "exports"),
+    }
+    if os.environ.get("MEMO_DIR"):
+        env["MEMO_DIR"] = str(tmp / "memo")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pid: int, field: str = "VmRSS") -> Optional[float]:
+    """Resident set size (or VmHWM peak) of a process from /proc, in MB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _get(url: str, timeout: float) -> int:
+    """GET a URL, read the whole body and return the status code."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_ready(base_url: str, timeout: float) -> float:
+    """Poll /ready until it returns 200; returns the seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if _get(base_url + "/ready", timeout=5) == 200:
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def run_load(
+    base_url: str,
+    server_pid: int,
+    mix: Dict[str, float],
+    concurrency: int,
+    n_requests: int,
+    seed: int = 0,
+    timeout: float = 60.0
+) -> dict:
+    """
+    Replay the request mix and collect per-endpoint statistics.
+
+    Args:
+        base_url: Server URL
+        server_pid: Server process ID (for RSS sampling)
+        mix: Path to relative weight
+        concurrency: Concurrent clients
+        n_requests: Total requests
+        seed: Seed of the request sequence
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Dict with overall throughput and per-endpoint results
+    """
+    rng = random.Random(seed)
+    paths = rng.choices(list(mix), weights=list(mix.values()), k=n_requests)
+
+    lock = threading.Lock()
+    latencies: Dict[str, List[float]] = {path: [] for path in mix}
+    errors: Dict[str, int] = {path: 0 for path in mix}
+    rss_after: Dict[str, float] = {path: 0.0 for path in mix}   # max RSS seen after a request
+
+    def request(path: str) -> None:
+        start = time.perf_counter()
+        try:
+            ok = _get(base_url + path, timeout) < 400
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            ok = False
+        elapsed = time.perf_counter() - start
+        rss = _rss_mb(server_pid) or 0.0
+        with lock:
+            latencies[path].append(elapsed)
+            errors[path] += not ok
+            rss_after[path] = max(rss_after[path], rss)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(request, paths))
+    wall = time.perf_counter() - start
+
+    endpoints = []
+    for path in mix:
+        times = np.array(latencies[path]) * 1000
+        if not len(times):
+            continue
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        endpoints.append({
+            "path": path,
+            "requests": len(times),
+            "errors": errors[path],
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "max_rss_after_mb": round(rss_after[path], 1),
+        })
+
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(n_requests / wall, 1),
+        "server_peak_rss_mb": round(_rss_mb(server_pid, "VmHWM") or 0.0, 1),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the load test result as a table."""
+    print(
+        f"{result['requests']} requests, concurrency {result['concurrency']}: "
+        f"{result['throughput_rps']} req/s, startup {result['startup_seconds']}s, "
+        f"server peak RSS {result['server_peak_rss_mb']} MB"
+    )
+    print(f"{'endpoint':<26}{'reqs':>6}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS after':>11}")
+    for r in result["endpoints"]:
+        print(
+            f"{r['path']:<26}{r['requests']:>6}{r['errors']:>6}{r['p50_ms']:>9}"
+            f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_rss_after_mb']:>11}"
+        )
+
+
+def main() -> None:
+    """Start the server over the dataset, run the load and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--data-dir", type=Path, help="Existing Olist CSV directory (default: synthetic)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="path=weight,... (default: dashboard mix)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.data_dir, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            from benchmarks.synthetic import write_dataset
+            data_dir = Path(tmp)
+            write_dataset(data_dir, n_orders=args.orders)
+
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.loadtest", "--serve", "--data-dir", str(data_dir), "--port", str(port)],
+            env=server_env(Path(tmp)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            startup = wait_ready(base_url, args.ready_timeout)
+            result = run_load(base_url, server.pid, args.mix, args.concurrency, args.requests, seed=args.seed)
+            result["startup_seconds"] = round(startup, 2)
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
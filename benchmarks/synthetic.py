@@ -0,0 +1,110 @@
+"""
+Synthetic Olist-shaped dataset generator for benchmarks.
+
+Writes the three CSVs the app reads, with every column of the real Olist
+files, so loading and pipeline benchmarks exercise realistic widths.
+
+Usage:
+    python -m benchmarks.synthetic OUTPUT_DIR [--orders N] [--seed S]
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+STATES = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "DF", "ES", "GO", "PE", "CE"]
+STATUSES = ["delivered"] * 97 + ["shipped", "canceled", "unavailable"]
+PAYMENT_TYPES = ["credit_card"] * 74 + ["boleto"] * 19 + ["voucher"] * 5 + ["debit_card"] * 2
+
+
+def _hex_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random 32-char hex IDs like Olist's."""
+    hi = rng.integers(0, 2**63, n, dtype=np.int64)
+    lo = rng.integers(0, 2**63, n, dtype=np.int64)
+    return np.char.add(np.char.mod("%016x", hi), np.char.mod("%016x", lo))
+
+
+def write_dataset(output_dir: Path, n_orders: int = 100_000, seed: int = 42) -> dict:
+    """
+    Write customers, orders and payments CSVs.
+
+    Args:
+        output_dir: Directory to write into (created if missing)
+        n_orders: Number of orders (customers and payments scale with it)
+        seed: Random seed
+
+    Returns:
+        Dict of dataset name to written path
+    """
+    rng = np.random.default_rng(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # One customer_id per order, ~3% of unique customers buy again
+    n_unique = int(n_orders * 0.97)
+    unique_ids = _hex_ids(rng, n_unique)
+    customer_unique = unique_ids[np.concatenate([
+        np.arange(n_unique), rng.integers(0, n_unique, n_orders - n_unique)
+    ])]
+    customer_ids = _hex_ids(rng, n_orders)
+
+    customers = pd.DataFrame({
+        "customer_id": customer_ids,
+        "customer_unique_id": customer_unique,
+        "customer_zip_code_prefix": rng.integers(1000, 99999, n_orders),
+        "customer_city": rng.choice(["sao paulo", "rio de janeiro", "belo horizonte", "curitiba"], n_orders),
+        "customer_state": rng.choice(STATES, n_orders),
+    })
+
+    purchase = pd.Timestamp("2016-09-04") + pd.to_timedelta(
+        rng.integers(0, 725 * 86_400, n_orders), unit="s"
+    )
+    orders = pd.DataFrame({
+        "order_id": _hex_ids(rng, n_orders),
+        "customer_id": rng.permutation(customer_ids),
+        "order_status": rng.choice(STATUSES, n_orders),
+        "order_purchase_timestamp": purchase,
+        "order_approved_at": purchase + pd.Timedelta(hours=1),
+        "order_delivered_carrier_date": purchase + pd.Timedelta(days=2),
+        "order_delivered_customer_date": purchase + pd.Timedelta(days=8),
+        "order_estimated_delivery_date": (purchase + pd.Timedelta(days=20)).normalize(),
+    })
+
+    # ~4% of orders are split across a second payment (often a voucher)
+    extra = rng.random(n_orders) < 0.04
+    pay_orders = np.concatenate([orders["order_id"].to_numpy(), orders["order_id"].to_numpy()[extra]])
+    payments = pd.DataFrame({
+        "order_id": pay_orders,
+        "payment_sequential": np.concatenate([np.ones(n_orders, dtype=int), np.full(extra.sum(), 2)]),
+        "payment_type": rng.choice(PAYMENT_TYPES, len(pay_orders)),
+        "payment_installments": rng.integers(1, 11, len(pay_orders)),
+        "payment_value": np.round(rng.gamma(2.0, 80.0, len(pay_orders)), 2),
+    })
+
+    paths = {
+        "customers": output_dir / "olist_customers_dataset.csv",
+        "orders": output_dir / "olist_orders_dataset.csv",
+        "payments": output_dir / "olist_order_payments_dataset.csv",
+    }
+    customers.to_csv(paths["customers"], index=False)
+    orders.to_csv(paths["orders"], index=False)
+    payments.to_csv(paths["payments"], index=False)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for name, path in write_dataset(args.output_dir, args.orders, args.seed).items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
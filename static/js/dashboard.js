@@ -7,6 +7,9 @@
 // Constantes e Globais
 // ==========================================
 
+// Prefixo do dataset (/d/<dataset>) quando o dashboard não é o padrão
+const BASE_URL = window.CHURNLENS_BASE || '';
+
 // Cores para segmentos de risco
 const RISK_COLORS = {
     'Risco baixo': '#22c55e',          // Green-500
@@ -121,7 +124,7 @@ document.addEventListener('DOMContentLoaded', async function () {
 
 async function renderRiskAnalysis() {
     try {
-        const response = await fetch('/api/risk_summary');
+        const response = await fetch(BASE_URL + '/api/risk_summary');
         if (!response.ok) throw new Error('Falha ao buscar dados de risco');
 
         let data = await response.json();
@@ -360,7 +363,7 @@ async function renderRFMChart() {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/churn_by_rfm');
+        const response = await fetch(BASE_URL + '/api/churn_by_rfm');
         if (!response.ok) throw new Error('Falha na API RFM');
         const data = await response.json();
 
@@ -442,7 +445,7 @@ async function renderRecencyChart() {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/recency_hist');
+        const response = await fetch(BASE_URL + '/api/recency_hist');
         if (!response.ok) throw new Error('Falha na API Recência');
         const data = await response.json();
 
@@ -512,7 +515,7 @@ async function loadTopRiskTable() {
     if (!tableBody) return;
 
     try {
-        const response = await fetch('/api/top_risk');
+        const response = await fetch(BASE_URL + '/api/top_risk');
         const data = await response.json();
 
         tableBody.innerHTML = '';
@@ -583,7 +586,7 @@ window.expandChartRFM = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/churn_by_rfm');
+        const response = await fetch(BASE_URL + '/api/churn_by_rfm');
         const data = await response.json();
         data.sort((a, b) => a.RFM_score - b.RFM_score);
 
@@ -655,7 +658,7 @@ window.expandChartRecency = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/recency_hist');
+        const response = await fetch(BASE_URL + '/api/recency_hist');
         const data = await response.json();
 
         let labels = [], values = [];
@@ -706,7 +709,7 @@ window.expandRiskDistribution = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/risk_summary');
+        const response = await fetch(BASE_URL + '/api/risk_summary');
         let data = await response.json();
         data.sort((a, b) => {
             const idxA = RISK_ORDER.indexOf(a.risk_segment);
@@ -755,7 +758,7 @@ window.expandRiskChurnRate = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/risk_summary');
+        const response = await fetch(BASE_URL + '/api/risk_summary');
         let data = await response.json();
         data.sort((a, b) => {
             const idxA = RISK_ORDER.indexOf(a.risk_segment);
@@ -812,7 +815,7 @@ window.expandRiskMonetary = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/risk_summary');
+        const response = await fetch(BASE_URL + '/api/risk_summary');
         let data = await response.json();
         data.sort((a, b) => {
             const idxA = RISK_ORDER.indexOf(a.risk_segment);
@@ -868,7 +871,7 @@ window.expandRiskFunnel = async function () {
     if (!canvas) return;
 
     try {
-        const response = await fetch('/api/risk_summary');
+        const response = await fetch(BASE_URL + '/api/risk_summary');
         let data = await response.json();
         data.sort((a, b) => {
             const idxA = RISK_ORDER.indexOf(a.risk_segment);
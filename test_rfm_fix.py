@@ -5,7 +5,7 @@ from app.services.data_service import data_service
 app = create_app()
 with app.app_context():
     # Limpar cache para recarregar com novo cálculo
-    data_service._features = None
+    data_service._snapshot = None
     
     # Verificar os scores RFM (get_features retorna tupla)
     features, as_of_date = data_service.get_features()
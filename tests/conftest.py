@@ -0,0 +1,73 @@
+"""Shared fixtures: a tiny Olist-shaped dataset on disk."""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import config
+
+
+@pytest.fixture
+def olist_dir(tmp_path, monkeypatch):
+    """Write small customers/orders/payments CSVs and point config at them."""
+    customers = pd.DataFrame({
+        "customer_id": ["k1", "k2", "k3", "k4", "k5", "k6"],
+        "customer_unique_id": ["u1", "u2", "u2", "u3", "u4", "u5"],
+        "customer_zip_code_prefix": [1001, 1002, 1003, 1004, 1005, 1006],
+        "customer_city": ["sao paulo", "rio", "rio", "curitiba", "recife", "natal"],
+        "customer_state": ["SP", "RJ", "RJ", "PR", "PE", "RN"],
+    })
+    orders = pd.DataFrame({
+        "order_id": ["o1", "o2", "o3", "o4", "o5", "o6", "o7"],
+        "customer_id": ["k1", "k2", "k3", "k4", "k5", "k6", "k1"],
+        "order_status": ["delivered", "delivered", "delivered", "delivered",
+                         "canceled", "delivered", "delivered"],
+        "order_purchase_timestamp": [
+            "2017-01-10 10:00:00", "2017-03-05 12:00:00", "2017-11-20 08:30:00",
+            "2017-06-15 18:00:00", "2017-07-01 09:00:00", "2018-02-01 14:00:00",
+            "2018-03-01 11:00:00",
+        ],
+        "order_approved_at": [""] * 7,
+        "order_delivered_carrier_date": [""] * 7,
+        "order_delivered_customer_date": [""] * 7,
+        "order_estimated_delivery_date": [""] * 7,
+    })
+    payments = pd.DataFrame({
+        "order_id": ["o1", "o2", "o2", "o3", "o4", "o5", "o6", "o7"],
+        "payment_sequential": [1, 1, 2, 1, 1, 1, 1, 1],
+        "payment_type": ["credit_card", "credit_card", "voucher", "boleto",
+                         "credit_card", "boleto", "debit_card", "credit_card"],
+        "payment_installments": [1, 3, 1, 1, 2, 1, 1, 6],
+        "payment_value": [100.0, 150.0, 50.0, 80.0, 300.0, 40.0, 25.0, 120.0],
+    })
+    
+    paths = {
+        "PATH_CUSTOMERS": tmp_path / "olist_customers_dataset.csv",
+        "PATH_ORDERS": tmp_path / "olist_orders_dataset.csv",
+        "PATH_PAYMENTS": tmp_path / "olist_order_payments_dataset.csv",
+    }
+    customers.to_csv(paths["PATH_CUSTOMERS"], index=False)
+    orders.to_csv(paths["PATH_ORDERS"], index=False)
+    payments.to_csv(paths["PATH_PAYMENTS"], index=False)
+    
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    for name, path in paths.items():
+        monkeypatch.setattr(config, name, str(path))
+    
+    return tmp_path
+
+
+@pytest.fixture
+def client(olist_dir, monkeypatch):
+    """Flask test client over the tiny dataset, with a cold cache."""
+    from app import create_app
+    from app.services import exports, get_data_service
+    
+    monkeypatch.setattr(config, "WARMUP_ON_STARTUP", False)
+    monkeypatch.setattr(exports, "_queue", exports.ExportQueue(str(olist_dir / "exports"), workers=1, max_files=20))
+    service = get_data_service()
+    service._snapshot = None
+    service._segment_codes = None
+    service._migration = None
+    service._version_hashes.clear()
+    return create_app().test_client()
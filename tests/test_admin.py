@@ -0,0 +1,104 @@
+"""Tests for the token-gated profiling endpoints."""
+from __future__ import annotations
+
+import pytest
+
+from app import config
+
+
+@pytest.fixture
+def admin_client(client, monkeypatch):
+    """Test client with ADMIN_TOKEN configured."""
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "s3cret")
+    return client
+
+
+HEADERS = {"X-Admin-Token": "s3cret"}
+
+
+def test_admin_requires_token(client, monkeypatch):
+    """Test that admin routes are hidden without a token and forbidden with a wrong one."""
+    assert client.post("/admin/profile/refresh").status_code == 404
+    
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/profile/refresh").status_code == 403
+    assert client.post("/admin/profile/refresh", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+
+def test_profile_refresh_returns_collapsed_stacks(admin_client):
+    """Test the sampled refresh profile format."""
+    response = admin_client.post("/admin/profile/refresh?interval_ms=1", headers=HEADERS)
+    
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("data_service.py:build_snapshot" in line for line in lines)
+
+
+def test_profile_next_requests(admin_client):
+    """Test that the next N requests are profiled and the wrapper removes itself."""
+    from app.services.profiler import ProfilingMiddleware
+    
+    app = admin_client.application
+    started = admin_client.post("/admin/profile/requests?mode=cprofile&requests=2", headers=HEADERS)
+    assert started.status_code == 202
+    assert isinstance(app.wsgi_app, ProfilingMiddleware)
+    assert admin_client.get("/admin/profile/requests", headers=HEADERS).status_code == 202
+    
+    admin_client.get("/api/summary")
+    admin_client.get("/api/risk_summary")
+    
+    assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    report = admin_client.get("/admin/profile/requests", headers=HEADERS)
+    assert report.status_code == 200
+    assert "get_risk_summary" in report.get_data(as_text=True)
+
+
+def test_profile_rejects_bad_arguments(admin_client):
+    """Test validation of mode and request count."""
+    assert admin_client.post("/admin/profile/refresh?mode=perf", headers=HEADERS).status_code == 400
+    assert admin_client.post("/admin/profile/requests?requests=0", headers=HEADERS).status_code == 400
+
+
+def test_profiled_requests_keep_streaming(admin_client):
+    """Test that a profiled response body is passed on chunk by chunk."""
+    from app.services.profiler import ProfileSession, ProfilingMiddleware
+    
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return iter([b"a", b"b"])
+    
+    flask_app = admin_client.application
+    flask_app.wsgi_app = app
+    session = ProfileSession("cprofile", requests=1)
+    middleware = ProfilingMiddleware(flask_app, session)
+    body = middleware({"PATH_INFO": "/api/summary"}, lambda status, headers: None)
+    
+    assert not isinstance(body, list)
+    assert next(body) == b"a"
+    assert not session.finished.is_set()
+    assert list(body) == [b"b"]
+    assert session.finished.is_set()
+
+
+def test_profile_requests_timeout_and_cancel(admin_client, monkeypatch):
+    """Test that an idle request profile ends on its deadline or when cancelled."""
+    from app.services import profiler
+    from app.services.profiler import ProfilingMiddleware
+    
+    app = admin_client.application
+    monkeypatch.setattr(config, "PROFILE_REQUESTS_TIMEOUT", 0.05)
+    admin_client.post("/admin/profile/requests?requests=5", headers=HEADERS)
+    session = profiler.current_session()
+    assert session.finished.wait(2)
+    assert session.end_reason == "timeout"
+    assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    
+    monkeypatch.setattr(config, "PROFILE_REQUESTS_TIMEOUT", 60)
+    admin_client.post("/admin/profile/requests?requests=5", headers=HEADERS)
+    cancelled = admin_client.delete("/admin/profile/requests", headers=HEADERS)
+    assert cancelled.get_json()["end_reason"] == "cancelled"
+    assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    assert admin_client.get("/admin/profile/requests", headers=HEADERS).status_code == 200
@@ -0,0 +1,77 @@
+"""Tests for admission control and load shedding."""
+from __future__ import annotations
+
+import threading
+import time
+
+from app.services import admission, get_data_service
+
+
+def test_limiter_queue_and_rejection():
+    """Test slots, the bounded queue and queue timeouts."""
+    limiter = admission.Limiter(concurrency=1, queue_size=1, timeout=0.05)
+    assert limiter.acquire()
+    
+    # Queued caller gives up after the timeout
+    assert not limiter.acquire()
+    
+    # Queued caller gets the slot when it's released
+    threading.Timer(0.01, limiter.release).start()
+    assert limiter.acquire()
+    
+    # Full queue: rejected without waiting
+    limiter.waiting = 1
+    assert not limiter.acquire()
+    limiter.waiting = 0
+    assert limiter.stats()["rejected"] == 2
+
+
+def test_saturated_exports_get_503(client, monkeypatch):
+    """Test that exports beyond the limit are shed while the API still answers."""
+    monkeypatch.setattr(admission, "export_limiter", admission.Limiter(concurrency=0, queue_size=0, timeout=0))
+    
+    response = client.get("/export/top_risk.csv")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/api/summary").status_code == 200
+
+
+def test_export_job_polls_skip_admission(client, monkeypatch):
+    """Test that job status and downloads answer while exports are saturated or building."""
+    job = client.post("/export/jobs?kind=top_risk").get_json()
+    for _ in range(100):
+        if client.get(f"/export/jobs/{job['id']}").get_json()["status"] == "done":
+            break
+        time.sleep(0.05)
+    
+    monkeypatch.setattr(admission, "export_limiter", admission.Limiter(concurrency=0, queue_size=0, timeout=0))
+    # Cold rebuild running as well
+    service = get_data_service()
+    service.evict()
+    service._build_lock.acquire()
+    try:
+        assert client.get("/export/top_risk.csv").status_code == 503
+        assert client.get(f"/export/jobs/{job['id']}").status_code == 200
+        with client.get(f"/export/jobs/{job['id']}/download") as download:
+            assert download.status_code == 200
+    finally:
+        service._build_lock.release()
+
+
+def test_cold_build_sheds_requests(client):
+    """Test 503 + Retry-After while the first build runs, and no slot leaks."""
+    service = get_data_service()
+    service._build_lock.acquire()
+    try:
+        response = client.get("/api/summary")
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert client.get("/export/customers.csv").status_code == 503
+    finally:
+        service._build_lock.release()
+    
+    assert client.get("/api/summary").status_code == 200
+    version = service.get_version()
+    for _ in range(5):
+        assert client.get(f"/export/customers_delta?since={version}").data.startswith(b"change,")
+    assert admission.export_limiter.stats()["active"] == 0
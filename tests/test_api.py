@@ -0,0 +1,302 @@
+"""Tests for JSON API endpoints over a tiny dataset."""
+from __future__ import annotations
+
+import time
+
+from app import config
+
+
+def test_as_of_replays_historical_snapshot(client):
+    """Test that as_of computes KPIs at an earlier point in time."""
+    latest = client.get("/api/summary").get_json()
+    replay = client.get("/api/summary?as_of=2017-06-30").get_json()
+    
+    assert latest["total_customers"] == 4
+    assert replay["as_of_date"] == "2017-06-30"
+    assert replay["total_customers"] == 3  # u5 only buys in 2018
+
+
+def test_as_of_rejects_invalid_values(client):
+    """Test that bad or too-early as_of values are client errors."""
+    assert client.get("/api/summary?as_of=not-a-date").status_code == 400
+    assert client.get("/api/summary?as_of=2010-01-01").status_code == 400
+
+
+def test_customer_lookup(client):
+    """Test single customer lookup and unknown IDs."""
+    response = client.get("/api/customers/u2")
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["customer_unique_id"] == "u2"
+    assert data["frequency"] == 2
+    assert data["last_purchase"] == "2017-11-20 08:30:00"
+    
+    assert client.get("/api/customers/nope").status_code == 404
+
+
+def test_as_of_replay_has_latest_columns(client):
+    """Test that replayed customers carry the same fields as the latest snapshot."""
+    latest = client.get("/api/customers/u2").get_json()
+    replay = client.get("/api/customers/u2?as_of=2018-01-31").get_json()
+    
+    assert list(replay) == list(latest)
+    assert replay["payment_methods"] == 3
+    
+    header = client.get("/export/customers.csv?as_of=2018-01-31").get_data(as_text=True).splitlines()[0]
+    assert header == client.get("/export/customers.csv").get_data(as_text=True).splitlines()[0]
+
+
+def test_customer_batch_lookup(client):
+    """Test batch lookup keeps request order and reports missing IDs."""
+    response = client.post("/api/customers/batch", json={"ids": ["u3", "nope", "u1"]})
+    
+    data = response.get_json()
+    assert [c["customer_unique_id"] for c in data["customers"]] == ["u3", "u1"]
+    assert data["missing"] == ["nope"]
+    
+    assert client.post("/api/customers/batch", json={"ids": "u1"}).status_code == 400
+    assert client.get("/api/customers/batch").status_code == 405
+
+
+def test_data_quality_report(client):
+    """Test that the canceled order shows up as an excluded status."""
+    data = client.get("/api/data_quality").get_json()
+    
+    rules = {v["rule"]: v for v in data["orders"]["violations"]}
+    assert data["orders"]["dropped_rows"] == 1
+    assert rules["excluded_status"]["count"] == 1
+    assert rules["excluded_status"]["sample_keys"] == ["o5"]
+    assert data["payments"]["dropped_rows"] == 0
+
+
+def test_breakdown_by_state_and_payment_type(client):
+    """Test that customer_state and payment_type reach the breakdown."""
+    data = client.get("/api/breakdown?by=customer_state").get_json()
+    
+    by_state = {row["customer_state"]: row["count"] for row in data}
+    assert by_state == {"SP": 1, "RJ": 1, "PR": 1, "RN": 1}
+    
+    data = client.get("/api/breakdown?by=payment_type").get_json()
+    by_type = {row["payment_type"]: row["count"] for row in data}
+    # u1's latest order is o7 (credit_card); u2's latest is o3 (boleto)
+    assert by_type == {"credit_card": 2, "boleto": 1, "debit_card": 1}
+    
+    assert client.get("/api/breakdown?by=zip_code").status_code == 400
+    
+    replay = client.get("/api/breakdown?by=payment_type&as_of=2017-12-31").get_json()
+    assert {row["payment_type"]: row["count"] for row in replay} == {"credit_card": 2, "boleto": 1}
+
+
+def test_segment_migration_after_refresh(client, olist_dir):
+    """Test the segment transition matrix and changed-customer export."""
+    import pandas as pd
+    from app.services import get_data_service
+    
+    assert client.get("/api/summary").status_code == 200
+    assert client.get("/api/segment_migration").status_code == 404
+    
+    # u3 buys again right before the latest order
+    path = olist_dir / "olist_orders_dataset.csv"
+    orders = pd.read_csv(path)
+    orders.loc[len(orders)] = ["o8", "k4", "delivered", "2018-02-28 10:00:00", "", "", "", ""]
+    orders.to_csv(path, index=False)
+    payments = pd.read_csv(olist_dir / "olist_order_payments_dataset.csv")
+    payments.loc[len(payments)] = ["o8", 1, "boleto", 1, 10.0]
+    payments.to_csv(olist_dir / "olist_order_payments_dataset.csv", index=False)
+    get_data_service().get_snapshot(force_refresh=True)
+    
+    data = client.get("/api/segment_migration").get_json()
+    assert data["segments"][-1] == "Ausente"
+    assert data["changed_customers"] == 1
+    assert sum(map(sum, data["matrix"])) == 4
+    
+    csv = client.get("/export/segment_changes.csv").get_data(as_text=True).splitlines()
+    assert csv[0] == "customer_unique_id,previous_segment,current_segment"
+    assert csv[1].startswith("u3,")
+    assert csv[1].endswith(",Risco baixo")
+
+
+def test_customers_delta_since_version(client, olist_dir):
+    """Test that the delta export streams upserts and deletes since a version."""
+    import pandas as pd
+    from app.services import get_data_service
+    
+    full = client.get("/export/customers.csv")
+    since = full.headers["X-Snapshot-Version"]
+    
+    # Nothing changed yet
+    empty = client.get(f"/export/customers_delta?since={since}")
+    assert empty.headers["X-Snapshot-Version"] == since
+    assert len(empty.get_data(as_text=True).splitlines()) == 1
+    
+    # u5 (k6) disappears, u4 (k5) gets a delivered order
+    path = olist_dir / "olist_orders_dataset.csv"
+    orders = pd.read_csv(path)
+    orders = orders[orders["customer_id"] != "k6"]
+    orders.loc[orders["order_id"] == "o5", "order_status"] = "delivered"
+    orders.to_csv(path, index=False)
+    get_data_service().get_snapshot(force_refresh=True)
+    
+    response = client.get(f"/export/customers_delta?since={since}")
+    assert int(response.headers["X-Snapshot-Version"]) > int(since)
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith("change,customer_unique_id,")
+    changes = {line.split(",")[1]: line.split(",")[0] for line in lines[1:]}
+    assert changes["u4"] == "upsert"
+    assert changes["u5"] == "delete"
+    
+    assert client.get("/export/customers_delta?since=999").status_code == 400
+    assert client.get("/export/customers_delta").status_code == 400
+
+
+def test_customers_delta_upserts_churn_flips(client, olist_dir, monkeypatch):
+    """Test that a churn flip caused by a later as_of is upserted."""
+    import pandas as pd
+    from app.services import get_data_service
+    
+    since = client.get("/export/customers.csv").headers["X-Snapshot-Version"]
+    
+    # u1 (k1) buys a month after every other order: as_of moves to 2018-04-01,
+    # so u3 (last order 2017-06-15, no new orders) crosses the 270-day churn
+    # threshold
+    orders_path = olist_dir / "olist_orders_dataset.csv"
+    orders = pd.read_csv(orders_path)
+    new_order = orders[orders["order_id"] == "o7"].assign(
+        order_id="o8", order_purchase_timestamp="2018-04-01 10:00:00"
+    )
+    pd.concat([orders, new_order]).to_csv(orders_path, index=False)
+    payments_path = olist_dir / "olist_order_payments_dataset.csv"
+    payments = pd.read_csv(payments_path)
+    pd.concat([payments, payments[payments["order_id"] == "o7"].assign(order_id="o8")]).to_csv(payments_path, index=False)
+    get_data_service().get_snapshot(force_refresh=True)
+    
+    response = client.get(f"/export/customers_delta?since={since}")
+    lines = response.get_data(as_text=True).splitlines()
+    header = lines[0].split(",")
+    rows = {line.split(",")[1]: dict(zip(header, line.split(","))) for line in lines[1:]}
+    assert rows["u1"]["change"] == "upsert"
+    assert rows["u3"]["change"] == "upsert"
+    assert rows["u3"]["churn"] == "1"
+    
+    # A new churn threshold relabels customers: new version, changes upserted
+    version = response.headers["X-Snapshot-Version"]
+    monkeypatch.setattr(config, "CHURN_THRESHOLD_DAYS", 30)
+    get_data_service().get_snapshot(force_refresh=True)
+    relabeled = client.get(f"/export/customers_delta?since={version}")
+    assert int(relabeled.headers["X-Snapshot-Version"]) > int(version)
+    assert "u2" in {line.split(",")[1] for line in relabeled.get_data(as_text=True).splitlines()[1:]}
+
+
+def test_export_version_header_matches_rendered_snapshot(client, olist_dir, monkeypatch):
+    """Test that a refresh landing after the render doesn't relabel the file."""
+    import pandas as pd
+    from app.services import exports, get_data_service
+    
+    first = client.get("/export/customers.csv")
+    since = first.headers["X-Snapshot-Version"]
+    
+    # u5 (k6) disappears, but the refresh only lands once the file is ready
+    path = olist_dir / "olist_orders_dataset.csv"
+    orders = pd.read_csv(path)
+    orders[orders["customer_id"] != "k6"].to_csv(path, index=False)
+    queue = exports.get_export_queue()
+    run_now = queue.run_now
+    
+    def run_now_then_refresh(*args, **kwargs):
+        job = run_now(*args, **kwargs)
+        get_data_service().get_snapshot(force_refresh=True)
+        return job
+    
+    monkeypatch.setattr(queue, "run_now", run_now_then_refresh)
+    with client.get("/export/customers.csv") as response:
+        assert response.headers["X-Snapshot-Version"] == since
+        assert response.get_data() == first.get_data()
+    
+    monkeypatch.setattr(queue, "run_now", run_now)
+    assert int(client.get("/export/customers.csv").headers["X-Snapshot-Version"]) > int(since)
+
+
+def test_churn_probability_column(client):
+    """Test that customers are scored and the model parameters are served."""
+    customer = client.get("/api/customers/u2").get_json()
+    assert 0.0 <= customer["churn_probability"] <= 1.0
+    
+    model = client.get("/api/churn_model").get_json()
+    assert model["horizon_days"] == 270
+    assert len(model["coef"]) == 5
+
+
+def test_histogram_bins_and_range_count(client):
+    """Test histogram parameters and range counts over the cumulative index."""
+    hist = client.get("/api/recency_hist?bins=5").get_json()
+    assert len(hist["bins"]) == 5
+    assert sum(hist["counts"]) == 4
+    
+    tenure = client.get("/api/histogram?field=tenure_days&bins=3").get_json()
+    assert sum(tenure["counts"]) == 4
+    
+    total = client.get("/api/range_count?field=frequency").get_json()
+    assert total["count"] == 4
+    
+    assert client.get("/api/histogram?field=monetary").status_code == 400
+    assert client.get("/api/recency_hist?bins=0").status_code == 400
+    assert client.get("/api/recency_hist?bins=100000000").status_code == 400
+    assert client.get("/api/range_count?min=abc").status_code == 400
+
+
+def test_export_jobs_reuse_cached_files(client):
+    """Test submit/poll/download of export jobs and reuse of the cached file."""
+    response = client.post("/export/jobs?kind=top_risk")
+    assert response.status_code == 202
+    job = response.get_json()
+    
+    for _ in range(100):
+        status = client.get(f"/export/jobs/{job['id']}").get_json()
+        if status["status"] != "queued" and status["status"] != "running":
+            break
+        time.sleep(0.05)
+    assert status["status"] == "done"
+    
+    with client.get(f"/export/jobs/{job['id']}/download") as download:
+        assert download.headers["Content-Disposition"] == "attachment; filename=top_risk.csv"
+        body = download.get_data()
+    
+    # Same data and parameters: answered from the same file
+    again = client.post("/export/jobs?kind=top_risk").get_json()
+    assert again["status"] == "done"
+    assert again["key"] == job["key"]
+    with client.get("/export/top_risk.csv") as direct:
+        assert direct.get_data() == body
+    
+    assert client.post("/export/jobs?kind=nope").status_code == 400
+    assert client.get("/export/jobs/unknown").status_code == 404
+
+
+def test_export_rerendered_when_file_pruned_before_send(client, monkeypatch):
+    """Test that an export whose file is pruned right after rendering is rendered again."""
+    from app.services import exports
+    
+    queue = exports.get_export_queue()
+    prune = queue.prune
+    pruned = []
+    
+    def prune_everything_once():
+        if not pruned:
+            pruned.extend(path.name for path in queue.root.glob("*.csv"))
+            for path in queue.root.glob("*.csv"):
+                path.unlink()
+        return prune()
+    
+    monkeypatch.setattr(queue, "prune", prune_everything_once)
+    with client.get("/export/top_risk.csv") as response:
+        assert response.status_code == 200
+        assert response.get_data().startswith(b"customer_unique_id,")
+    assert pruned
+    
+    # Pruned every time: the client is asked to retry instead of getting a 500
+    monkeypatch.setattr(queue, "max_files", 0)
+    monkeypatch.setattr(queue, "prune", prune)
+    response = client.get("/export/customers.csv")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
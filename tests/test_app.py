@@ -0,0 +1,56 @@
+"""Tests for application startup and health endpoints."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def test_create_app_defers_pandas_import():
+    """Test that building the app does not import pandas."""
+    code = "import sys; from app import create_app; create_app(); print('pandas' in sys.modules)"
+    env = dict(os.environ, WARMUP_ON_STARTUP="False")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    
+    assert result.stdout.strip() == "False"
+
+
+def test_health_is_always_ok(client):
+    """Test that liveness does not depend on the data cache."""
+    response = client.get("/health")
+    
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+def test_ready_when_warmup_disabled(client):
+    """Test that readiness is reported when the cache is built lazily."""
+    response = client.get("/ready")
+    
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "disabled"
+    assert response.get_json()["ready"] is True
+
+
+def test_warmup_builds_cache_and_reports_ready(olist_dir):
+    """Test that the background warmup populates the cache."""
+    from app.services import get_data_service, warmup
+    
+    service = get_data_service()
+    service._snapshot = None
+    
+    assert warmup.start_warmup() is True
+    warmup._thread.join(timeout=30)
+    
+    state = warmup.warmup_status()
+    assert state["status"] == "ready"
+    assert state["ready"] is True
+    assert service.is_warm()
@@ -0,0 +1,58 @@
+"""Tests for the churn probability model."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.core import churn_model
+from app.core.order_index import build_order_index
+
+
+def test_fit_logistic_recovers_weights():
+    """Test that Newton's method finds the generating weights."""
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(20_000, 2))
+    X = np.column_stack([np.ones(len(x)), x])
+    true_w = np.array([-0.5, 2.0, -1.0])
+    y = (rng.random(len(x)) < 1 / (1 + np.exp(-(X @ true_w)))).astype(float)
+    
+    w = churn_model.fit_logistic(X, y, l2=0.0)
+    
+    assert np.allclose(w, true_w, atol=0.1)
+
+
+def test_model_learns_recency_from_replay():
+    """Test training on replayed history: recent buyers come back, old ones don't."""
+    rng = np.random.default_rng(1)
+    n = 400
+    first = pd.Timestamp("2017-01-01") + pd.to_timedelta(rng.integers(0, 300, n), unit="D")
+    returns = first >= pd.Timestamp("2017-07-01")
+    orders = pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in range(n)] + [f"c{i}" for i in np.flatnonzero(returns)],
+        "order_purchase_timestamp": list(first) + list(first[returns] + pd.Timedelta(days=150)),
+        "payment_value": 50.0,
+    })
+    index = build_order_index(orders)
+    
+    model = churn_model.train_churn_model(index, index.last_time, horizon_days=180)
+    
+    assert model.n_train > 0
+    assert model.coef[1] > 0  # longer recency -> more churn
+    features = pd.DataFrame({
+        "recency_days": [10, 400], "frequency": [1, 1], "monetary": [50.0, 50.0], "tenure_days": [10, 400],
+    })
+    p = churn_model.predict_churn_probability(model, features)
+    assert p[0] < p[1]
+
+
+def test_short_history_falls_back_to_base_rate():
+    """Test the intercept-only model when history is shorter than the horizon."""
+    orders = pd.DataFrame({
+        "customer_unique_id": ["a", "b"],
+        "order_purchase_timestamp": pd.to_datetime(["2018-01-01", "2018-02-01"]),
+        "payment_value": [10.0, 20.0],
+    })
+    model = churn_model.train_churn_model(build_order_index(orders), pd.Timestamp("2018-02-01"), 270)
+    
+    assert model.n_train == 0
+    assert model.coef[1:] == [0.0] * len(churn_model.MODEL_FEATURES)
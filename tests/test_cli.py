@@ -0,0 +1,84 @@
+"""Tests for the batch CLI and serving its artifacts."""
+from __future__ import annotations
+
+import json
+
+from app import cli
+from app.services import artifacts
+from app.services.data_service import DataService
+
+
+def test_cli_publishes_artifact(olist_dir, tmp_path, capsys):
+    """Test that a run writes a version, points LATEST at it and reports timings."""
+    output = tmp_path / "artifacts"
+    
+    assert cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    
+    assert summary["status"] == "ok"
+    assert summary["customers"] == 4
+    assert {"load", "prepare", "features", "aggregates", "write", "total"} <= set(summary["timings"])
+    assert artifacts.latest_version(str(output)) == summary["version"]
+    
+    manifest = json.loads((output / summary["version"] / "manifest.json").read_text())
+    assert manifest["inputs"]["orders"]["size"] > 0
+
+
+def test_cli_back_to_back_runs_get_distinct_versions(olist_dir, tmp_path, capsys):
+    """Test that two runs on the same inputs in quick succession both publish."""
+    output = tmp_path / "artifacts"
+    
+    assert cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)]) == 0
+    first = json.loads(capsys.readouterr().out)["version"]
+    assert cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)]) == 0
+    second = json.loads(capsys.readouterr().out)["version"]
+    
+    assert first != second
+    assert artifacts.latest_version(str(output)) == second
+    assert (output / first).is_dir()
+
+
+def test_cli_reports_errors_as_json(tmp_path, capsys):
+    """Test that a failed run exits 1 with a JSON error summary."""
+    assert cli.main(["--data-dir", str(tmp_path), "--output-dir", str(tmp_path / "out")]) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["status"] == "error"
+    assert "not found" in summary["error"]
+
+
+def test_service_serves_latest_artifact(olist_dir, tmp_path, capsys):
+    """Test that a service reading the artifact answers like one building from CSVs."""
+    output = tmp_path / "artifacts"
+    cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)])
+    capsys.readouterr()
+    
+    built = DataService(data_dir=str(olist_dir))
+    served = DataService(artifacts_dir=str(output))
+    
+    assert served.get_kpis() == built.get_kpis()
+    assert served.get_cohorts() == built.get_cohorts()
+    assert served.get_churn_trend() == built.get_churn_trend()
+    assert served.get_data_quality() == built.get_data_quality()
+    assert served.get_customer("u2") == built.get_customer("u2")
+    assert served.get_breakdown(by=["customer_state"]) == built.get_breakdown(by=["customer_state"])
+    assert served.get_features(as_of="2018-01-31")[0].equals(built.get_features(as_of="2018-01-31")[0])
+
+
+def test_service_reloads_newly_published_artifact(olist_dir, tmp_path, capsys):
+    """Test that a running service picks up an artifact published after its first load."""
+    import pandas as pd
+    
+    output = tmp_path / "artifacts"
+    cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)])
+    served = DataService(artifacts_dir=str(output))
+    assert served.get_kpis()["total_customers"] == 4
+    
+    # u5 (k6) disappears from the data; publish again
+    path = olist_dir / "olist_orders_dataset.csv"
+    orders = pd.read_csv(path)
+    orders[orders["customer_id"] != "k6"].to_csv(path, index=False)
+    cli.main(["--data-dir", str(olist_dir), "--output-dir", str(output)])
+    version = json.loads(capsys.readouterr().out.splitlines()[-1])["version"]
+    
+    assert served.get_kpis()["total_customers"] == 3
+    assert served.get_snapshot().aggregates["artifact_version"] == version
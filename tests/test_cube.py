@@ -0,0 +1,53 @@
+"""Tests for the pre-aggregated churn cube."""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app.core import cube
+
+
+def _features():
+    return pd.DataFrame({
+        "customer_unique_id": ["a", "b", "c", "d", "e"],
+        "risk_segment": ["Churn", "Churn", "Risco baixo", "Risco baixo", "Churn"],
+        "RFM_score": [1.0, 2.0, 4.0, 4.0, 1.0],
+        "customer_state": ["SP", "RJ", "SP", "SP", None],
+        "payment_type": ["boleto", "credit_card", "credit_card", "boleto", "boleto"],
+        "churn": [1, 1, 0, 0, 1],
+        "monetary": [10.0, 20.0, 30.0, 40.0, 50.0],
+    })
+
+
+def test_rollup_matches_direct_groupby():
+    """Test that a cube roll-up equals grouping the customer frame."""
+    features = _features()
+    result = cube.rollup(cube.build_cube(features), ["payment_type"])
+    
+    expected = features.groupby("payment_type").agg(
+        count=("churn", "size"), churn=("churn", "mean"), monetary=("monetary", "sum")
+    )
+    for _, row in result.iterrows():
+        exp = expected.loc[row["payment_type"]]
+        assert row["count"] == exp["count"]
+        assert row["churn_rate"] == pytest.approx(exp["churn"] * 100, abs=0.01)
+        assert row["monetary_sum"] == pytest.approx(exp["monetary"])
+
+
+def test_rollup_filters_and_keeps_missing_dimension_values():
+    """Test filters, and that customers without a state are not dropped."""
+    c = cube.build_cube(_features())
+    
+    by_state = cube.rollup(c, ["customer_state"], {"risk_segment": "Churn"})
+    assert by_state["count"].sum() == 3
+    assert by_state["customer_state"].isna().sum() == 1
+    
+    total = cube.rollup(c, [])
+    assert total.loc[0, "count"] == 5
+    assert total.loc[0, "churn_rate"] == 60.0
+
+
+def test_rollup_rejects_unknown_dimension():
+    """Test that measures or unknown names cannot be used as dimensions."""
+    with pytest.raises(ValueError):
+        cube.rollup(cube.build_cube(_features()), ["count"])
@@ -0,0 +1,37 @@
+"""Tests for the cumulative count index behind histograms and range counts."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.core import histogram
+
+
+def test_histogram_matches_pd_cut():
+    """Test labels and counts against the pd.cut histogram they replace."""
+    rng = np.random.default_rng(0)
+    for bins in (1, 7, 20):
+        values = rng.integers(0, 700, size=2000)
+        counts = histogram.build_cumulative_counts(values)
+        
+        cut = pd.cut(pd.Series(values), bins=bins)
+        expected = cut.value_counts(sort=False).sort_index()
+        labels = [f"{int(i.left)}-{int(i.right)}" for i in expected.index]
+        
+        assert histogram.histogram(counts, bins) == (labels, expected.tolist())
+
+
+def test_count_between_and_bounded_histogram():
+    """Test inclusive range counts and histograms over a sub-range."""
+    values = np.array([0, 1, 1, 5, 10, 10, 10, 42])
+    counts = histogram.build_cumulative_counts(values)
+    
+    assert counts.total == 8
+    assert counts.count_between(1, 10) == 6
+    assert counts.count_between(11, 41) == 0
+    assert counts.count_between(-5, 100) == 8
+    assert counts.count_between(10, 1) == 0
+    
+    labels, values_per_bin = histogram.histogram(counts, bins=2, lo=0, hi=10)
+    assert sum(values_per_bin) == 7  # 42 is outside the range
+    assert len(labels) == 2
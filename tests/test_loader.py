@@ -0,0 +1,47 @@
+"""Tests for column-pruned CSV loading."""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import config
+from app.services import loader
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_load_datasets_projects_pipeline_columns(olist_dir, monkeypatch, engine):
+    """Test that only pipeline columns are read, with explicit dtypes."""
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(config, "CSV_ENGINE", engine)
+    
+    customers, orders, payments = loader.load_datasets({
+        "customers": config.PATH_CUSTOMERS,
+        "orders": config.PATH_ORDERS,
+        "payments": config.PATH_PAYMENTS,
+    })
+    
+    assert set(customers.columns) == {"customer_id", "customer_unique_id", "customer_state"}
+    assert set(orders.columns) == {"order_id", "customer_id", "order_status", "order_purchase_timestamp"}
+    assert set(payments.columns) == {"order_id", "payment_value", "payment_type", "payment_installments"}
+    assert pd.api.types.is_datetime64_any_dtype(orders["order_purchase_timestamp"])
+    assert pd.api.types.is_string_dtype(orders["order_id"])
+    assert len(payments) == 8
+
+
+def test_missing_columns_are_left_to_schema_validation(tmp_path):
+    """Test that absent columns are skipped instead of failing the parser."""
+    path = tmp_path / "payments.csv"
+    pd.DataFrame({"order_id": ["o1"], "payment_type": ["boleto"]}).to_csv(path, index=False)
+    
+    df = loader.read_projected_csv(str(path), {"order_id": "string", "payment_value": None}, engine="c")
+    
+    assert list(df.columns) == ["order_id"]
+
+
+def test_missing_file_names_dataset(tmp_path):
+    """Test that a missing file raises FileNotFoundError naming the dataset."""
+    paths = {name: str(tmp_path / f"{name}.csv") for name in ["customers", "orders", "payments"]}
+    
+    with pytest.raises(FileNotFoundError, match="Customers file not found"):
+        loader.load_datasets(paths)
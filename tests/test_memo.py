@@ -0,0 +1,51 @@
+"""Tests for the on-disk pipeline stage memo."""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import config
+from app.services import memo
+from app.services.data_service import DataService
+
+
+def test_rebuild_reads_unchanged_stages_from_memo(olist_dir, tmp_path, monkeypatch):
+    """Test that a rebuild skips loading and only reruns stages whose inputs changed."""
+    monkeypatch.setattr(config, "MEMO_DIR", str(tmp_path / "memo"))
+    first = DataService().build_snapshot()
+    
+    def no_load(*args, **kwargs):
+        raise AssertionError("raw data loaded despite memo hit")
+    
+    monkeypatch.setattr(DataService, "load_raw_data", no_load)
+    timings = {}
+    second = DataService().build_snapshot(timings=timings)
+    
+    pd.testing.assert_frame_equal(second.features, first.features)
+    pd.testing.assert_frame_equal(second.orders, first.orders)
+    assert second.as_of_date == first.as_of_date
+    assert "load" not in timings
+    
+    # A new threshold reruns scoring from the memoized features
+    monkeypatch.setattr(config, "CHURN_THRESHOLD_DAYS", 30)
+    rescored = DataService().build_snapshot()
+    assert rescored.features["churn"].sum() > first.features["churn"].sum()
+    
+    # Changed input files rerun everything
+    (olist_dir / config.DATA_FILES["orders"]).write_text("")
+    with pytest.raises(AssertionError, match="raw data loaded"):
+        DataService().build_snapshot()
+
+
+def test_memo_store_evicts_least_recently_used(tmp_path):
+    """Test the size bound of the memo store."""
+    store = memo.MemoStore(str(tmp_path), max_bytes=0)
+    frame = pd.DataFrame({"x": range(1000)})
+    for key in ["a", "b", "c"]:
+        store.put(key, {"frame": frame}, {}, digest=key)
+    
+    store.get("a")  # most recently used now
+    store.max_bytes = store.size() - 1
+    assert store.evict() == ["b"]
+    assert store.get("b") is None
+    assert store.get("a")[0]["frame"].equals(frame)
@@ -0,0 +1,54 @@
+"""Tests for risk segment migration between runs."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.core import migration
+
+
+LABELS = ["low", "mid", "high"]
+
+
+def test_segment_codes_extend_universe():
+    """Test that customers keep their position and new ones are appended."""
+    universe, first = migration.segment_codes(
+        pd.Series(["a", "b"]), pd.Series(["low", "high"]), LABELS, pd.Index([], dtype=object)
+    )
+    universe, second = migration.segment_codes(
+        pd.Series(["c", "a"]), pd.Series(["mid", "mid"]), LABELS, universe
+    )
+    
+    assert list(universe) == ["a", "b", "c"]
+    assert first.tolist() == [0, 2]
+    assert second.tolist() == [1, migration.ABSENT, 1]
+
+
+def test_segment_migration_matrix():
+    """Test transition counts, including customers entering and leaving."""
+    previous = np.array([0, 2], dtype="int8")
+    current = np.array([1, -1, 1, 2], dtype="int8")
+    
+    result = migration.segment_migration(previous, current, LABELS)
+    
+    expected = np.zeros((4, 4), dtype="int64")
+    expected[0, 1] = 1  # a: low -> mid
+    expected[2, 3] = 1  # b: high -> absent
+    expected[3, 1] = 1  # c: new -> mid
+    expected[3, 2] = 1  # d: new -> high
+    assert np.array_equal(result.matrix, expected)
+    assert result.changed.tolist() == [0, 1, 2, 3]
+
+
+def test_delta_positions():
+    """Test upserts (new or changed rows) and deletes between hash arrays."""
+    from app.core import delta
+    
+    previous = np.array([11, 22, 33], dtype="uint64")
+    current = np.array([11, 99, 0, 44], dtype="uint64")
+    
+    upserts, deletes = delta.delta_positions(previous, current)
+    
+    assert upserts.tolist() == [1, 3]
+    assert deletes.tolist() == [2]
+    assert delta.same_content(previous, previous.copy())
@@ -0,0 +1,79 @@
+"""Tests for the per-customer order index (as_of replay)."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.core import order_index, pipeline
+
+
+def _orders():
+    rng = np.random.default_rng(7)
+    n = 400
+    return pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in rng.integers(0, 60, n)],
+        "order_purchase_timestamp": pd.Timestamp("2017-01-01")
+        + pd.to_timedelta(rng.integers(0, 600 * 86_400, n), unit="s"),
+        "payment_value": rng.integers(0, 50_000, n) / 100.0,
+    })
+
+
+def test_features_as_of_matches_filtered_recompute():
+    """Test that replayed features equal a full recompute on filtered orders."""
+    orders = _orders()
+    index = order_index.build_order_index(orders)
+    
+    for as_of in ["2017-03-01", "2017-09-15 12:34:56", orders["order_purchase_timestamp"].max()]:
+        as_of = pd.Timestamp(as_of)
+        expected = pipeline.compute_customer_features(
+            orders[orders["order_purchase_timestamp"] <= as_of], as_of
+        )
+        result = order_index.features_as_of(index, as_of)
+        
+        expected = expected.sort_values("customer_unique_id").reset_index(drop=True)
+        result = result.sort_values("customer_unique_id").reset_index(drop=True)
+        
+        assert result["customer_unique_id"].tolist() == expected["customer_unique_id"].tolist()
+        for col in ["frequency", "recency_days", "tenure_days"]:
+            assert result[col].tolist() == expected[col].tolist()
+        assert (result["last_purchase"] == expected["last_purchase"]).all()
+        np.testing.assert_allclose(result["monetary"], expected["monetary"])
+
+
+def test_payment_features_as_of_match_recompute():
+    """Test that replayed payment features equal a recompute on filtered orders."""
+    rng = np.random.default_rng(11)
+    orders = _orders().assign(order_id=[f"o{i}" for i in range(400)])
+    payments = pd.DataFrame({
+        "order_id": rng.choice(orders["order_id"], 500),
+        "payment_type": rng.choice(["credit_card", "boleto", "voucher", "debit_card"], 500),
+        "payment_installments": rng.integers(1, 10, 500),
+        "payment_value": rng.integers(0, 50_000, 500) / 100.0,
+    })
+    customers = pd.DataFrame({"customer_id": orders["customer_unique_id"].unique()})
+    customers["customer_unique_id"] = customers["customer_id"]
+    joined = pipeline.join_datasets(
+        orders.drop(columns="payment_value").rename(columns={"customer_unique_id": "customer_id"}),
+        customers,
+        pipeline.aggregate_payments_by_order(payments)
+    )
+    index = order_index.build_order_index(joined, attributes=["payment_type"])
+    
+    as_of = pd.Timestamp("2017-09-15")
+    expected = pipeline.compute_customer_features(joined[joined["order_purchase_timestamp"] <= as_of], as_of)
+    result = order_index.features_as_of(index, as_of)
+    
+    assert list(result.columns) == list(expected.columns)
+    expected = expected.set_index("customer_unique_id").loc[result["customer_unique_id"]]
+    for col in ["avg_installments", "voucher_share", "credit_card_share", "boleto_share", "payment_methods"]:
+        np.testing.assert_allclose(result[col].to_numpy(dtype="float64"), expected[col].to_numpy(dtype="float64"))
+
+
+def test_features_as_of_before_first_order_is_empty():
+    """Test that no customers exist before the first order."""
+    orders = _orders()
+    index = order_index.build_order_index(orders)
+    
+    result = order_index.features_as_of(index, index.first_time - pd.Timedelta(seconds=1))
+    
+    assert result.empty
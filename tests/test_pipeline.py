@@ -113,3 +113,82 @@ def test_qcut_safe_handles_duplicates():
     
     assert len(result) == len(s)
     assert result.isin([1, 2, 3]).all()
+
+
+def test_rfm_segment_is_compact_code():
+    """Test that RFM_segment stores codes and decodes to R-F-M labels."""
+    features = pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in range(10)],
+        "recency_days": list(range(10)),
+        "frequency": list(range(1, 11)),
+        "monetary": [float(i) for i in range(10, 0, -1)]
+    })
+    
+    result = pipeline.compute_rfm_scores(features)
+    
+    expected = (
+        result["R_score"].astype(str) + "-"
+        + result["F_score"].astype(str) + "-"
+        + result["M_score"].astype(str)
+    )
+    assert result["RFM_segment"].cat.codes.dtype == "int8"
+    assert result["RFM_segment"].astype(str).tolist() == expected.tolist()
+
+
+def test_rfm_matrix_covers_all_cells():
+    """Test that the R-F-M matrix has 125 cells summing to the input."""
+    features = pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in range(50)],
+        "recency_days": list(range(50)),
+        "frequency": [1 + i % 3 for i in range(50)],
+        "monetary": [float(i) for i in range(50)],
+        "churn": [i % 2 for i in range(50)]
+    })
+    features = pipeline.compute_rfm_scores(features)
+    
+    matrix = pipeline.compute_rfm_matrix(features)
+    
+    assert len(matrix) == 125
+    assert matrix["count"].sum() == 50
+    assert matrix["monetary_sum"].sum() == pytest.approx(features["monetary"].sum())
+    cell = matrix[matrix["RFM_segment"] == "5-1-1"].iloc[0]
+    members = features[features["RFM_segment"] == "5-1-1"]
+    assert cell["count"] == len(members)
+    assert cell["churn_rate"] == pytest.approx(members["churn"].mean() * 100)
+
+
+def test_payment_features_per_customer():
+    """Test installments, spend shares and payment methods from the payment mix (o4, o5 have no payments)."""
+    payments = pd.DataFrame({
+        "order_id": ["o1", "o1", "o2", "o3"],
+        "payment_value": [30.0, 10.0, 60.0, 0.0],
+        "payment_type": ["credit_card", "voucher", "boleto", "voucher"],
+        "payment_installments": [4, 1, 1, None],
+    })
+    orders = pd.DataFrame({
+        "order_id": ["o1", "o2", "o3", "o4", "o5"],
+        "customer_id": ["k1", "k1", "k2", "k1", "k3"],
+        "order_status": ["delivered"] * 5,
+        "order_purchase_timestamp": pd.to_datetime(["2018-01-01", "2018-02-01", "2018-03-01", "2018-02-15", "2018-02-20"]),
+    })
+    customers = pd.DataFrame({"customer_id": ["k1", "k2", "k3"], "customer_unique_id": ["u1", "u2", "u3"]})
+    
+    agg = pipeline.aggregate_payments_by_order(payments)
+    assert agg.set_index("order_id")["payment_type"].to_dict() == {"o1": "credit_card", "o2": "boleto", "o3": "voucher"}
+    
+    joined = pipeline.join_datasets(orders, customers, agg)
+    features = pipeline.compute_customer_features(joined, pd.Timestamp("2018-03-01")).set_index("customer_unique_id")
+    
+    u1, u2, u3 = features.loc["u1"], features.loc["u2"], features.loc["u3"]
+    assert u1["avg_installments"] == 2.0
+    assert u1["credit_card_share"] == 0.3
+    assert u1["voucher_share"] == 0.1
+    assert u1["boleto_share"] == 0.6
+    assert u1["payment_methods"] == 3
+    # Zero spend and no installments: shares and mean are 0, the method still counts
+    assert u2["voucher_share"] == 0.0
+    assert u2["avg_installments"] == 0.0
+    assert u2["payment_methods"] == 1
+    # No payments at all: every payment feature is 0
+    assert u3["monetary"] == 0.0
+    assert (u3[["avg_installments", "voucher_share", "credit_card_share", "boleto_share", "payment_methods"]] == 0).all()
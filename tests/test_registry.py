@@ -0,0 +1,72 @@
+"""Tests for named datasets and the snapshot memory budget."""
+from __future__ import annotations
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from app.services.data_service import DataService
+from app.services.registry import DatasetRegistry, registry
+
+
+@pytest.fixture
+def second_dir(olist_dir, tmp_path_factory):
+    """A copy of the tiny dataset without customer u5's orders."""
+    path = tmp_path_factory.mktemp("second")
+    for csv in olist_dir.glob("*.csv"):
+        shutil.copy(csv, path / csv.name)
+    orders = pd.read_csv(path / "olist_orders_dataset.csv")
+    orders[orders["customer_id"] != "k6"].to_csv(path / "olist_orders_dataset.csv", index=False)
+    return path
+
+
+@pytest.fixture
+def second_dataset(second_dir):
+    """Register the copy as dataset "second" on the global registry."""
+    service = registry.register(DataService(data_dir=str(second_dir), name="second"))
+    yield service
+    registry._services.pop("second", None)
+    registry._recent.pop("second", None)
+    registry._sizes.pop("second", None)
+
+
+def test_routes_select_dataset(client, second_dataset):
+    """Test that URL prefix and query parameter pick the dataset."""
+    assert client.get("/api/summary").get_json()["total_customers"] == 4
+    assert client.get("/d/second/api/summary").get_json()["total_customers"] == 3
+    assert client.get("/api/summary?dataset=second").get_json()["total_customers"] == 3
+    assert client.get("/d/second/export/customers.csv").status_code == 200
+    
+    assert client.get("/d/nope/api/summary").status_code == 400
+
+
+def test_budget_evicts_least_recently_used(olist_dir, second_dir):
+    """Test LRU eviction once the cached snapshots exceed the budget."""
+    first = DataService(data_dir=str(olist_dir), name="first")
+    second = DataService(data_dir=str(second_dir), name="second")
+    datasets = DatasetRegistry(first)
+    datasets.register(second)
+    
+    datasets.get("first").get_kpis()
+    size = datasets.usage()["used_bytes"]
+    assert size > 0
+    
+    datasets.budget_bytes = int(size * 1.5)
+    datasets.get("second").get_kpis()
+    
+    assert first._snapshot is None
+    assert second._snapshot is not None
+    assert list(datasets.usage()["datasets"]) == ["second"]
+    
+    # Evicted datasets are rebuilt on their next request
+    assert datasets.get("first").get_kpis()["total_customers"] == 4
+    assert second._snapshot is None
+
+
+def test_dashboard_uses_dataset_prefix(client, second_dataset):
+    """Test that the dashboard points its API calls at the selected dataset."""
+    html = client.get("/d/second/").get_data(as_text=True)
+    assert 'window.CHURNLENS_BASE = "/d/second"' in html
+    assert 'href="/d/second/export/customers.csv"' in html
+    assert 'href="/d/second/"' in html
@@ -0,0 +1,67 @@
+"""Tests for the stratified sample and approximate dashboard mode."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.core import sampling
+from app.services.data_service import DataService
+
+
+def test_stratified_sample_is_proportional_and_reproducible():
+    """Test per-stratum quotas and deterministic priorities."""
+    customers = pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in range(1000)],
+        "customer_state": ["SP"] * 800 + ["RJ"] * 190 + ["AC"] * 10,
+    })
+    
+    design = sampling.stratified_sample(customers, size=100)
+    again = sampling.stratified_sample(customers, size=100)
+    
+    assert dict(zip(design.strata, design.sampled)) == {"AC": 2, "RJ": 19, "SP": 80}
+    assert design.customer_ids.equals(again.customer_ids)
+    
+    # A full sample reproduces totals exactly, with zero-width intervals
+    full = sampling.stratified_sample(customers, size=1000)
+    y = np.ones(len(full.customer_ids))
+    assert sampling.estimate_total(full, y) == (1000.0, 1000.0, 1000.0)
+
+
+def test_ratio_interval_covers_population_rate():
+    """Test the ratio estimator on a sample of a known population."""
+    rng = np.random.default_rng(0)
+    customers = pd.DataFrame({
+        "customer_unique_id": [f"c{i}" for i in range(20_000)],
+        "customer_state": rng.choice(["SP", "RJ", "MG"], 20_000),
+    })
+    churn = pd.Series(rng.random(20_000) < 0.3, index=customers["customer_unique_id"]).astype(float)
+    
+    design = sampling.stratified_sample(customers, size=2000)
+    y = churn.loc[design.customer_ids].to_numpy()
+    rate, low, high = sampling.estimate_ratio(design, y, np.ones_like(y))
+    
+    assert low < churn.mean() < high
+    assert high - low < 0.06
+
+
+def test_service_serves_approximation_during_build(olist_dir, monkeypatch):
+    """Test that dashboard getters answer from the sample while the build runs."""
+    monkeypatch.setattr(config, "APPROX_MODE", True)
+    service = DataService()
+    service._approximation = service.build_approximation(*service.load_raw_data())
+    
+    with service._build_lock:
+        kpis = service.get_kpis()
+        risk = service.get_risk_summary()
+        rfm = service.get_churn_by_rfm()
+    
+    exact = service.get_kpis()
+    assert kpis["approximate"] is True
+    assert "approximate" not in exact
+    # The tiny dataset is sampled in full, so the estimates are exact
+    assert kpis["total_customers"] == exact["total_customers"]
+    assert kpis["churn_rate"] == exact["churn_rate"]
+    assert sum(r["count"] for r in risk) == exact["total_customers"]
+    assert "churn_rate_ci95" in rfm[0] and "monetary_sum" not in rfm[0]
+    assert service._approximation is None
@@ -0,0 +1,59 @@
+"""Tests for row-level validation and data quality reports."""
+from __future__ import annotations
+
+import pandas as pd
+
+from app.core import validation
+
+
+def _violations(report):
+    return {v.rule: v.count for v in report.violations}
+
+
+def test_check_order_rows_reports_every_rule():
+    """Test that each dropped order is attributed to its rules."""
+    orders = pd.DataFrame({
+        "order_id": ["o1", "o2", None, "o2", "o4", "o5"],
+        "customer_id": ["c1", "c2", "c3", "c2", "c4", "c5"],
+        "order_status": ["delivered", "delivered", "delivered", "delivered", "canceled", "lost"],
+        "order_purchase_timestamp": pd.to_datetime(
+            ["2018-01-01", "2018-01-02", "2018-01-03", "2018-01-02", None, "2018-01-05"]
+        ),
+    })
+    
+    clean, report = validation.check_order_rows(orders, valid_status={"delivered"})
+    
+    assert clean["order_id"].tolist() == ["o1", "o2"]
+    assert report.total_rows == 6
+    assert report.kept_rows == 2
+    assert report.dropped_rows == 4
+    assert _violations(report) == {
+        "missing_order_id": 1,
+        "missing_customer_id": 0,
+        "missing_purchase_timestamp": 1,
+        "duplicate_order_id": 1,
+        "unknown_status": 1,
+        "excluded_status": 1,
+    }
+    samples = {v.rule: v.sample_keys for v in report.violations}
+    assert samples["missing_order_id"] == ["row:2"]
+    assert samples["unknown_status"] == ["o5"]
+
+
+def test_check_payment_rows_parses_and_reports():
+    """Test unparseable, missing and negative payments are dropped and counted."""
+    payments = pd.DataFrame({
+        "order_id": ["o1", "o2", "o3", "o4", None],
+        "payment_value": ["10.5", "abc", None, "-3", "7"],
+    })
+    
+    clean, report = validation.check_payment_rows(payments)
+    
+    assert clean["order_id"].tolist() == ["o1"]
+    assert clean["payment_value"].tolist() == [10.5]
+    assert _violations(report) == {
+        "missing_order_id": 1,
+        "missing_payment_value": 1,
+        "unparseable_payment_value": 1,
+        "negative_payment_value": 1,
+    }